@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Compare the full render of a growing time series with the incremental
+render (blitting) over a cached background.
+
+Every step appends ``STEP`` points to the series. The x limits grow in
+blocks of ``XBLOCK`` points, so the background is drawn again only when
+the series reaches the end of the axes.
+
+Usage: ``python benchmarks/bench_blit.py``
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+
+import utils
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+SIZES = [1_000, 10_000]
+
+STEP = 10
+
+XBLOCK = 500
+
+STEPS = 50
+
+GRIDS = [{}, {"nrows": 2, "ncols": 2}]
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def render(series, size, subplots_kwargs, blit):
+    import matplotlib.pyplot as plt
+
+    from django_matplotlib import core
+
+    plot = core.subplots(
+        plot_format="png",
+        template_engine="str",
+        blit=blit,
+        blit_key="bench",
+        **subplots_kwargs,
+    )
+    fig, axes = plot.figaxes()
+    x = np.arange(size)
+    for ax in np.ravel(axes):
+        ax.grid(True)
+        ax.axhline(0, color="0.5", linestyle="--")
+        ax.plot(x, series[:size], animated=True)
+        ax.set_title("Requests per second")
+        ax.set_xlabel("time")
+        ax.set_ylabel("rps")
+        ax.set_xlim(0, (size // XBLOCK + 1) * XBLOCK)
+        ax.set_ylim(-100, 100)
+    html = plot.html_str()
+    plt.close("all")
+    return html
+
+
+def run(series, start, subplots_kwargs, blit):
+    for step in range(STEPS):
+        render(series, start + step * STEP, subplots_kwargs, blit)
+
+
+def main():
+    utils.setup_django()
+
+    from django_matplotlib import blit as blitting
+
+    series = np.random.default_rng(42).normal(size=20_000).cumsum()
+    series = 90 * series / np.abs(series).max()
+
+    rows = []
+    for subplots_kwargs in GRIDS:
+        grid = "{nrows}x{ncols}".format(
+            **{"nrows": 1, "ncols": 1, **subplots_kwargs}
+        )
+        for size in SIZES:
+            for blit in (False, True):
+                blitting.clear_cache()
+                elapsed, _ = utils.timeit(
+                    lambda: run(series, size, subplots_kwargs, blit),
+                    repeat=3,
+                )
+                rows.append(
+                    [
+                        grid,
+                        size,
+                        "blit" if blit else "full",
+                        f"{elapsed / STEPS * 1000:.1f}",
+                    ]
+                )
+
+    utils.print_table(["grid", "points", "render", "ms/render"], rows)
+
+
+if __name__ == "__main__":
+    main()
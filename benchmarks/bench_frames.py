@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Compare the conversion of a queryset in every plot method with the
+pipeline of ``django_matplotlib.frames`` evaluated once per request.
+
+A time series of ``User.date_joined`` is plotted by ``PLOTS`` plot
+methods. The "lists" path is the usual code of the plot methods: a list of
+rows converted by every method. The "arrays" path uses a
+``frames.Pipeline(as_frame=False)`` (typed arrays, matplotlib receives
+``datetime64`` arrays). If pandas is installed, the same comparison is
+done with a DataFrame resampled by hour. The time includes the handoff of
+the data to matplotlib (``ax.plot``), not the render of the figures.
+
+The users are created in a temporary in-memory database.
+
+Usage: ``python benchmarks/bench_frames.py``
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import datetime as dt
+
+import utils
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+SIZES = [10_000, 100_000]
+
+PLOTS = 4
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def create_users(size):
+    from django.contrib.auth.models import User
+
+    User.objects.all().delete()
+    start = dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+    User.objects.bulk_create(
+        (
+            User(
+                username=f"user{idx}",
+                date_joined=start + dt.timedelta(seconds=37 * idx),
+            )
+            for idx in range(size)
+        ),
+        batch_size=5_000,
+    )
+    return User.objects.order_by("date_joined")
+
+
+def draw_lists(queryset, axes):
+    for ax in axes:
+        rows = list(queryset.values_list("date_joined", "id"))
+        ax.plot([r[0] for r in rows], [r[1] for r in rows])
+
+
+def draw_arrays(queryset, axes):
+    from django_matplotlib import frames
+
+    pipeline = frames.Pipeline(columns=["date_joined", "id"], as_frame=False)
+    data = pipeline.evaluate(queryset)
+    for ax in axes:
+        ax.plot(data["date_joined"], data["id"])
+
+
+def draw_pandas_per_method(queryset, axes):
+    import pandas as pd
+
+    for ax in axes:
+        frame = pd.DataFrame(list(queryset.values("date_joined", "id")))
+        frame = frame.set_index("date_joined").resample("1h").count()
+        ax.plot(frame.index, frame["id"])
+
+
+def draw_pandas_pipeline(queryset, axes):
+    from django_matplotlib import frames
+
+    pipeline = frames.Pipeline(
+        columns=["date_joined", "id"],
+        index="date_joined",
+        steps=[frames.Resample("1h", how="count")],
+    )
+    frame = pipeline.evaluate(queryset)
+    for ax in axes:
+        ax.plot(frame.index, frame["id"])
+
+
+def run(draw, queryset):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(ncols=PLOTS)
+    draw(queryset, axes)
+    plt.close(fig)
+
+
+def main():
+    utils.setup_django()
+
+    from django.db import connection
+
+    paths = [("lists", draw_lists), ("arrays", draw_arrays)]
+    try:
+        import pandas  # noqa
+    except ImportError:
+        print("pandas is not installed, only the arrays are compared")
+    else:
+        paths += [
+            ("pandas per method", draw_pandas_per_method),
+            ("pandas pipeline", draw_pandas_pipeline),
+        ]
+
+    connection.settings_dict["TEST"]["NAME"] = ":memory:"
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        rows = []
+        for size in SIZES:
+            queryset = create_users(size)
+            for name, draw in paths:
+                elapsed, _ = utils.timeit(
+                    lambda: run(draw, queryset), repeat=3
+                )
+                rows.append([size, name, f"{elapsed * 1000:.1f}"])
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    utils.print_table(["rows", "path", "ms/request"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Measure the time to import django_matplotlib in a fresh interpreter.
+
+The "eager" row import the heavy modules (pyplot, mpld3 and jinja2) with
+the package, as was done before they were imported lazily.
+
+Usage: ``python benchmarks/bench_import.py``
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import os
+import subprocess  # nosec
+import sys
+
+import utils
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+CASES = {
+    "django": "import django.conf; django.conf.settings.TEMPLATES",
+    "lazy": "import django_matplotlib",
+    "eager": (
+        "import django_matplotlib, matplotlib.pyplot, mpld3, jinja2"  # noqa
+    ),
+}
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def run(code):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="test_prj.settings")
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(utils.REPO_PATH), str(utils.TEST_PRJ_PATH)]
+    )
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)  # nosec
+
+
+def main():
+    rows = []
+    for name, code in CASES.items():
+        run(code)  # warm the disk cache and the .pyc
+        elapsed, _ = utils.timeit(lambda: run(code), repeat=7)
+        rows.append([name, f"{elapsed * 1000:.1f}"])
+    utils.print_table(["import", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
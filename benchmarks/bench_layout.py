@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Compare the time to render a small chart with every layout strategy.
+
+Usage: ``python benchmarks/bench_layout.py``
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+
+import utils
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+LAYOUTS = [None, "tight", "cached", "constrained", "fixed"]
+
+GRIDS = [{}, {"nrows": 2, "ncols": 2}]
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def render(layout_name, subplots_kwargs):
+    import matplotlib.pyplot as plt
+
+    from django_matplotlib import core, layout
+
+    plot = core.subplots(
+        plot_format="png", template_engine="str", **subplots_kwargs
+    )
+    fig, axes = plot.figaxes()
+    for ax in np.ravel(axes):
+        ax.plot(np.arange(20) ** 2)
+        ax.set_title("A small chart")
+        ax.set_xlabel("x")
+        ax.set_ylabel("y")
+    layout.apply_layout(
+        fig, layout_name, key=layout.subplots_key(subplots_kwargs)
+    )
+    html = plot.html_str()
+    plt.close("all")
+    return html
+
+
+def main():
+    utils.setup_django()
+
+    rows = []
+    for subplots_kwargs in GRIDS:
+        grid = "{nrows}x{ncols}".format(
+            **{"nrows": 1, "ncols": 1, **subplots_kwargs}
+        )
+        for layout_name in LAYOUTS:
+            render(layout_name, subplots_kwargs)  # fill the cache
+            elapsed, _ = utils.timeit(
+                lambda: render(layout_name, subplots_kwargs), repeat=15
+            )
+            rows.append([grid, str(layout_name), f"{elapsed * 1000:.1f}"])
+
+    utils.print_table(["grid", "layout", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Compare the render time and the size of the html of a page with many
+small charts drawn as one figure per chart and as small multiples.
+
+Usage: ``python benchmarks/bench_multiples.py``
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+
+import utils
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+SIZES = [4, 16, 36]
+
+FORMATS = ["png", "svg"]
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+MODES = {
+    "figures": {"small_multiples": False},
+    "multiples": {"small_multiples": True},
+    "shared": {
+        "small_multiples": True,
+        "small_multiples_kwargs": {"sharex": True, "sharey": True},
+    },
+}
+
+
+def make_view(size, plot_format, mode):
+    from django.views.generic import TemplateView
+
+    import django_matplotlib as djmpl
+
+    def draw(self, data, fig, ax):
+        ax.plot(data)
+        ax.set_title("chart")
+
+    methods = {f"plot_{idx:03d}": draw for idx in range(size)}
+    return type(
+        "BenchView",
+        (djmpl.MultiPlotMixin, TemplateView),
+        {
+            "plot_data": np.random.default_rng(42).normal(size=50).cumsum(),
+            "plot_format": plot_format,
+            "layout": "tight",
+            "subplots_kwargs": {"figsize": (3.2, 2.4)},
+            **MODES[mode],
+            **methods,
+        },
+    )
+
+
+def render(view_cls):
+    import matplotlib.pyplot as plt
+
+    from django.test import RequestFactory
+
+    view = view_cls()
+    view.setup(RequestFactory().get("/"))
+    plots = view.get_context_data()["plots"]
+    html = "".join(plot.html_str() for plot in plots)
+    plt.close("all")
+    return html
+
+
+def main():
+    utils.setup_django()
+
+    rows = []
+    for plot_format in FORMATS:
+        for size in SIZES:
+            for mode in MODES:
+                view_cls = make_view(size, plot_format, mode)
+                elapsed, html = utils.timeit(
+                    lambda: render(view_cls), repeat=3
+                )
+                rows.append(
+                    [
+                        plot_format,
+                        size,
+                        mode,
+                        f"{elapsed * 1000:.0f}",
+                        f"{len(html) / 1024:.0f}",
+                    ]
+                )
+
+    utils.print_table(["format", "plots", "mode", "ms", "KiB"], rows)
+
+
+if __name__ == "__main__":
+    main()
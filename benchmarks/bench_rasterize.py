@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Compare the SVG output of dense scatter plots with and without the
+adaptive rasterization.
+
+The browser-side paint cost is approximated by the number of SVG shapes
+(``path`` and ``use`` elements) the browser has to paint.
+
+Usage: ``python benchmarks/bench_rasterize.py``
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+
+import utils
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+SIZES = [1_000, 10_000, 50_000, 100_000]
+
+THRESHOLD = 5_000
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def render(size, threshold):
+    import matplotlib.pyplot as plt
+
+    from django_matplotlib import core
+
+    random = np.random.default_rng(42)
+    plot = core.subplots(
+        plot_format="svg", template_engine="str", rasterize_threshold=threshold
+    )
+    fig, ax = plot.figaxes()
+    ax.scatter(random.random(size), random.random(size), s=1)
+    ax.set_title(f"{size} points")
+    html = plot.to_html()
+    plt.close("all")
+    return html
+
+
+def shapes(svg):
+    return svg.count("<path") + svg.count("<use")
+
+
+def main():
+    utils.setup_django()
+
+    rows = []
+    for size in SIZES:
+        for threshold in (None, THRESHOLD):
+            elapsed, svg = utils.timeit(
+                lambda: render(size, threshold), repeat=3
+            )
+            rows.append(
+                [
+                    size,
+                    "vector" if threshold is None else "adaptive",
+                    f"{len(svg) / 1024:.1f}",
+                    shapes(svg),
+                    f"{elapsed * 1000:.1f}",
+                ]
+            )
+
+    utils.print_table(["points", "mode", "KiB", "shapes", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
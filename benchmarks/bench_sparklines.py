@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Compare the time per row to render the sparklines of a list page with
+one figure per row, the SVG builder and the sprite sheet.
+
+Usage: ``python benchmarks/bench_sparklines.py``
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import numpy as np
+
+import utils
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+ROWS = [10, 100, 500]
+
+POINTS = 60
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def one_figure_per_row(series):
+    import matplotlib.pyplot as plt
+
+    from django_matplotlib import core
+
+    htmls = []
+    for values in series:
+        plot = core.subplots(
+            plot_format="png", template_engine="str", figsize=(1, 0.2)
+        )
+        plot.axes.plot(values)
+        plot.axes.set_axis_off()
+        htmls.append(plot.html_str())
+        plt.close("all")
+    return htmls
+
+
+def svg(series):
+    from django_matplotlib import sparklines
+
+    return sparklines.svg_sparklines(series, template_engine="str")
+
+
+def sprite(series):
+    from django_matplotlib import sparklines
+
+    sheet = sparklines.sprite_sparklines(series, template_engine="str")
+    return [sheet.style()] + list(sheet)
+
+
+def main():
+    utils.setup_django()
+
+    rng = np.random.default_rng(42)
+    methods = [
+        ("figures", one_figure_per_row),
+        ("svg", svg),
+        ("sprite", sprite),
+    ]
+
+    rows = []
+    for size in ROWS:
+        series = list(rng.normal(size=(size, POINTS)).cumsum(axis=1))
+        for name, method in methods:
+            if name == "figures" and size > 100:
+                continue
+            elapsed, html = utils.timeit(lambda: method(series), repeat=3)
+            rows.append(
+                [
+                    size,
+                    name,
+                    f"{elapsed * 1e6 / size:.0f}",
+                    f"{sum(map(len, html)) / 1024:.0f}",
+                ]
+            )
+
+    utils.print_table(["rows", "method", "us/row", "KiB"], rows)
+
+
+if __name__ == "__main__":
+    main()
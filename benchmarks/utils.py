@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Common utilities for the django-matplotlib benchmarks.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import os
+import pathlib
+import statistics
+import sys
+import time
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+PATH = pathlib.Path(os.path.abspath(os.path.dirname(__file__)))
+
+REPO_PATH = PATH.parent
+
+TEST_PRJ_PATH = REPO_PATH / "test_prj"
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def setup_django():
+    """Configure django with the settings of the test project."""
+    for path in (str(REPO_PATH), str(TEST_PRJ_PATH)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "test_prj.settings")
+
+    import django
+
+    django.setup()
+
+
+def timeit(func, repeat=5):
+    """Execute ``func`` ``repeat`` times and return the median time in
+    seconds and the last returned value.
+
+    """
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def print_table(headers, rows):
+    """Print a simple text table to stdout."""
+    rows = [[str(c) for c in row] for row in rows]
+    widths = [
+        max(len(str(h)), *(len(r[i]) for r in rows))
+        for i, h in enumerate(headers)
+    ]
+    line = "  ".join(f"{{:>{w}}}" for w in widths)
+    print(line.format(*headers))
+    print(line.format(*("-" * w for w in widths)))
+    for row in rows:
+        print(line.format(*row))
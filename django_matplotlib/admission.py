@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Admission control of the renders of the plot views.
+
+Every request of a plot view has a cost estimated before the plots are
+drawn: the size of the data, times the number of plots, times the weight
+of the format (an interactive mpld3 plot is more expensive than a png).
+The costs of the requests rendered at the same time in a process are
+accounted in a ``Budget``:
+
+- While the budget has room the requests are rendered as usual.
+- Over ``DEGRADE_AT`` (a fraction of the budget) the plots are degraded:
+  the mpld3 plots are rendered as png and the figures with
+  ``DEGRADED_DPI``.
+- When the budget is exhausted the request waits up to ``QUEUE_TIMEOUT``
+  seconds for room. Then it is shed: the last page rendered for the same
+  url and ``Vary`` headers (stored for ``STALE_TIMEOUT`` seconds) is
+  served, or a 503 response with a ``Retry-After`` header. The pages that
+  read the session or the CSRF token are never stored.
+
+A request with a cost greater than the whole budget is only admitted when
+nothing else is rendered. Enable it with the ``settings.DJMPL_ADMISSION``
+dictionary (``True`` uses the ``DEFAULT_OPTIONS``).
+
+"""
+
+__all__ = [
+    "Overloaded",
+    "Ticket",
+    "Budget",
+    "get_budget",
+    "estimate_cost",
+    "data_size",
+]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import threading
+import time
+
+import attr
+
+from . import settings
+from .aggregate import _is_queryset
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Default options of the admission control, updated with
+#: ``settings.DJMPL_ADMISSION``.
+DEFAULT_OPTIONS = {
+    # cost rendered at the same time by a process
+    "BUDGET": 2_000_000,
+    # seconds that a request waits for room in the budget
+    "QUEUE_TIMEOUT": 5.0,
+    # fraction of the budget over which the plots are degraded
+    "DEGRADE_AT": 0.75,
+    # cost of every point by format
+    "FORMAT_WEIGHTS": {"png": 1.0, "svg": 2.0, "mpld3": 4.0},
+    # resolution of the degraded figures
+    "DEGRADED_DPI": 50,
+    # seconds that a page is stored to be served when the request is shed
+    # (0 disables it)
+    "STALE_TIMEOUT": 600,
+    # value of the Retry-After header of the shed requests
+    "RETRY_AFTER": 5,
+}
+
+_BUDGETS = {}
+
+_BUDGETS_LOCK = threading.Lock()
+
+
+# =============================================================================
+# EXCEPTIONS
+# =============================================================================
+
+
+class Overloaded(Exception):
+    """The render budget is exhausted."""
+
+
+# =============================================================================
+# BUDGET
+# =============================================================================
+
+
+@attr.s(eq=False)
+class Ticket:
+    """The cost of a request admitted in a ``Budget``.
+
+    ``degraded`` is True if the budget was under pressure when the request
+    was admitted. Release the ticket when the response is rendered (the
+    release is idempotent).
+
+    """
+
+    budget = attr.ib(repr=False)
+    cost: float = attr.ib()
+    degraded: bool = attr.ib(default=False)
+    released: bool = attr.ib(default=False, init=False)
+
+    def release(self):
+        self.budget.release(self)
+
+
+class Budget:
+    """Thread-safe accounting of the cost of the renders in progress.
+
+    Parameters
+    ----------
+    capacity: float
+        The maximum cost rendered at the same time.
+
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.in_use = 0.0
+        self.active = 0
+        self._condition = threading.Condition()
+
+    def __repr__(self):
+        return (
+            f"<Budget {self.in_use:g}/{self.capacity:g} "
+            f"active={self.active}>"
+        )
+
+    @property
+    def pressure(self) -> float:
+        """Fraction of the budget in use."""
+        return self.in_use / self.capacity if self.capacity else 1.0
+
+    def _fits(self, cost) -> bool:
+        return self.active == 0 or self.in_use + cost <= self.capacity
+
+    def acquire(self, cost, timeout=0.0, degrade_at=1.0) -> Ticket:
+        """Reserve ``cost`` in the budget, waiting up to ``timeout`` seconds
+        for room.
+
+        The ticket is ``degraded`` if, with this request, more than
+        ``degrade_at`` of the budget is in use. Raises ``Overloaded`` if
+        there is no room after the timeout.
+
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while not self._fits(cost):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise Overloaded(
+                        f"No room for a render of cost {cost:g} in {self!r}"
+                    )
+                self._condition.wait(remaining)
+            self.in_use += cost
+            self.active += 1
+            degraded = self.in_use > self.capacity * degrade_at
+            return Ticket(budget=self, cost=cost, degraded=degraded)
+
+    def release(self, ticket):
+        """Return the cost of ``ticket`` to the budget."""
+        with self._condition:
+            if ticket.released:
+                return
+            ticket.released = True
+            self.in_use -= ticket.cost
+            self.active -= 1
+            self._condition.notify_all()
+
+
+def get_budget(capacity) -> Budget:
+    """Return the budget of the process with ``capacity``."""
+    with _BUDGETS_LOCK:
+        if capacity not in _BUDGETS:
+            _BUDGETS[capacity] = Budget(capacity)
+        return _BUDGETS[capacity]
+
+
+def in_use() -> float:
+    """The cost in use in all the budgets of the process."""
+    return sum(budget.in_use for budget in list(_BUDGETS.values()))
+
+
+# =============================================================================
+# COSTS
+# =============================================================================
+
+
+def options_from_settings():
+    """Return the options of the admission control, or ``None`` if it is
+    disabled.
+
+    The values of ``DEFAULT_OPTIONS`` are updated with the
+    ``settings.DJMPL_ADMISSION`` dictionary.
+
+    """
+    if not settings.DJMPL_ADMISSION:
+        return None
+    options = dict(DEFAULT_OPTIONS)
+    if isinstance(settings.DJMPL_ADMISSION, dict):
+        options.update(settings.DJMPL_ADMISSION)
+    return options
+
+
+def data_size(data) -> int:
+    """Estimate the number of points of ``data``.
+
+    The querysets are counted, the mappings of columns (dicts) use the
+    length of the longest column and the other objects their length (1 if
+    they have no length).
+
+    """
+    if data is None:
+        return 0
+    if _is_queryset(data):
+        return data.count()
+    if isinstance(data, dict):
+        return max(
+            (len(v) for v in data.values() if hasattr(v, "__len__")), default=1
+        )
+    try:
+        return len(data)
+    except TypeError:
+        return 1
+
+
+def estimate_cost(size, plots, plot_format, weights=None) -> float:
+    """The cost of ``plots`` plots in ``plot_format`` of ``size`` points."""
+    weights = DEFAULT_OPTIONS["FORMAT_WEIGHTS"] if weights is None else weights
+    return max(size, 1) * max(plots, 1) * weights.get(plot_format, 1.0)
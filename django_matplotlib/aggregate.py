@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""2D aggregation of large amounts of points into a pixel grid.
+
+Drawing millions of points with matplotlib is slow and produces huge
+outputs. The functions in this module bin the points into a grid with the
+resolution of the axes (one cell per pixel), reduce every cell with a
+vectorized NumPy operation and draw the result as a single image.
+
+The data is consumed in chunks, so the memory used is bounded by the size
+of the grid and not by the number of points.
+
+Example
+-------
+
+.. code-block:: python
+
+    class StarsView(djmpl.PlotView):
+        model = Star
+
+        def plot(self, data, fig, ax):
+            aggregate.scatter_density(
+                ax, data, x="ra", y="dec", value="mag", how="mean"
+            )
+
+"""
+
+__all__ = ["GridAggregator", "iter_chunks", "scatter_density"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import itertools as it
+
+import attr
+
+from django.db.models import Max, Min
+
+import numpy as np
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Available reductions for the cells of the grid.
+REDUCTIONS = ("count", "sum", "mean", "max", "min")
+
+#: Default number of rows readed at once from the data source.
+DEFAULT_CHUNK_SIZE = 100_000
+
+#: Limits of the grid when the data is empty.
+EMPTY_LIMITS = (0.0, 1.0)
+
+
+# =============================================================================
+# AGGREGATOR
+# =============================================================================
+
+
+@attr.s
+class GridAggregator:
+    """Incremental reduction of points into a regular 2D grid.
+
+    Parameters
+    ----------
+    xlim: tuple
+        The (min, max) limits of the grid in the x axis.
+    ylim: tuple
+        The (min, max) limits of the grid in the y axis.
+    shape: tuple
+        Number of (rows, columns) of the grid.
+    how: str (Default: count)
+        The reduction to apply to every cell. One of ``REDUCTIONS``.
+
+    """
+
+    xlim: tuple = attr.ib(converter=tuple)
+    ylim: tuple = attr.ib(converter=tuple)
+    shape: tuple = attr.ib(converter=tuple)
+    how: str = attr.ib(
+        default="count", validator=attr.validators.in_(REDUCTIONS)
+    )
+
+    _count = attr.ib(init=False, repr=False)
+    _acc = attr.ib(init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        size = self.shape[0] * self.shape[1]
+        self._count = np.zeros(size, dtype=np.int64)
+        if self.how in ("sum", "mean"):
+            self._acc = np.zeros(size, dtype=float)
+        elif self.how == "max":
+            self._acc = np.full(size, -np.inf)
+        elif self.how == "min":
+            self._acc = np.full(size, np.inf)
+        else:
+            self._acc = None
+
+    @property
+    def needs_values(self) -> bool:
+        """True if the reduction needs a value for every point."""
+        return self.how != "count"
+
+    @property
+    def extent(self) -> tuple:
+        """The (left, right, bottom, top) extent of the grid."""
+        return self.xlim + self.ylim
+
+    def _cells(self, x, y):
+        nrows, ncols = self.shape
+        (x0, x1), (y0, y1) = self.xlim, self.ylim
+
+        ix = np.floor((x - x0) * (ncols / ((x1 - x0) or 1.0)))
+        iy = np.floor((y - y0) * (nrows / ((y1 - y0) or 1.0)))
+
+        # the points in the upper edge belongs to the last cell
+        ix[x == x1] = ncols - 1
+        iy[y == y1] = nrows - 1
+
+        mask = (ix >= 0) & (ix < ncols) & (iy >= 0) & (iy < nrows)
+        cells = iy[mask].astype(np.intp) * ncols + ix[mask].astype(np.intp)
+        return cells, mask
+
+    def update(self, x, y, values=None):
+        """Add a chunk of points to the grid.
+
+        Points outside the limits of the grid or with NaN coordinates
+        are ignored.
+
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if self.needs_values and values is None:
+            raise ValueError(f"Reduction '{self.how}' requires values")
+
+        cells, mask = self._cells(x, y)
+        size = self._count.size
+
+        self._count += np.bincount(cells, minlength=size)
+        if self.how == "count":
+            return
+
+        values = np.asarray(values, dtype=float)[mask]
+        if self.how in ("sum", "mean"):
+            self._acc += np.bincount(cells, weights=values, minlength=size)
+        elif self.how == "max":
+            np.maximum.at(self._acc, cells, values)
+        else:
+            np.minimum.at(self._acc, cells, values)
+
+    def result(self) -> np.ma.MaskedArray:
+        """Return the reduced grid as a masked array of ``shape``.
+
+        The cells without points are masked.
+
+        """
+        empty = self._count == 0
+        if self.how == "count":
+            grid = self._count.astype(float)
+        elif self.how == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                grid = self._acc / self._count
+        else:
+            grid = self._acc.copy()
+        return np.ma.masked_array(grid, mask=empty).reshape(self.shape)
+
+
+# =============================================================================
+# DATA INPUT
+# =============================================================================
+
+
+def _is_queryset(data):
+    return hasattr(data, "values_list") and hasattr(data, "aggregate")
+
+
+def iter_chunks(data, columns, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Iterate over ``data`` yielding tuples of 1D arrays, one array by
+    column, with at most ``chunk_size`` elements.
+
+    Parameters
+    ----------
+    data:
+        A django queryset, a ``datasources.DataSource``, a mapping (dict,
+        structured array, DataFrame) or ``None``.
+    columns: sequence
+        Every column can be a field name of ``data`` or an array.
+        If data is a queryset all the columns must be field names.
+    chunk_size: int
+        Maximum number of rows on every chunk.
+
+    """
+    if hasattr(data, "chunks") and hasattr(data, "values_list"):
+        for chunk in data.values_list(*columns).chunks(chunk_size):
+            yield tuple(chunk[col] for col in columns)
+        return
+
+    if _is_queryset(data):
+        rows = data.values_list(*columns).iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(it.islice(rows, chunk_size))
+            if not chunk:
+                break
+            chunk = np.array(chunk, dtype=float).reshape(len(chunk), -1)
+            yield tuple(chunk.T)
+        return
+
+    arrays = [
+        np.asarray(data[col] if isinstance(col, str) else col)
+        for col in columns
+    ]
+    size = len(arrays[0]) if arrays else 0
+    for start in range(0, size, chunk_size):
+        yield tuple(arr[start : start + chunk_size] for arr in arrays)
+
+
+def _valid_limits(low, high):
+    # empty data (or only NaNs) has no limits, the grid uses (0, 1)
+    if low is None or high is None:
+        return EMPTY_LIMITS
+    if isinstance(low, float) and not (np.isfinite(low) and np.isfinite(high)):
+        return EMPTY_LIMITS
+    return low, high
+
+
+def _limits(data, x, y, chunk_size):
+    if _is_queryset(data):
+        lim = data.aggregate(
+            xmin=Min(x), xmax=Max(x), ymin=Min(y), ymax=Max(y)
+        )
+        return (
+            _valid_limits(lim["xmin"], lim["xmax"]),
+            _valid_limits(lim["ymin"], lim["ymax"]),
+        )
+
+    xmin = ymin = np.inf
+    xmax = ymax = -np.inf
+    for cx, cy in iter_chunks(data, (x, y), chunk_size):
+        if len(cx):
+            xmin, xmax = min(xmin, np.nanmin(cx)), max(xmax, np.nanmax(cx))
+            ymin, ymax = min(ymin, np.nanmin(cy)), max(ymax, np.nanmax(cy))
+    return (
+        _valid_limits(float(xmin), float(xmax)),
+        _valid_limits(float(ymin), float(ymax)),
+    )
+
+
+def _axes_shape(ax):
+    bbox = ax.get_window_extent()
+    return max(1, int(round(bbox.height))), max(1, int(round(bbox.width)))
+
+
+# =============================================================================
+# API
+# =============================================================================
+
+
+def scatter_density(
+    ax,
+    data=None,
+    x="x",
+    y="y",
+    value=None,
+    how="count",
+    xlim=None,
+    ylim=None,
+    shape=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    **kwargs,
+):
+    """Draw a density scatter of ``data`` as a single image in ``ax``.
+
+    The points are binned in a grid with the pixel resolution of the
+    axes and the cells are reduced with ``how``. The time is linear
+    with the number of points and the memory is bounded by the size of
+    the grid.
+
+    Parameters
+    ----------
+    ax: matplotlib.Axes
+        Where to draw the image.
+    data:
+        A django queryset, a ``datasources.DataSource``, a mapping with
+        the columns or ``None`` if
+        ``x``, ``y`` and ``value`` are arrays.
+    x, y: str or array
+        The coordinates of the points.
+    value: str or array (optional)
+        The values of every point, required by all the reductions except
+        ``count``.
+    how: str (Default: count)
+        The reduction of every cell. One of ``REDUCTIONS``.
+    xlim, ylim: tuple (optional)
+        Limits of the grid. By default are the limits of the data
+        (``EMPTY_LIMITS`` if the data is empty).
+    shape: tuple (optional)
+        Number of (rows, columns) of the grid. By default one cell per
+        pixel of ``ax``.
+    chunk_size: int
+        Maximum number of points readed at once.
+    kwargs:
+        Extra parameters for ``matplotlib.Axes.imshow`` (``cmap``,
+        ``norm``, ``vmin``, ``vmax``...).
+
+    Returns
+    -------
+    matplotlib.image.AxesImage
+
+    """
+    if xlim is None or ylim is None:
+        dxlim, dylim = _limits(data, x, y, chunk_size)
+        xlim = dxlim if xlim is None else xlim
+        ylim = dylim if ylim is None else ylim
+
+    agg = GridAggregator(
+        xlim=xlim, ylim=ylim, shape=shape or _axes_shape(ax), how=how
+    )
+
+    columns = (x, y, value) if agg.needs_values else (x, y)
+    for chunk in iter_chunks(data, columns, chunk_size):
+        agg.update(*chunk)
+
+    kwargs.setdefault("origin", "lower")
+    kwargs.setdefault("aspect", "auto")
+    kwargs.setdefault("interpolation", "nearest")
+    return ax.imshow(agg.result(), extent=agg.extent, **kwargs)
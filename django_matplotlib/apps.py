@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Django application configuration of django-matplotlib.
+
+"""
+
+__all__ = ["DjangoMatplotlibConfig"]
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+from django.apps import AppConfig
+
+
+# =============================================================================
+# CONFIG
+# =============================================================================
+
+
+class DjangoMatplotlibConfig(AppConfig):
+
+    name = "django_matplotlib"
+    verbose_name = "django-matplotlib"
+
+    #: Report of the last warm-up (``None`` if the warm-up is disabled).
+    warmup_report = None
+
+    def ready(self):
+        """Execute the warm-up configured in ``settings.DJMPL_WARMUP``."""
+        from . import warmup
+
+        self.warmup_report = warmup.warmup_from_settings()
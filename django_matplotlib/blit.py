@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Incremental render of the "png" plots with cached backgrounds.
+
+In a time series that only grows, the axes, ticks, labels, gridlines and
+the reference lines are the same on every render. The incremental render
+draws the figure without the *animated* artists (the ones created with
+``animated=True``, like in the matplotlib blitting animations), stores the
+resulting image as the background and, in the later renders of a figure
+with the same key, layout and limits, copies the background and draws
+only the animated artists on top of it. When the limits of any axes
+change the figure is fully drawn again and the new background is stored.
+
+The non-animated artists must be the same for the same key: a title with
+the time of the last update, for example, must be part of the key or an
+animated artist. The animated artists are always drawn over the
+background (including the spines of the axes) sorted by ``zorder``.
+
+The backgrounds are kept in memory in every process, in a LRU of
+``settings.DJMPL_BLIT_CACHE_SIZE`` images.
+
+"""
+
+__all__ = [
+    "render_png",
+    "execute_layout",
+    "background_key",
+    "clear_cache",
+    "cache_info",
+]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import collections
+import io
+import threading
+
+from . import layout, metrics, settings
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+_cache = collections.OrderedDict()
+
+_cache_lock = threading.Lock()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        background = _cache.get(key)
+        if background is not None:
+            _cache.move_to_end(key)
+        return background
+
+
+def _cache_set(key, background):
+    with _cache_lock:
+        _cache[key] = background
+        _cache.move_to_end(key)
+        while len(_cache) > settings.DJMPL_BLIT_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear_cache():
+    """Remove all the stored backgrounds."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def cache_info() -> dict:
+    """Return the size and the maximum size of the background cache."""
+    return {"size": len(_cache), "maxsize": settings.DJMPL_BLIT_CACHE_SIZE}
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def animated_artists(fig) -> list:
+    """Return the animated artists of all the axes of the figure, sorted
+    by ``zorder``.
+
+    """
+    artists = [
+        artist
+        for ax in fig.axes
+        for artist in ax.get_children()
+        if artist.get_animated()
+    ]
+    return sorted(artists, key=lambda artist: artist.get_zorder())
+
+
+def execute_layout(fig):
+    """Apply the layout engine of the figure (constrained or tight), that
+    otherwise is only executed when the figure is drawn.
+
+    """
+    get_layout_engine = getattr(fig, "get_layout_engine", None)
+    if get_layout_engine is None:  # matplotlib < 3.6
+        if fig.get_constrained_layout():
+            fig.execute_constrained_layout()
+        elif fig.get_tight_layout():
+            fig.tight_layout()
+        return
+    engine = get_layout_engine()
+    if engine is not None:
+        engine.execute(fig)
+
+
+def background_key(fig, key=None) -> tuple:
+    """Return the key of the background of a figure.
+
+    Combines ``key`` with the layout signature of the figure (see
+    ``django_matplotlib.layout.layout_signature``) and the position and
+    limits of every axes. Call ``execute_layout`` first, so the positions
+    are the ones of the drawn figure.
+
+    """
+    axes = tuple(
+        (
+            tuple(round(v, 6) for v in ax.get_position().bounds),
+            tuple(ax.get_xlim()),
+            tuple(ax.get_ylim()),
+        )
+        for ax in fig.axes
+    )
+    return (key, layout.layout_signature(fig), axes)
+
+
+def render_png(fig, key=None, metadata=None) -> bytes:
+    """Render the figure as a png drawing only the animated artists over
+    a cached background.
+
+    Parameters
+    ----------
+    fig:
+        Matplotlib figure class.
+    key: hashable (optional)
+        Identifies the static content of the figure, for example the view
+        and the plot method.
+    metadata: dict (optional)
+        Metadata of the png file, like in ``Figure.savefig``.
+
+    """
+    import numpy as np
+    from matplotlib import image
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    canvas = fig.canvas
+    if not isinstance(canvas, FigureCanvasAgg):
+        canvas = FigureCanvasAgg(fig)
+
+    # the key and the animated artists need the axes in their final
+    # position, also when the background is not drawn
+    execute_layout(fig)
+    bkey = background_key(fig, key)
+    background = _cache_get(bkey)
+    metrics.observe_cache("background", hit=background is not None)
+    if background is None:
+        # the animated artists are not drawn outside of savefig
+        canvas.draw()
+        background = np.array(canvas.buffer_rgba())
+        background.flags.writeable = False
+        _cache_set(bkey, background)
+    else:
+        renderer = canvas.get_renderer()
+        np.asarray(renderer.buffer_rgba())[...] = background
+
+    for artist in animated_artists(fig):
+        artist.axes.draw_artist(artist)
+
+    buf = io.BytesIO()
+    image.imsave(
+        buf,
+        np.asarray(canvas.buffer_rgba()),
+        format="png",
+        dpi=fig.dpi,
+        metadata=metadata,
+    )
+    return buf.getvalue()
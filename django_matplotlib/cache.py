@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Access to the django cache used to store the rendered plots.
+
+The entries of ``get_or_render`` are served with stale-while-revalidate
+semantics: an entry is *fresh* for ``timeout`` seconds and then *stale*
+for ``stale_timeout`` seconds more. A stale entry is still served, while
+exactly one background thread renders it again. On a miss only one
+request renders the value and the concurrent requests for the same key
+wait for it. The single-flight lock is a key created with
+``cache.add()``, so with a shared backend (memcached, redis, database)
+the lock is shared by all the processes.
+
+"""
+
+__all__ = ["get_cache", "make_key", "get_or_render"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import concurrent.futures
+import hashlib
+import logging
+import threading
+import time
+import uuid
+
+from django.core.cache import caches
+
+from . import metrics, settings
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Prefix of all the keys stored by django-matplotlib.
+KEY_PREFIX = "djmpl"
+
+#: Seconds that the single-flight lock of a key lives if its render never
+#: ends.
+LOCK_TIMEOUT = 60
+
+#: Seconds between two reads of the cache while a request waits for the
+#: render of another one.
+POLL_INTERVAL = 0.05
+
+#: Number of threads that render the stale entries again.
+REFRESH_WORKERS = 2
+
+logger = logging.getLogger("django_matplotlib")
+
+_EXECUTOR = []
+
+_EXECUTOR_LOCK = threading.Lock()
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def get_cache():
+    """Return the django cache configured in ``settings.DJMPL_CACHE``."""
+    return caches[settings.DJMPL_CACHE]
+
+
+def make_key(namespace: str, *parts) -> str:
+    """Build a cache key from a namespace and any number of parts.
+
+    The parts are converted with ``repr`` and hashed, so the key is short
+    and safe for every cache backend.
+
+    """
+    digest = hashlib.sha1(  # nosec
+        "\x1f".join(repr(p) for p in parts).encode("utf-8")
+    ).hexdigest()
+    return f"{KEY_PREFIX}:{namespace}:{digest}"
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    with _EXECUTOR_LOCK:
+        if not _EXECUTOR:
+            _EXECUTOR.append(
+                concurrent.futures.ThreadPoolExecutor(
+                    max_workers=REFRESH_WORKERS,
+                    thread_name_prefix="djmpl-refresh",
+                )
+            )
+        return _EXECUTOR[0]
+
+
+def _read_entry(backend, key):
+    entry = backend.get(key)
+    if isinstance(entry, tuple) and len(entry) == 2:
+        return entry
+    return None
+
+
+def _store(backend, key, value, timeout, stale_timeout):
+    # a timeout of None stores the entry forever (always fresh)
+    if timeout is None:
+        backend.set(key, (value, float("inf")), None)
+    else:
+        entry = (value, time.time() + timeout)
+        backend.set(key, entry, timeout + (stale_timeout or 0))
+    return value
+
+
+def _acquire_lock(backend, lock_key):
+    # the token identifies the owner of the lock
+    token = uuid.uuid4().hex
+    return token if backend.add(lock_key, token, LOCK_TIMEOUT) else None
+
+
+def _release_lock(backend, lock_key, token):
+    # the lock may expire and be acquired by other request, so it is only
+    # deleted if it still has the token of the owner
+    if backend.get(lock_key) == token:
+        backend.delete(lock_key)
+
+
+def _refresh(backend, key, lock, render, timeout, stale_timeout):
+    lock_key, token = lock
+    try:
+        _store(backend, key, render(), timeout, stale_timeout)
+    except Exception:
+        logger.exception("djmpl refresh of %r failed", key)
+    finally:
+        _release_lock(backend, lock_key, token)
+
+
+def _refresh_in_thread(*args):
+    from django.db import connections
+
+    try:
+        _refresh(*args)
+    finally:
+        # the connections opened by the render in this thread
+        connections.close_all()
+
+
+def get_or_render(
+    namespace, key, render, timeout, stale_timeout=0, background=True
+):
+    """Return the value of ``key`` from the cache or render it with
+    ``render()`` and store it.
+
+    Parameters
+    ----------
+    namespace: str
+        Namespace of the metrics of the cache.
+    key: str
+        The key of the cache (see ``make_key``).
+    render: callable
+        Render the value. Without arguments.
+    timeout: int or None
+        Seconds that the value is fresh (None for ever).
+    stale_timeout: int
+        Seconds after ``timeout`` that the stale value is served while it
+        is rendered again. 0 disables the stale entries.
+    background: bool
+        If True the stale entries are rendered in a background thread,
+        otherwise the request that acquires the lock renders it (and the
+        others get the stale value).
+
+    """
+    backend = get_cache()
+    lock_key = f"{key}:lock"
+
+    entry = _read_entry(backend, key)
+    metrics.observe_cache(namespace, hit=entry is not None)
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() < fresh_until:
+            return value
+        if stale_timeout:
+            token = _acquire_lock(backend, lock_key)
+            if token is not None:
+                lock = (lock_key, token)
+                args = (backend, key, lock, render, timeout, stale_timeout)
+                if background:
+                    _get_executor().submit(_refresh_in_thread, *args)
+                else:
+                    _refresh(*args)
+                    value = (_read_entry(backend, key) or entry)[0]
+            return value
+
+    # miss: only one request renders, the others wait for the value (and
+    # render it without the lock if the owner takes too long)
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    token = _acquire_lock(backend, lock_key)
+    while token is None and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = _read_entry(backend, key)
+        if entry is not None and time.time() < entry[1]:
+            return entry[0]
+        token = _acquire_lock(backend, lock_key)
+    try:
+        return _store(backend, key, render(), timeout, stale_timeout)
+    finally:
+        if token is not None:
+            _release_lock(backend, lock_key, token)
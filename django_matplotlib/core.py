@@ -13,7 +13,7 @@ django templates.
 
 """
 
-__all__ = ["EngineNotSupported", "subplots"]
+__all__ = ["EngineNotSupported", "subplots", "content_hash"]
 
 
 # =============================================================================
@@ -21,15 +21,33 @@ __all__ = ["EngineNotSupported", "subplots"]
 # =============================================================================
 
 import base64
+import contextlib
+import hashlib
 import io
+import threading
+import time
 
 import attr
 
-import matplotlib.pyplot as plt
+from . import metrics, settings
 
-import mpld3
 
-from . import settings
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Metadata removed from the PNG plots in deterministic mode.
+DETERMINISTIC_PNG_METADATA = {"Software": None}
+
+#: Metadata removed from the SVG plots in deterministic mode.
+DETERMINISTIC_SVG_METADATA = {"Date": None, "Creator": None}
+
+#: Salt of the ids of the SVG plots in deterministic mode.
+DETERMINISTIC_SVG_HASHSALT = "django-matplotlib"
+
+# the rcParams are global, so the figures written with a rc_context are
+# serialized when the plots are rendered in many threads
+_RC_LOCK = threading.RLock()
 
 
 # =============================================================================
@@ -62,6 +80,28 @@ class DjangoMatplotlibWrapper:
         The format of the plot.
     template_engine:
         The template engine used to render the the html.
+    rasterize_threshold: int or None
+        Lines and collections with more points than this value are
+        rasterized when the plot is written in a vector format. Axes, labels
+        and texts stay as vectors. ``None`` disables this behavior.
+    mpld3_encoding: str (Default: json)
+        How the data is embedded in the mpld3 plots. One of
+        ``settings.AVAILABLE_MPLD3_ENCODINGS``.
+    deterministic: bool (Default: settings.DJMPL_DETERMINISTIC)
+        If True the same figure is always written with the same bytes:
+        the timestamps and software metadata are removed and the ids of
+        the SVG and mpld3 elements are stable. The default is readed from
+        the settings when the wrapper is created.
+    labels: dict
+        The ``view`` and ``method`` labels of the metrics of the plot
+        (see ``django_matplotlib.metrics``).
+    blit: bool (Default: False)
+        If True the "png" plots are rendered incrementally: only the
+        animated artists are drawn over a cached background (see
+        ``django_matplotlib.blit``).
+    blit_key: hashable
+        Identifies the static content of the figure in the cache of
+        backgrounds.
 
     """
 
@@ -74,14 +114,76 @@ class DjangoMatplotlibWrapper:
         converter=lambda x: template_by_alias(x),
         validator=attr.validators.in_(settings.TEMPLATES_FORMATERS),
     )
+    rasterize_threshold: int = attr.ib(
+        default=settings.DJMPL_RASTERIZE_THRESHOLD,
+        validator=attr.validators.optional(attr.validators.instance_of(int)),
+    )
+    mpld3_encoding: str = attr.ib(
+        default=settings.DJMPL_MPLD3_ENCODING,
+        validator=attr.validators.in_(settings.AVAILABLE_MPLD3_ENCODINGS),
+    )
+    deterministic: bool = attr.ib(
+        default=attr.Factory(lambda: settings.DJMPL_DETERMINISTIC),
+        converter=bool,
+    )
+    labels: dict = attr.ib(factory=dict)
+    blit: bool = attr.ib(default=False, converter=bool)
+    blit_key = attr.ib(default=None)
+
+    # FILES
+    def to_bytes(self, plot_format=None, **kwargs) -> bytes:
+        """Write the figure as a "png" or "svg" file and return its content.
+
+        By default uses the ``plot_format`` of the wrapper. The
+        ``rasterize_threshold``, ``deterministic`` and ``blit`` options are
+        applied and the extra ``kwargs`` are passed to ``Figure.savefig``
+        (the incremental render is only used without ``kwargs``).
+
+        """
+        import matplotlib
+
+        plot_format = plot_format or self.plot_format
+        if plot_format not in ("png", "svg"):
+            raise ValueError(f"Can't write a {plot_format!r} file")
+
+        if self.blit and plot_format == "png" and not kwargs:
+            from . import blit
+
+            return blit.render_png(
+                self.fig,
+                key=self.blit_key,
+                metadata=(
+                    DETERMINISTIC_PNG_METADATA if self.deterministic else None
+                ),
+            )
+
+        rc = {}
+        if self.deterministic and plot_format == "png":
+            kwargs.setdefault("metadata", DETERMINISTIC_PNG_METADATA)
+        elif self.deterministic:
+            kwargs.setdefault("metadata", DETERMINISTIC_SVG_METADATA)
+            rc["svg.hashsalt"] = DETERMINISTIC_SVG_HASHSALT
 
-    # PNG
-    def get_img_png(self) -> str:
         buf = io.BytesIO()
-        self.fig.savefig(buf, format="png")
-        png = buf.getvalue()
+        with contextlib.ExitStack() as stack:
+            # rc_context saves and restores all the global rcParams, so it
+            # is only entered (under the lock) when there is something to
+            # change, otherwise a render in other thread could undo it
+            if rc:
+                stack.enter_context(_RC_LOCK)
+                stack.enter_context(matplotlib.rc_context(rc))
+            if plot_format == "svg":
+                stack.enter_context(
+                    rasterize_dense_artists(self.fig, self.rasterize_threshold)
+                )
+            self.fig.savefig(buf, format=plot_format, **kwargs)
+        content = buf.getvalue()
         buf.close()
-        png = base64.b64encode(png).decode("ascii")
+        return content
+
+    # PNG
+    def get_img_png(self) -> str:
+        png = base64.b64encode(self.to_bytes("png")).decode("ascii")
         return (
             "<div class='djmpl djmpl-png'>"
             f"<img src='data:image/png;base64,{png}'"
@@ -90,15 +192,23 @@ class DjangoMatplotlibWrapper:
 
     # SVG
     def get_img_svg(self) -> str:
-        buf = io.StringIO()
-        self.fig.savefig(buf, format="svg")
-        svg = buf.getvalue()
-        buf.close()
+        svg = self.to_bytes("svg").decode("utf-8")
         return f"<div class='djmpl djmpl-svg'>{svg}</div>"
 
     # MPLD3
     def get_img_mpld3(self) -> str:
-        html = mpld3.fig_to_html(self.fig)
+        if self.mpld3_encoding == "json" and not self.deterministic:
+            import mpld3
+
+            html = mpld3.fig_to_html(self.fig)
+        else:
+            from . import mpld3_encoding
+
+            html = mpld3_encoding.fig_to_html(
+                self.fig,
+                encoding=self.mpld3_encoding,
+                stable_ids=self.deterministic,
+            )
         return f"<div class='djmpl djmpl-mpld3'>{html}</div>"
 
     def safe(self, img) -> object:
@@ -110,13 +220,29 @@ class DjangoMatplotlibWrapper:
         method = getattr(self, key, None)
         if method is None:
             raise NotImplementedError(f"Format unknown {self.plot_format}")
+        start = time.perf_counter()
         img = method()
+        metrics.observe_encode(
+            self.labels,
+            self.plot_format,
+            time.perf_counter() - start,
+            len(img),
+        )
         return img
 
     def to_html(self) -> str:
         img = self.html_str()
         return self.safe(img)
 
+    def content_hash(self) -> str:
+        """Return the sha256 hex digest of the html of the plot.
+
+        Only in deterministic mode the same figure has always the same
+        hash, so it can be used as key of caches or as ETag.
+
+        """
+        return content_hash(self.html_str())
+
     def figaxes(self) -> tuple:
         return self.fig, self.axes
 
@@ -140,9 +266,70 @@ def template_by_alias(name_or_alias: str) -> str:
         raise EngineNotSupported from err
 
 
+def content_hash(html: str) -> str:
+    """Return the sha256 hex digest of an encoded plot."""
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def artist_size(artist) -> int:
+    """Return the number of points drawn by a line or a collection.
+
+    Collections with offsets (like the ones created by ``scatter``) count
+    one point per offset, otherwise the vertices of all their paths are
+    counted. Any other artist has size 0.
+
+    """
+    from matplotlib.collections import Collection
+    from matplotlib.lines import Line2D
+
+    if isinstance(artist, Line2D):
+        return len(artist.get_xydata())
+    if isinstance(artist, Collection):
+        offsets = artist.get_offsets()
+        if len(offsets) > 1:
+            return len(offsets)
+        return sum(len(path.vertices) for path in artist.get_paths())
+    return 0
+
+
+@contextlib.contextmanager
+def rasterize_dense_artists(fig, threshold: int):
+    """Context manager that rasterize the dense artists of a figure.
+
+    Inside the context every line and collection of the figure with more
+    than ``threshold`` points is marked as ``rasterized``; axes, labels
+    and texts are untouched. The original state of the artists is restored
+    at exit. If ``threshold`` is ``None`` nothing is changed.
+
+    """
+    if threshold is None:
+        yield []
+        return
+
+    dense = [
+        artist
+        for ax in fig.axes
+        for artist in (*ax.lines, *ax.collections)
+        if not artist.get_rasterized() and artist_size(artist) > threshold
+    ]
+    for artist in dense:
+        artist.set_rasterized(True)
+    try:
+        yield dense
+    finally:
+        for artist in dense:
+            artist.set_rasterized(False)
+
+
 def subplots(
     plot_format: str = settings.DJMPL_FORMAT,
     template_engine: str = settings.DJMPL_TEMPLATE_ENGINE,
+    rasterize_threshold: int = settings.DJMPL_RASTERIZE_THRESHOLD,
+    mpld3_encoding: str = settings.DJMPL_MPLD3_ENCODING,
+    deterministic: bool = None,
+    labels: dict = None,
+    blit: bool = False,
+    blit_key=None,
     **kwargs,
 ) -> DjangoMatplotlibWrapper:
     """This functions tries to mimic the behavior of
@@ -150,15 +337,30 @@ def subplots(
     figure and axes.
 
     Also this functions receive in which format you want to write your plot
-    in the HTML page.
+    in the HTML page. If ``deterministic`` is None the value of
+    ``settings.DJMPL_DETERMINISTIC`` is used. ``labels`` are the labels
+    of the metrics of the plot. ``blit`` and ``blit_key`` enable the
+    incremental render of the "png" plots.
 
     """
+    import matplotlib.pyplot as plt
+
     fig = plt.figure()
 
     fig, axes = plt.subplots(**kwargs)
     return DjangoMatplotlibWrapper(
         plot_format=plot_format,
         template_engine=template_engine,
+        rasterize_threshold=rasterize_threshold,
+        mpld3_encoding=mpld3_encoding,
+        deterministic=(
+            settings.DJMPL_DETERMINISTIC
+            if deterministic is None
+            else deterministic
+        ),
+        labels=labels or {},
+        blit=blit,
+        blit_key=blit_key,
         fig=fig,
         axes=axes,
     )
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Warm-up of the caches of the plot views with an in-process crawler.
+
+After a deploy or a data load the first visitors of every page pay the
+cold renders. The crawler finds every url of the project served by a
+plot view (see ``django_matplotlib.export.discover_plot_urls``) and
+requests them with the django test client, so the entries of the shared
+django cache (``settings.DJMPL_CACHE``) filled by rendering the pages,
+such as the fragments and the stale pages, are ready before the real
+traffic arrives. The tiles are not requested, and the layout and
+background caches are local to the process, so the crawler does not warm
+them in the processes that serve the requests.
+
+The urls with parameters are requested once for every parameter set of
+``settings.DJMPL_CRAWL``::
+
+    DJMPL_CRAWL = {
+        "sales:by_year": [{"year": 2019}, {"year": 2020, "region": "ar"}],
+        "shop.views.StockView": [{"period": "week"}],
+    }
+
+The keys that are not parameters of the url are sent in the query string.
+The requests are executed by a bounded pool of threads and can be limited
+to a number of requests per second.
+
+See the ``djmpl_crawl`` management command.
+
+"""
+
+__all__ = ["build_requests", "RateLimiter", "crawl", "summarize"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import concurrent.futures
+import statistics
+import threading
+import time
+import urllib.parse
+
+import attr
+
+from . import export, settings
+
+
+# =============================================================================
+# REQUESTS
+# =============================================================================
+
+
+def build_requests(plot_urls, param_sets=None) -> tuple:
+    """Build the requests of the crawler.
+
+    Parameters
+    ----------
+    plot_urls: sequence
+        The ``export.PlotURL`` to request.
+    param_sets: dict (optional)
+        Parameter sets by url name or view class (by default
+        ``settings.DJMPL_CRAWL``).
+
+    Returns
+    -------
+    A tuple with the list of ``(view_name, url)`` to request and the list
+    of the ``PlotURL`` skipped because they need parameters and have no
+    parameter sets.
+
+    """
+    if param_sets is None:
+        param_sets = settings.DJMPL_CRAWL
+
+    requests, skipped = [], []
+    for plot_url in plot_urls:
+        sets = param_sets.get(plot_url.name) or param_sets.get(
+            plot_url.view_name
+        )
+        if not sets and plot_url.params:
+            skipped.append(plot_url)
+            continue
+        for params in sets or [{}]:
+            path_params = {
+                k: v for k, v in params.items() if k in plot_url.params
+            }
+            query = {
+                k: v for k, v in params.items() if k not in plot_url.params
+            }
+            url = plot_url.url(**path_params)
+            if query:
+                url += "?" + urllib.parse.urlencode(query, doseq=True)
+            requests.append((plot_url.view_name, url))
+    return requests, skipped
+
+
+# =============================================================================
+# CRAWLER
+# =============================================================================
+
+
+@attr.s
+class RateLimiter:
+    """Limit the calls to ``wait()`` to ``rate`` by second, shared by all
+    the threads. A ``rate`` of ``None`` (or 0) does not limit.
+
+    """
+
+    rate: float = attr.ib(default=None)
+    clock = attr.ib(default=time.monotonic, repr=False)
+    sleep = attr.ib(default=time.sleep, repr=False)
+    _next: float = attr.ib(default=0.0, init=False, repr=False)
+    _lock = attr.ib(factory=threading.Lock, init=False, repr=False)
+
+    def wait(self):
+        if not self.rate:
+            return
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next)
+            self._next = start + 1.0 / self.rate
+        if start > now:
+            self.sleep(start - now)
+
+
+def crawl(requests, concurrency=4, rate=None, host=None, callback=None):
+    """Execute the requests with the django test client.
+
+    Parameters
+    ----------
+    requests: sequence
+        ``(view_name, url)`` tuples, like the ones of ``build_requests``.
+    concurrency: int
+        Maximum number of concurrent requests.
+    rate: float (optional)
+        Maximum number of requests by second.
+    host: str (optional)
+        Value of the ``Host`` header. By default the first host of
+        ``settings.ALLOWED_HOSTS``.
+    callback: callable (optional)
+        Called with the result of every request when is ready.
+
+    Returns
+    -------
+    A list with a dict for every request with the ``view``, ``url``,
+    ``status`` (the HTTP status code or ``None``), ``seconds`` and
+    ``error``.
+
+    """
+    from django.test import Client
+
+    host = host or export.default_host()
+    limiter = RateLimiter(rate)
+    local = threading.local()
+
+    def fetch(view_name, url):
+        if not hasattr(local, "client"):
+            # the exceptions of the views are shared by all the clients
+            # (the signal is global), so they are only reported as 500
+            local.client = Client(
+                raise_request_exception=False, HTTP_HOST=host
+            )
+        limiter.wait()
+        result = {
+            "view": view_name,
+            "url": url,
+            "status": None,
+            "seconds": 0.0,
+            "error": None,
+        }
+        start = time.perf_counter()
+        try:
+            response = local.client.get(url)
+        except Exception as err:
+            result["error"] = f"{type(err).__name__}: {err}"
+        else:
+            result["status"] = response.status_code
+            if response.status_code >= 400:
+                result["error"] = f"HTTP {response.status_code}"
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, concurrency)
+    ) as executor:
+        futures = [executor.submit(fetch, *request) for request in requests]
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if callback:
+                callback(result)
+    return results
+
+
+def summarize(results) -> list:
+    """Return the timing report of the crawl: a dict for every view with
+    the number of ``requests`` and ``errors`` and the ``min``, ``median``,
+    ``max`` and ``total`` seconds, sorted by the total time.
+
+    """
+    by_view = {}
+    for result in results:
+        by_view.setdefault(result["view"], []).append(result)
+
+    report = []
+    for view, view_results in by_view.items():
+        seconds = [r["seconds"] for r in view_results]
+        report.append(
+            {
+                "view": view,
+                "requests": len(view_results),
+                "errors": sum(1 for r in view_results if r["error"]),
+                "min": min(seconds),
+                "median": statistics.median(seconds),
+                "max": max(seconds),
+                "total": sum(seconds),
+            }
+        )
+    return sorted(report, key=lambda row: row["total"], reverse=True)
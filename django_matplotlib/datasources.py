@@ -0,0 +1,406 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Lazy data sources for the ``plot_data`` of the views.
+
+The data sources open a file (NumPy ``.npy``, Parquet or HDF5) only when
+the data is accessed, and read only the columns and the range of rows
+requested. The ``.npy`` files are memory mapped, so the pages are shared
+by all the workers through the page cache of the OS.
+
+The API mimics the querysets used by the views:
+
+.. code-block:: python
+
+    class SensorView(djmpl.PlotView):
+        plot_data = datasources.NpyDataSource("/data/sensor.npy")
+
+        def plot(self, data, fig, ax):
+            last = data.values_list("time", "temp")[-10_000:]
+            ax.plot(last["time"], last["temp"])
+
+"""
+
+__all__ = [
+    "DataSource",
+    "NpyDataSource",
+    "ParquetDataSource",
+    "HDF5DataSource",
+]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import threading
+
+import attr
+
+import numpy as np
+
+
+# =============================================================================
+# BASE
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class DataSource:
+    """Base class of the lazy data sources.
+
+    A data source is an immutable view of a file restricted to some
+    columns (``fields``) and a range of rows (``start``, ``stop``).
+    ``values_list`` and the slices return new views that share the opened
+    file.
+
+    The subclasses must implement ``open``, ``get_columns``,
+    ``get_length`` and ``read_columns``.
+
+    """
+
+    fields: tuple = attr.ib(
+        default=None,
+        kw_only=True,
+        converter=attr.converters.optional(tuple),
+    )
+    start: int = attr.ib(default=0, kw_only=True)
+    stop: int = attr.ib(default=None, kw_only=True)
+    flat: bool = attr.ib(default=False, kw_only=True)
+    _state: dict = attr.ib(
+        factory=lambda: {"lock": threading.Lock()},
+        kw_only=True,
+        repr=False,
+        eq=False,
+    )
+
+    # BACKEND API =============================================================
+
+    def open(self):
+        """Open the file and return the handle used to read it."""
+        raise NotImplementedError()
+
+    def get_columns(self, handle) -> tuple:
+        """Return the names of all the columns in the file."""
+        raise NotImplementedError()
+
+    def get_length(self, handle) -> int:
+        """Return the number of rows of the file."""
+        raise NotImplementedError()
+
+    def read_columns(self, handle, columns, start, stop) -> dict:
+        """Read the rows between ``start`` and ``stop`` of the ``columns``
+        and return a dict of 1D arrays.
+
+        """
+        raise NotImplementedError()
+
+    # LAZY HANDLE =============================================================
+
+    @property
+    def handle(self):
+        """The handle of the opened file, opened in the first access."""
+        state = self._state
+        if "handle" not in state:
+            with state["lock"]:
+                if "handle" not in state:
+                    state["handle"] = self.open()
+        return state["handle"]
+
+    @property
+    def columns(self) -> tuple:
+        """All the columns of the file."""
+        return tuple(self.get_columns(self.handle))
+
+    @property
+    def selected(self) -> tuple:
+        """The columns of this view."""
+        return self.fields or self.columns
+
+    def _bounds(self):
+        size = self.get_length(self.handle)
+        start, stop, _ = slice(self.start, self.stop).indices(size)
+        return start, max(start, stop)
+
+    # QUERYSET API ============================================================
+
+    def all(self):
+        return self
+
+    def count(self) -> int:
+        start, stop = self._bounds()
+        return stop - start
+
+    def exists(self) -> bool:
+        return self.count() > 0
+
+    def values_list(self, *fields, flat=False):
+        """Return a view restricted to ``fields``.
+
+        Like in the querysets, ``flat=True`` is only allowed with one
+        field and the rows are returned as single values.
+
+        """
+        if flat and len(fields) != 1:
+            raise TypeError(
+                "'flat' is not valid when values_list is called with more "
+                "than one field."
+            )
+        unknown = set(fields).difference(self.columns)
+        if unknown:
+            raise KeyError(f"Unknown fields {sorted(unknown)}")
+        return attr.evolve(self, fields=fields or None, flat=flat)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.read([key])[key]
+
+        start, stop = self._bounds()
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise ValueError("Slices with step are not supported")
+            sub_start, sub_stop, _ = key.indices(stop - start)
+            return attr.evolve(
+                self, start=start + sub_start, stop=start + sub_stop
+            )
+
+        index = key + (stop - start) if key < 0 else key
+        if not 0 <= index < stop - start:
+            raise IndexError("Data source index out of range")
+        row = attr.evolve(self, start=start + index, stop=start + index + 1)
+        return next(iter(row))
+
+    def __iter__(self):
+        return self.iterator()
+
+    def iterator(self, chunk_size=2000):
+        """Iterate over the rows reading ``chunk_size`` rows at once.
+
+        Every row is a tuple with the values of the selected columns (or a
+        single value if ``flat`` is True).
+
+        """
+        columns = self.selected
+        for chunk in self.chunks(chunk_size):
+            if self.flat:
+                yield from chunk[columns[0]].tolist()
+            else:
+                yield from zip(*(chunk[c].tolist() for c in columns))
+
+    # NUMPY API ===============================================================
+
+    def read(self, columns=None) -> dict:
+        """Read the selected (or ``columns``) columns of the view as a dict
+        of 1D arrays.
+
+        """
+        start, stop = self._bounds()
+        columns = tuple(columns or self.selected)
+        return self.read_columns(self.handle, columns, start, stop)
+
+    def chunks(self, chunk_size=100_000):
+        """Iterate over the view yielding dicts of 1D arrays with at most
+        ``chunk_size`` rows.
+
+        """
+        start, stop = self._bounds()
+        columns = self.selected
+        for chunk_start in range(start, stop, chunk_size):
+            chunk_stop = min(chunk_start + chunk_size, stop)
+            yield self.read_columns(
+                self.handle, columns, chunk_start, chunk_stop
+            )
+
+    def to_numpy(self) -> np.ndarray:
+        """Return the view as an array.
+
+        If ``flat`` is True or there is only one column the array has one
+        dimension, otherwise every column is a column of a 2D array.
+
+        """
+        data = self.read()
+        if len(data) == 1:
+            return next(iter(data.values()))
+        return np.column_stack(list(data.values()))
+
+    def __array__(self, dtype=None, copy=None):
+        arr = self.to_numpy()
+        return arr if dtype is None else arr.astype(dtype)
+
+
+# =============================================================================
+# NUMPY
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class NpyDataSource(DataSource):
+    """Data source over a ``.npy`` file opened as a memory map.
+
+    Parameters
+    ----------
+    path: str
+        Path of the file.
+    names: tuple (optional)
+        Names of the columns of a 2D array. By default the columns of a
+        structured array are its fields, the columns of a 2D array are
+        named "0", "1"... and a 1D array has a single column "value".
+
+    """
+
+    path: str = attr.ib()
+    names: tuple = attr.ib(
+        default=None, converter=attr.converters.optional(tuple)
+    )
+
+    def open(self):
+        return np.load(self.path, mmap_mode="r")
+
+    def get_columns(self, handle):
+        if handle.dtype.names:
+            return handle.dtype.names
+        if handle.ndim == 1:
+            return self.names or ("value",)
+        return self.names or tuple(str(i) for i in range(handle.shape[1]))
+
+    def get_length(self, handle):
+        return len(handle)
+
+    def read_columns(self, handle, columns, start, stop):
+        rows = handle[start:stop]
+        if handle.dtype.names:
+            return {c: rows[c] for c in columns}
+        if handle.ndim == 1:
+            return {columns[0]: rows}
+        names = self.get_columns(handle)
+        return {c: rows[:, names.index(c)] for c in columns}
+
+
+# =============================================================================
+# PARQUET
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class ParquetDataSource(DataSource):
+    """Data source over a Parquet file. Requires ``pyarrow``.
+
+    Only the row groups that overlaps with the requested range and the
+    requested columns are read.
+
+    Parameters
+    ----------
+    path: str
+        Path of the file.
+
+    """
+
+    path: str = attr.ib()
+
+    def open(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as err:
+            raise ImportError("ParquetDataSource requires pyarrow") from err
+
+        pfile = pq.ParquetFile(self.path, memory_map=True)
+        offsets = [0]
+        for idx in range(pfile.num_row_groups):
+            rows = pfile.metadata.row_group(idx).num_rows
+            offsets.append(offsets[-1] + rows)
+        return pfile, offsets
+
+    def get_columns(self, handle):
+        pfile, _ = handle
+        return tuple(pfile.schema_arrow.names)
+
+    def get_length(self, handle):
+        _, offsets = handle
+        return offsets[-1]
+
+    def read_columns(self, handle, columns, start, stop):
+        pfile, offsets = handle
+        groups = [
+            idx
+            for idx in range(len(offsets) - 1)
+            if offsets[idx] < stop and offsets[idx + 1] > start
+        ]
+        if not groups:
+            table = pfile.schema_arrow.empty_table().select(list(columns))
+            first = start
+        else:
+            table = pfile.read_row_groups(groups, columns=list(columns))
+            first = offsets[groups[0]]
+        table = table.slice(start - first, stop - start)
+        return {
+            c: table.column(c).to_numpy(zero_copy_only=False) for c in columns
+        }
+
+
+# =============================================================================
+# HDF5
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class HDF5DataSource(DataSource):
+    """Data source over a HDF5 file. Requires ``h5py``.
+
+    The columns are the 1D datasets inside ``group`` or the fields of a
+    compound ``dataset``. Only the requested range is readed from disk.
+
+    Parameters
+    ----------
+    path: str
+        Path of the file.
+    group: str (Default: "/")
+        Group with one 1D dataset per column.
+    dataset: str (optional)
+        Compound dataset to use instead of the datasets of ``group``.
+
+    """
+
+    path: str = attr.ib()
+    group: str = attr.ib(default="/")
+    dataset: str = attr.ib(default=None)
+
+    def open(self):
+        try:
+            import h5py
+        except ImportError as err:
+            raise ImportError("HDF5DataSource requires h5py") from err
+
+        h5file = h5py.File(self.path, "r")
+        if self.dataset is not None:
+            return h5file[self.dataset]
+        return h5file[self.group]
+
+    def get_columns(self, handle):
+        if self.dataset is not None:
+            return handle.dtype.names
+        return tuple(
+            name
+            for name, node in handle.items()
+            if getattr(node, "ndim", None) == 1
+        )
+
+    def get_length(self, handle):
+        if self.dataset is not None:
+            return len(handle)
+        columns = self.get_columns(handle)
+        return min((len(handle[c]) for c in columns), default=0)
+
+    def read_columns(self, handle, columns, start, stop):
+        if self.dataset is not None:
+            return {c: handle.fields(c)[start:stop] for c in columns}
+        return {c: handle[c][start:stop] for c in columns}
@@ -0,0 +1,454 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Static export of the plot pages.
+
+The pages are rendered in-process with the django test client (with all
+the middlewares, templates and context processors of the project) and
+written to a directory that can be served by any static server or CDN:
+
+- Every page is written as ``<path>/index.html``.
+- The inline images (``data:`` URIs of the png plots, the small multiples
+  and the sprites, and the inline svg plots) are written as separate
+  files in ``images/``, named with the hash of their content, so they can
+  be cached forever.
+- The ``djmpl-manifest.json`` file stores the content hash of every page.
+  A page with the same hash than the previous export is not written
+  again. The plots are rendered in deterministic mode by default, so an
+  unchanged page has always the same hash.
+
+The pages can be rendered in parallel by a pool of processes.
+
+See the ``djmpl_export`` management command.
+
+"""
+
+__all__ = [
+    "PlotURL",
+    "discover_plot_urls",
+    "extract_images",
+    "export_page",
+    "export",
+]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import base64
+import binascii
+import concurrent.futures
+import hashlib
+import json
+import multiprocessing
+import os
+import posixpath
+import re
+import tempfile
+import time
+
+import attr
+
+from . import settings
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Name of the manifest file in the output directory.
+MANIFEST_NAME = "djmpl-manifest.json"
+
+#: Directory of the images inside the output directory.
+IMAGES_DIR = "images"
+
+_EXTENSIONS = {"image/png": "png", "image/svg+xml": "svg"}
+
+_DATA_URI_RE = re.compile(
+    r"data:(?P<mimetype>image/png|image/svg\+xml);base64,"
+    r"(?P<data>[A-Za-z0-9+/=]+)"
+)
+
+_INLINE_SVG_RE = re.compile(
+    r"(?P<open><div class='djmpl djmpl-svg'>)\s*"
+    r"(?P<svg>(?:<\?xml.*?\?>)?.*?</svg>)\s*(?P<close></div>)",
+    re.DOTALL,
+)
+
+
+# =============================================================================
+# URL DISCOVERY
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class PlotURL:
+    """An url pattern of the project served by a plot view.
+
+    Parameters
+    ----------
+    regex: str
+        The regex of the full path (without the leading slash).
+    view_class:
+        The class of the view.
+    name: str
+        The name of the url pattern (with its namespaces) or ``None``.
+
+    """
+
+    regex: str = attr.ib()
+    view_class = attr.ib()
+    name: str = attr.ib(default=None)
+
+    @property
+    def view_name(self) -> str:
+        """The dotted path of the view class."""
+        cls = self.view_class
+        return f"{cls.__module__}.{cls.__qualname__}"
+
+    @property
+    def params(self) -> tuple:
+        """The names of the parameters of the url."""
+        from django.utils.regex_helper import normalize
+
+        return tuple(normalize(self.regex)[0][1])
+
+    def url(self, **params) -> str:
+        """Build the path of the url with ``params``."""
+        from django.utils.regex_helper import normalize
+
+        template, names = normalize(self.regex)[0]
+        missing = set(names).difference(params)
+        if missing:
+            raise ValueError(
+                f"Missing parameters {sorted(missing)} for {self.regex!r}"
+            )
+        return "/" + template % {k: str(v) for k, v in params.items()}
+
+
+def _is_plot_view(callback) -> bool:
+    from .views import MultiPlotMixin
+
+    view_class = getattr(callback, "view_class", None)
+    return isinstance(view_class, type) and issubclass(
+        view_class, MultiPlotMixin
+    )
+
+
+def _walk(patterns, prefix, namespace):
+    from django.urls import URLPattern, URLResolver
+
+    for pattern in patterns:
+        regex = pattern.pattern.regex.pattern
+        regex = prefix + (regex[1:] if regex.startswith("^") else regex)
+        if isinstance(pattern, URLResolver):
+            ns = namespace
+            if pattern.namespace:
+                ns = namespace + (pattern.namespace,)
+            yield from _walk(pattern.url_patterns, regex, ns)
+        elif isinstance(pattern, URLPattern) and _is_plot_view(
+            pattern.callback
+        ):
+            name = pattern.name and ":".join(namespace + (pattern.name,))
+            yield PlotURL(
+                regex=regex,
+                view_class=pattern.callback.view_class,
+                name=name,
+            )
+
+
+def discover_plot_urls(urlconf=None) -> list:
+    """Return a ``PlotURL`` for every url pattern of the project served by
+    a view built on ``PlotMixin`` or ``MultiPlotMixin``.
+
+    """
+    from django.urls import get_resolver
+
+    resolver = get_resolver(urlconf)
+    return list(_walk(resolver.url_patterns, "", ()))
+
+
+# =============================================================================
+# IMAGES
+# =============================================================================
+
+
+def image_name(content: bytes, ext: str) -> str:
+    """The content-hashed name of an image."""
+    return f"{hashlib.sha256(content).hexdigest()[:20]}.{ext}"
+
+
+def extract_images(html: str, store) -> str:
+    """Replace the inline images of ``html`` with links.
+
+    ``store(content, ext)`` must save the image and return its url. The
+    ``data:`` URIs of png and svg images are replaced by the url and the
+    inline svg plots by an ``<img>``.
+
+    """
+
+    def replace_data_uri(match):
+        try:
+            content = base64.b64decode(match["data"], validate=True)
+        except binascii.Error:
+            return match[0]
+        return store(content, _EXTENSIONS[match["mimetype"]])
+
+    def replace_svg(match):
+        url = store(match["svg"].encode("utf-8"), "svg")
+        return f"{match['open']}<img src='{url}'>{match['close']}"
+
+    html = _DATA_URI_RE.sub(replace_data_uri, html)
+    return _INLINE_SVG_RE.sub(replace_svg, html)
+
+
+# =============================================================================
+# EXPORT
+# =============================================================================
+
+
+def page_path(url: str) -> str:
+    """The file of a page inside the output directory."""
+    path = url.split("?", 1)[0].strip("/")
+    return posixpath.join(path, "index.html") if path else "index.html"
+
+
+def default_host() -> str:
+    """The first host of ``settings.ALLOWED_HOSTS``, or "localhost"."""
+    from django.conf import settings as django_settings
+
+    for host in django_settings.ALLOWED_HOSTS:
+        if host != "*":
+            return host.lstrip(".")
+    return "localhost"
+
+
+def _write_atomic(path, content: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def export_page(
+    url,
+    output,
+    previous_hash=None,
+    host=None,
+    base_url=None,
+    client=None,
+) -> dict:
+    """Render the page ``url`` and write it with its images into
+    ``output``.
+
+    Parameters
+    ----------
+    url: str
+        Path of the page.
+    output: str
+        The output directory.
+    previous_hash: str (optional)
+        Content hash of the page in the previous export. If the new page
+        has the same hash it is not written.
+    host: str (optional)
+        Value of the ``Host`` header of the request. By default the first
+        host of ``settings.ALLOWED_HOSTS``.
+    base_url: str (optional)
+        Url of the output directory in the final server. By default the
+        images are linked with relative urls.
+
+    Returns
+    -------
+    A dict with the ``url``, ``path``, ``hash``, ``status`` ("written",
+    "unchanged" or "error"), ``images``, ``seconds`` and ``error`` of the
+    page.
+
+    """
+    from django.test import Client
+
+    client = client or Client(HTTP_HOST=host or default_host())
+    path = page_path(url)
+    result = {
+        "url": url,
+        "path": path,
+        "hash": None,
+        "status": "error",
+        "images": [],
+        "seconds": 0.0,
+        "error": None,
+    }
+
+    start = time.perf_counter()
+    try:
+        response = client.get(url)
+    except Exception as err:
+        result["error"] = f"{type(err).__name__}: {err}"
+        return result
+    result["seconds"] = time.perf_counter() - start
+
+    if response.status_code != 200:
+        result["error"] = f"HTTP {response.status_code}"
+        return result
+
+    if base_url is None:
+        images_url = posixpath.relpath(
+            IMAGES_DIR, posixpath.dirname(path) or "."
+        )
+    else:
+        images_url = posixpath.join(base_url, IMAGES_DIR)
+
+    images = {}
+
+    def store(content, ext):
+        name = image_name(content, ext)
+        images[name] = content
+        return posixpath.join(images_url, name)
+
+    charset = response.charset or "utf-8"
+    html = extract_images(response.content.decode(charset), store)
+    content = html.encode(charset)
+
+    result["hash"] = hashlib.sha256(content).hexdigest()
+    result["images"] = sorted(images)
+
+    page_file = os.path.join(output, *path.split("/"))
+    if result["hash"] == previous_hash and os.path.exists(page_file):
+        result["status"] = "unchanged"
+        return result
+
+    for name, image in images.items():
+        image_file = os.path.join(output, IMAGES_DIR, name)
+        if not os.path.exists(image_file):
+            _write_atomic(image_file, image)
+    _write_atomic(page_file, content)
+    result["status"] = "written"
+    return result
+
+
+def read_manifest(output) -> dict:
+    """Return the manifest of the previous export in ``output``."""
+    try:
+        with open(os.path.join(output, MANIFEST_NAME)) as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return {}
+
+
+def _init_worker(settings_module, deterministic):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+
+    import django
+
+    django.setup()
+    _set_deterministic(deterministic)
+
+
+def _set_deterministic(deterministic):
+    if deterministic:
+        settings.DJMPL_DETERMINISTIC = True
+
+
+def export(
+    urls,
+    output,
+    jobs=1,
+    host=None,
+    base_url=None,
+    deterministic=True,
+    force=False,
+    callback=None,
+) -> list:
+    """Export the pages ``urls`` into ``output``.
+
+    Parameters
+    ----------
+    urls: sequence
+        Paths of the pages.
+    output: str
+        The output directory.
+    jobs: int
+        Number of processes. With 1 the pages are rendered in the current
+        process.
+    host, base_url:
+        See ``export_page``.
+    deterministic: bool (Default: True)
+        Render the plots in deterministic mode, so the unchanged pages
+        are detected.
+    force: bool
+        Write all the pages, even the unchanged ones.
+    callback: callable (optional)
+        Called with the result of every page when is ready.
+
+    Returns
+    -------
+    The list of the results of ``export_page``.
+
+    """
+    output = os.path.abspath(output)
+    manifest = {} if force else read_manifest(output)
+
+    def previous(url):
+        return manifest.get(url, {}).get("hash")
+
+    results = []
+    if jobs <= 1:
+        original = settings.DJMPL_DETERMINISTIC
+        _set_deterministic(deterministic)
+        try:
+            for url in urls:
+                result = export_page(
+                    url, output, previous(url), host=host, base_url=base_url
+                )
+                results.append(result)
+                if callback:
+                    callback(result)
+        finally:
+            settings.DJMPL_DETERMINISTIC = original
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(os.environ["DJANGO_SETTINGS_MODULE"], deterministic),
+        )
+        with executor:
+            futures = [
+                executor.submit(
+                    export_page,
+                    url,
+                    output,
+                    previous(url),
+                    host=host,
+                    base_url=base_url,
+                )
+                for url in urls
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if callback:
+                    callback(result)
+
+    for result in results:
+        if result["status"] != "error":
+            manifest[result["url"]] = {
+                "path": result["path"],
+                "hash": result["hash"],
+                "images": result["images"],
+            }
+    content = json.dumps(manifest, indent=2, sort_keys=True)
+    _write_atomic(os.path.join(output, MANIFEST_NAME), content.encode())
+    return results
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Named plots rendered from the templates and stored in a fragment
+cache.
+
+A named plot is a callable that receives the arguments given in the
+template plus the ``fig`` and ``ax`` to draw on:
+
+.. code-block:: python
+
+    from django_matplotlib import fragments
+
+    @fragments.register(version=lambda year: Sale.objects.latest().pk)
+    def sales(year, fig, ax):
+        ax.plot(...)
+
+And is rendered with the ``{% djmpl_plot "sales" 2020 %}`` django tag
+(``{% load djmpl %}``) or with the jinja2 extension
+``django_matplotlib.jinja2ext.DjmplExtension``.
+
+The plot is only drawn when it is not in the cache. The key of the cache
+is built with the name, the arguments, the format and the data version,
+so a new version of the data invalidates the stored plots.
+
+A plot registered with a ``stale_timeout`` keeps being served for that
+many seconds after its ``timeout`` expires, while only one background
+thread draws it again (see ``django_matplotlib.cache.get_or_render``):
+
+.. code-block:: python
+
+    @fragments.register(timeout=60, stale_timeout=600)
+    def visits(fig, ax):
+        ax.plot(...)
+
+"""
+
+__all__ = ["register", "render_plot", "PlotNotFound"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import attr
+
+from . import cache, core, settings
+
+
+# =============================================================================
+# EXCEPTIONS
+# =============================================================================
+
+
+class PlotNotFound(LookupError):
+    """The named plot is not registered."""
+
+
+# =============================================================================
+# REGISTRY
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class NamedPlot:
+    """A plot callable registered with a name.
+
+    Parameters
+    ----------
+    name: str
+        The name used in the templates.
+    func: callable
+        Draw the plot. Receives the template arguments plus ``fig`` and
+        ``ax``.
+    version: callable or None
+        Receives the template arguments and return the version of the
+        data. It is part of the cache key.
+    timeout: int or None
+        Seconds that the plot is fresh in the cache.
+    stale_timeout: int or None
+        Seconds after ``timeout`` that the stale plot is served while it is
+        drawn again in background.
+    subplots_kwargs: dict
+        Parameters for ``matplotlib.pyplot.subplots``.
+
+    """
+
+    name: str = attr.ib()
+    func = attr.ib()
+    version = attr.ib(default=None)
+    timeout: int = attr.ib(default=None)
+    stale_timeout: int = attr.ib(default=None)
+    subplots_kwargs: dict = attr.ib(factory=dict)
+
+    def get_version(self, *args, **kwargs):
+        if self.version is None:
+            return None
+        return self.version(*args, **kwargs)
+
+
+_registry = {}
+
+
+def register(
+    func=None,
+    *,
+    name=None,
+    version=None,
+    timeout=None,
+    stale_timeout=None,
+    subplots_kwargs=None,
+):
+    """Register a plot callable to be used in the templates.
+
+    Can be used as ``@register`` or ``@register(name=..., version=...)``.
+    By default the name is the name of the function.
+
+    """
+
+    def decorator(func):
+        named = NamedPlot(
+            name=name or func.__name__,
+            func=func,
+            version=version,
+            timeout=timeout,
+            stale_timeout=stale_timeout,
+            subplots_kwargs=subplots_kwargs or {},
+        )
+        _registry[named.name] = named
+        return func
+
+    return decorator if func is None else decorator(func)
+
+
+def unregister(name):
+    """Remove a named plot from the registry."""
+    _registry.pop(name, None)
+
+
+def get_plot(name) -> NamedPlot:
+    """Retrieve a registered plot by name.
+
+    Only the plots registered with ``register`` can be rendered, so a
+    template can not call any importable callable.
+
+    """
+    try:
+        return _registry[name]
+    except KeyError:
+        raise PlotNotFound(f"Plot {name!r} not registered") from None
+
+
+# =============================================================================
+# RENDER
+# =============================================================================
+
+
+def render_plot(
+    name,
+    *args,
+    plot_format=None,
+    template_engine="str",
+    version=None,
+    timeout=None,
+    stale_timeout=None,
+    **kwargs,
+):
+    """Render a named plot or retrieve it from the cache.
+
+    Parameters
+    ----------
+    name: str
+        Registered name of the plot callable.
+    args, kwargs:
+        Arguments for the plot callable. Are part of the cache key.
+    plot_format: str (optional)
+        Format of the plot, by default ``settings.DJMPL_FORMAT``.
+    template_engine: str
+        Engine used to mark as safe the result.
+    version: (optional)
+        Version of the data. If is not provided the ``version`` callable
+        of the registered plot is used.
+    timeout: int (optional)
+        Seconds to store the plot in the cache. By default the timeout of
+        the registered plot or ``settings.DJMPL_CACHE_TIMEOUT``.
+    stale_timeout: int (optional)
+        Seconds after ``timeout`` that the stale plot is served while it is
+        drawn again. By default the stale timeout of the registered plot
+        or ``settings.DJMPL_CACHE_STALE_TIMEOUT``.
+
+    Returns
+    -------
+    The html of the plot marked safe for ``template_engine``.
+
+    """
+    named = get_plot(name)
+    plot_format = plot_format or settings.DJMPL_FORMAT
+    if version is None:
+        version = named.get_version(*args, **kwargs)
+    if timeout is None:
+        timeout = named.timeout or settings.DJMPL_CACHE_TIMEOUT
+    if stale_timeout is None:
+        stale_timeout = (
+            settings.DJMPL_CACHE_STALE_TIMEOUT
+            if named.stale_timeout is None
+            else named.stale_timeout
+        )
+
+    key = cache.make_key(
+        "fragment",
+        named.name,
+        args,
+        sorted(kwargs.items()),
+        plot_format,
+        version,
+    )
+    html = cache.get_or_render(
+        "fragment",
+        key,
+        lambda: _draw(named, plot_format, args, kwargs),
+        timeout,
+        stale_timeout,
+    )
+
+    formater = settings.TEMPLATES_FORMATERS[
+        core.template_by_alias(template_engine)
+    ]
+    return formater(html)
+
+
+def _draw(named, plot_format, args, kwargs):
+    import matplotlib.pyplot as plt
+
+    plot = core.subplots(
+        plot_format=plot_format,
+        template_engine="str",
+        labels={"view": "fragments", "method": named.name},
+        **named.subplots_kwargs,
+    )
+    fig, ax = plot.figaxes()
+    try:
+        named.func(*args, fig=fig, ax=ax, **kwargs)
+        return plot.html_str()
+    finally:
+        plt.close(fig)
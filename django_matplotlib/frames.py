@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Typed NumPy arrays and pandas DataFrames as the data of the plots.
+
+The querysets are read in chunks with ``values_list`` and every column is
+converted into a 1D array with the dtype of its model field (integers,
+floats, booleans, dates, datetimes and durations), without building a list
+of model instances or dicts. The columns can be wrapped, without copies,
+in a pandas ``DataFrame`` and transformed with declarative steps
+(``Resample``, ``GroupBy`` and ``Rolling``) evaluated once per request,
+before all the plot methods.
+
+The numeric columns of the arrays and DataFrames are passed to matplotlib
+without extra copies (``numpy.asarray`` returns the same buffer).
+
+.. code-block:: python
+
+    class RequestsView(djmpl.MultiPlotView):
+        model = Request
+        plot_pipeline = frames.Pipeline(
+            columns=["created", "latency"],
+            index="created",
+            steps=[frames.Resample("1h", how="mean")],
+        )
+
+        def plot_latency(self, data, fig, ax):
+            ax.plot(data.index, data["latency"])
+
+The pandas features require ``pandas``, the arrays only NumPy.
+
+"""
+
+__all__ = [
+    "field_dtype",
+    "queryset_arrays",
+    "to_arrays",
+    "to_dataframe",
+    "Resample",
+    "GroupBy",
+    "Rolling",
+    "Pipeline",
+]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import datetime as dt
+import itertools as it
+
+import attr
+
+import numpy as np
+
+from .aggregate import _is_queryset, DEFAULT_CHUNK_SIZE
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Dtype of the arrays of every internal type of the model fields. The
+#: fields of other types (and the annotations) use the dtype inferred by
+#: NumPy.
+FIELD_DTYPES = {
+    "AutoField": "int64",
+    "BigAutoField": "int64",
+    "SmallAutoField": "int64",
+    "IntegerField": "int64",
+    "BigIntegerField": "int64",
+    "SmallIntegerField": "int64",
+    "PositiveIntegerField": "int64",
+    "PositiveBigIntegerField": "int64",
+    "PositiveSmallIntegerField": "int64",
+    "FloatField": "float64",
+    "DecimalField": "float64",
+    "BooleanField": "bool",
+    "DateField": "datetime64[D]",
+    "DateTimeField": "datetime64[us]",
+    "DurationField": "timedelta64[us]",
+}
+
+#: Dtypes without a missing value. The nullable fields of these dtypes use
+#: "float64" and ``NaN``, like pandas.
+_NOT_NULLABLE = ("int64", "bool")
+
+
+# =============================================================================
+# ARRAYS
+# =============================================================================
+
+
+def _import_pandas():
+    try:
+        import pandas as pd
+    except ImportError as err:
+        raise ImportError("DataFrames require pandas") from err
+    return pd
+
+
+def field_dtype(model, name):
+    """Return the dtype of the array of the field ``name`` of ``model``, or
+    ``None`` if the field is unknown (lookups across relations are
+    followed).
+
+    """
+    from django.core.exceptions import FieldDoesNotExist
+
+    if name == "pk":
+        name = model._meta.pk.name
+    *relations, name = name.split("__")
+    try:
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        field = model._meta.get_field(name)
+    except (AttributeError, FieldDoesNotExist):
+        return None
+    if field.is_relation:
+        field = field.target_field
+    dtype = FIELD_DTYPES.get(field.get_internal_type())
+    if field.null and dtype in _NOT_NULLABLE:
+        return "float64"
+    return dtype
+
+
+def _naive_utc(value):
+    if isinstance(value, dt.datetime) and value.tzinfo is not None:
+        return value.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _column(values, dtype) -> np.ndarray:
+    if dtype == "datetime64[us]":
+        values = [_naive_utc(v) for v in values]
+    return np.array(values, dtype=dtype)
+
+
+def queryset_arrays(queryset, fields=(), chunk_size=DEFAULT_CHUNK_SIZE):
+    """Read ``fields`` of ``queryset`` into a dict of typed 1D arrays.
+
+    The rows are fetched with ``values_list`` in chunks of ``chunk_size``
+    (a server side cursor where supported) and every chunk is converted
+    into arrays immediately, so only one chunk of Python objects is alive
+    at once. The aware datetimes are converted to UTC.
+
+    Parameters
+    ----------
+    queryset:
+        A django queryset.
+    fields: sequence
+        Names of the fields (or annotations). By default all the concrete
+        fields of the model.
+    chunk_size: int
+        Number of rows converted at once.
+
+    """
+    fields = tuple(fields) or tuple(
+        f.attname for f in queryset.model._meta.concrete_fields
+    )
+    dtypes = [field_dtype(queryset.model, f) for f in fields]
+    parts = {f: [] for f in fields}
+
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(it.islice(rows, chunk_size))
+        if not chunk:
+            break
+        for field, dtype, values in zip(fields, dtypes, zip(*chunk)):
+            parts[field].append(_column(values, dtype))
+
+    arrays = {}
+    for field, dtype in zip(fields, dtypes):
+        chunks = parts[field]
+        if not chunks:
+            arrays[field] = np.array([], dtype=dtype or float)
+        elif len(chunks) == 1:
+            arrays[field] = chunks[0]
+        else:
+            arrays[field] = np.concatenate(chunks)
+    return arrays
+
+
+def _mapping_columns(data) -> tuple:
+    if getattr(getattr(data, "dtype", None), "names", None):
+        return data.dtype.names
+    if hasattr(data, "columns"):
+        return tuple(data.columns)
+    return tuple(data.keys())
+
+
+def to_arrays(data, columns=None, chunk_size=DEFAULT_CHUNK_SIZE) -> dict:
+    """Return the ``columns`` of ``data`` as a dict of 1D arrays.
+
+    Parameters
+    ----------
+    data:
+        A django queryset (see ``queryset_arrays``), a
+        ``datasources.DataSource`` or a mapping of columns (dict,
+        structured array, DataFrame). The columns that are already arrays
+        (and the numeric columns of the DataFrames) are not copied.
+    columns: sequence (optional)
+        Names of the columns. By default all.
+
+    """
+    if _is_queryset(data):
+        return queryset_arrays(data, columns or (), chunk_size=chunk_size)
+    if hasattr(data, "chunks") and hasattr(data, "values_list"):
+        return data.read(columns)
+    if not hasattr(data, "__getitem__"):
+        raise TypeError(f"Can't read columns from {type(data).__name__!r}")
+    columns = tuple(columns or _mapping_columns(data))
+    return {col: np.asarray(data[col]) for col in columns}
+
+
+def to_dataframe(
+    data, columns=None, index=None, chunk_size=DEFAULT_CHUNK_SIZE
+):
+    """Return the ``columns`` of ``data`` as a pandas ``DataFrame``.
+
+    The arrays of ``to_arrays`` are wrapped without copies. ``index`` is
+    the name of the column used as the index of the DataFrame (required
+    by ``Resample``).
+
+    """
+    pd = _import_pandas()
+
+    if isinstance(data, pd.DataFrame):
+        frame = data[list(columns)] if columns else data
+    else:
+        frame = pd.DataFrame(
+            to_arrays(data, columns, chunk_size=chunk_size), copy=False
+        )
+    if index is not None:
+        frame = frame.set_index(index)
+    return frame
+
+
+# =============================================================================
+# TRANSFORMS
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class Resample:
+    """Resample a time series and reduce every bin.
+
+    Parameters
+    ----------
+    rule: str
+        The size of the bins as a pandas offset alias (``"1h"``, ``"5min"``).
+    how: str, list or dict (Default: mean)
+        The reduction passed to ``agg``.
+    on: str (optional)
+        Column with the dates. By default the index of the DataFrame.
+
+    """
+
+    rule: str = attr.ib()
+    how = attr.ib(default="mean")
+    on: str = attr.ib(default=None)
+
+    def apply(self, frame):
+        return frame.resample(self.rule, on=self.on).agg(self.how)
+
+
+@attr.s(frozen=True)
+class GroupBy:
+    """Group the rows by some columns and reduce every group.
+
+    Parameters
+    ----------
+    by: str or list
+        The columns of the groups. They are the index of the result.
+    how: str, list or dict (Default: mean)
+        The reduction passed to ``agg``.
+
+    """
+
+    by = attr.ib()
+    how = attr.ib(default="mean")
+
+    def apply(self, frame):
+        return frame.groupby(self.by, sort=True).agg(self.how)
+
+
+@attr.s(frozen=True)
+class Rolling:
+    """Moving window reduction.
+
+    Parameters
+    ----------
+    window: int or str
+        Number of rows, or an offset alias for the DataFrames with dates
+        as index.
+    how: str, list or dict (Default: mean)
+        The reduction passed to ``agg``.
+    min_periods: int (optional)
+        Minimum number of rows of a window with a value.
+    center: bool (Default: False)
+        Set the labels at the center of the window.
+
+    """
+
+    window = attr.ib()
+    how = attr.ib(default="mean")
+    min_periods: int = attr.ib(default=None)
+    center: bool = attr.ib(default=False)
+
+    def apply(self, frame):
+        rolling = frame.rolling(
+            self.window, min_periods=self.min_periods, center=self.center
+        )
+        return rolling.agg(self.how)
+
+
+@attr.s(frozen=True)
+class Pipeline:
+    """Declarative conversion and transformation of the data of a view.
+
+    Parameters
+    ----------
+    columns: sequence (optional)
+        Columns (or fields of the querysets) to read. By default all.
+    index: str (optional)
+        Column used as the index of the DataFrame.
+    steps: sequence
+        Transforms (``Resample``, ``GroupBy``, ``Rolling`` or any object
+        with an ``apply(frame)`` method) applied in order.
+    as_frame: bool (Default: True)
+        If False the result is a dict of NumPy arrays and pandas is not
+        required (``index`` and ``steps`` are not allowed).
+    chunk_size: int
+        Number of rows of the querysets converted at once.
+
+    """
+
+    columns: tuple = attr.ib(
+        default=None, converter=attr.converters.optional(tuple)
+    )
+    index: str = attr.ib(default=None)
+    steps: tuple = attr.ib(factory=tuple, converter=tuple)
+    as_frame: bool = attr.ib(default=True)
+    chunk_size: int = attr.ib(default=DEFAULT_CHUNK_SIZE)
+
+    def __attrs_post_init__(self):
+        if not self.as_frame and (self.index or self.steps):
+            raise ValueError("The index and the steps require a DataFrame")
+
+    def evaluate(self, data):
+        """Return the transformed ``data``."""
+        if not self.as_frame:
+            return to_arrays(data, self.columns, chunk_size=self.chunk_size)
+        frame = to_dataframe(
+            data, self.columns, self.index, chunk_size=self.chunk_size
+        )
+        for step in self.steps:
+            frame = step.apply(frame)
+        return frame
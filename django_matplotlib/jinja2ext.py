@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Jinja2 extension of django-matplotlib.
+
+Add it in the ``OPTIONS`` of the jinja2 engine:
+
+.. code-block:: python
+
+    TEMPLATES = [{
+        "BACKEND": "django.template.backends.jinja2.Jinja2",
+        "OPTIONS": {
+            "extensions": ["django_matplotlib.jinja2ext.DjmplExtension"]
+        },
+        ...
+    }]
+
+And render a named plot with the tag or the global function:
+
+.. code-block:: html+jinja
+
+    {% djmpl_plot "sales", 2020, format="svg" %}
+    {{ djmpl_plot("sales", 2020, format="svg") }}
+
+If the environment is created with ``"enable_async": True`` the plots of
+the context of the templates are rendered concurrently: when the template
+begins to render, every plot (and every plot inside a list or tuple) is
+replaced by an ``AwaitablePlot`` and submitted to a pool of threads. The
+plots are resolved in place, so a template with several plots costs
+roughly the time of the slowest one and not the sum:
+
+.. code-block:: html+jinja
+
+    {% for plot in plots %}{{ plot.to_html() }}{% endfor %}
+
+"""
+
+__all__ = ["DjmplExtension", "AwaitablePlot", "AsyncPlotTemplate"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import asyncio
+import concurrent.futures
+import threading
+
+from jinja2 import nodes, Template
+from jinja2.ext import Extension
+
+from . import fragments, settings
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+_EXECUTOR = {}
+
+_EXECUTOR_LOCK = threading.Lock()
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def djmpl_plot(name, *args, **kwargs):
+    """Render the named plot ``name`` for jinja2 templates.
+
+    The special arguments ``format``, ``version``, ``timeout`` and
+    ``stale_timeout`` are not passed to the plot (see
+    ``django_matplotlib.fragments.render_plot``).
+
+    """
+    return fragments.render_plot(
+        name,
+        *args,
+        plot_format=kwargs.pop("format", None),
+        template_engine="jinja2",
+        version=kwargs.pop("version", None),
+        timeout=kwargs.pop("timeout", None),
+        stale_timeout=kwargs.pop("stale_timeout", None),
+        **kwargs,
+    )
+
+
+def get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Return the pool of threads that renders the plots of the async
+    templates (with ``settings.DJMPL_ASYNC_WORKERS`` threads).
+
+    """
+    workers = settings.DJMPL_ASYNC_WORKERS
+    with _EXECUTOR_LOCK:
+        if workers not in _EXECUTOR:
+            _EXECUTOR[workers] = concurrent.futures.ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="djmpl-jinja2"
+            )
+        return _EXECUTOR[workers]
+
+
+def _is_plot(value) -> bool:
+    # checked in the type (not with isinstance), so the lazy objects of the
+    # context are not evaluated
+    return callable(getattr(type(value), "html_str", None))
+
+
+# =============================================================================
+# ASYNC RENDERING
+# =============================================================================
+
+
+class AwaitablePlot:
+    """A plot rendered in a pool of threads.
+
+    Has the same attributes than the wrapped plot, but ``to_html()`` is a
+    coroutine (awaited automatically by the async templates). Writing the
+    plot directly (``{{ plot }}``) waits for the render.
+
+    """
+
+    def __init__(self, plot, future):
+        self.plot = plot
+        self.future = future
+
+    def __getattr__(self, name):
+        return getattr(self.plot, name)
+
+    def __repr__(self):
+        return f"<AwaitablePlot {self.plot!r}>"
+
+    async def to_html(self):
+        return await asyncio.wrap_future(self.future)
+
+    def __await__(self):
+        return self.to_html().__await__()
+
+    def __html__(self):
+        return self.future.result()
+
+    def __str__(self):
+        return str(self.future.result())
+
+
+def start_plots(context, executor=None) -> tuple:
+    """Submit the render of all the plots of ``context`` to ``executor``.
+
+    Returns a copy of the context with the plots (and the plots inside
+    lists and tuples) replaced by ``AwaitablePlot`` and the list of
+    futures.
+
+    """
+    executor = executor or get_executor()
+    futures = []
+
+    def start(plot):
+        future = executor.submit(plot.to_html)
+        futures.append(future)
+        return AwaitablePlot(plot, future)
+
+    started = {}
+    for key, value in context.items():
+        if _is_plot(value):
+            value = start(value)
+        elif issubclass(type(value), (list, tuple)) and any(
+            map(_is_plot, value)
+        ):
+            value = type(value)(start(v) if _is_plot(v) else v for v in value)
+        started[key] = value
+    return started, futures
+
+
+class AsyncPlotTemplate(Template):
+    """Template of the async environments that renders the plots of the
+    context concurrently.
+
+    """
+
+    async def render_async(self, *args, **kwargs):
+        context, futures = start_plots(dict(*args, **kwargs))
+        try:
+            return await super().render_async(context)
+        finally:
+            # the plots not used by the template are not waited
+            for future in futures:
+                future.cancel()
+
+
+# =============================================================================
+# EXTENSION
+# =============================================================================
+
+
+class DjmplExtension(Extension):
+    """Add the ``{% djmpl_plot %}`` tag and the ``djmpl_plot()`` global
+    function.
+
+    The templates are ``AsyncPlotTemplate`` (if the environment uses the
+    default template class), so in the async environments the plots are
+    rendered concurrently.
+
+    """
+
+    tags = {"djmpl_plot"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.globals.setdefault("djmpl_plot", djmpl_plot)
+        # the environment is not configured yet, but only the async
+        # environments call render_async
+        if environment.template_class is Template:
+            environment.template_class = AsyncPlotTemplate
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+
+        args, kwargs = [], []
+        while parser.stream.current.type != "block_end":
+            if args or kwargs:
+                parser.stream.expect("comma")
+            if (
+                parser.stream.current.type == "name"
+                and parser.stream.look().type == "assign"
+            ):
+                key = parser.stream.current.value
+                parser.stream.skip(2)
+                value = parser.parse_expression()
+                kwargs.append(nodes.Keyword(key, value, lineno=value.lineno))
+            else:
+                args.append(parser.parse_expression())
+
+        call = self.call_method("_render", args, kwargs, lineno=lineno)
+        return nodes.Output([call], lineno=lineno)
+
+    def _render(self, *args, **kwargs):
+        return djmpl_plot(*args, **kwargs)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Layout strategies for the figures.
+
+``fig.tight_layout()`` measures the extents of all the texts through the
+renderer and is often the most expensive step of small charts. The
+``cached`` strategy executes it only once for every layout signature
+(the geometry of the figure and the axes plus the titles, labels and
+length of the tick labels) and reuses the resulting subplot parameters in
+the later renders.
+
+"""
+
+__all__ = ["apply_layout", "clear_cache", "layout_signature"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import collections
+import threading
+
+from . import settings
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: The parameters of ``Figure.subplots_adjust``.
+SUBPLOT_PARAMS = ("left", "right", "bottom", "top", "wspace", "hspace")
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+_cache = collections.OrderedDict()
+
+_cache_lock = threading.Lock()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        params = _cache.get(key)
+        if params is not None:
+            _cache.move_to_end(key)
+        return params
+
+
+def _cache_set(key, params):
+    with _cache_lock:
+        _cache[key] = params
+        _cache.move_to_end(key)
+        while len(_cache) > settings.DJMPL_LAYOUT_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear_cache():
+    """Remove all the layouts stored by the ``cached`` strategy."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def cache_info() -> dict:
+    """Return the size and the maximum size of the layout cache."""
+    return {"size": len(_cache), "maxsize": settings.DJMPL_LAYOUT_CACHE_SIZE}
+
+
+# =============================================================================
+# SIGNATURE
+# =============================================================================
+
+
+def _text_signature(text):
+    return (text.get_text(), round(text.get_fontsize(), 2))
+
+
+def _ticks_signature(axis):
+    if not axis.get_visible():
+        return None
+    ticks = axis.get_ticklocs()
+    labels = axis.get_major_formatter().format_ticks(ticks)
+    longest = max((len(label) for label in labels), default=0)
+    fontsize = axis.get_ticklabels()[0].get_fontsize() if len(ticks) else 0
+    return (longest, round(fontsize, 2), axis.get_label_position())
+
+
+def _axes_signature(ax):
+    return (
+        tuple(round(v, 4) for v in ax.get_position(original=True).bounds),
+        ax.get_visible(),
+        _text_signature(ax.title),
+        _text_signature(ax.xaxis.label),
+        _text_signature(ax.yaxis.label),
+        _ticks_signature(ax.xaxis),
+        _ticks_signature(ax.yaxis),
+        ax.get_legend() is not None,
+    )
+
+
+def layout_signature(fig) -> tuple:
+    """Return a hashable description of everything that changes the
+    result of ``tight_layout`` in a figure.
+
+    The tick labels are summarized by the length of the longest label,
+    so two figures with labels of the same length but different widths
+    share the same signature.
+
+    """
+    suptitle = getattr(fig, "_suptitle", None)
+    return (
+        tuple(round(v, 4) for v in fig.get_size_inches()),
+        round(fig.dpi, 2),
+        suptitle and _text_signature(suptitle),
+        tuple(_axes_signature(ax) for ax in fig.axes),
+    )
+
+
+# =============================================================================
+# STRATEGIES
+# =============================================================================
+
+
+def _tight(fig, key):
+    fig.tight_layout()
+
+
+def _cached(fig, key):
+    key = (key, layout_signature(fig))
+    params = _cache_get(key)
+    if params is None:
+        fig.tight_layout()
+        params = {p: getattr(fig.subplotpars, p) for p in SUBPLOT_PARAMS}
+        _cache_set(key, params)
+    else:
+        fig.subplots_adjust(**params)
+
+
+def _constrained(fig, key):
+    set_layout_engine = getattr(fig, "set_layout_engine", None)
+    if set_layout_engine is None:  # matplotlib < 3.6
+        fig.set_constrained_layout(True)
+    else:
+        set_layout_engine("constrained")
+
+
+def _fixed(fig, key):
+    fig.subplots_adjust(**settings.DJMPL_LAYOUT_MARGINS)
+
+
+_STRATEGIES = {
+    "tight": _tight,
+    "cached": _cached,
+    "constrained": _constrained,
+    "fixed": _fixed,
+}
+
+
+def apply_layout(fig, layout, key=None):
+    """Apply a layout strategy to a figure.
+
+    Parameters
+    ----------
+    fig:
+        Matplotlib figure class.
+    layout: str or None
+        One of ``settings.AVAILABLE_LAYOUTS``. ``None`` does nothing.
+    key: hashable (optional)
+        Extra key for the ``cached`` strategy, for example the parameters
+        used to create the figure.
+
+    """
+    if layout is None:
+        return
+    try:
+        strategy = _STRATEGIES[layout]
+    except KeyError as err:
+        raise ValueError(
+            f"Invalid layout {layout!r}. "
+            f"Options: {settings.AVAILABLE_LAYOUTS}"
+        ) from err
+    strategy(fig, key)
+
+
+def subplots_key(subplots_kwargs) -> tuple:
+    """Convert the parameters of ``subplots`` into a key for the
+    ``cached`` strategy.
+
+    """
+    return tuple(sorted((k, repr(v)) for k, v in subplots_kwargs.items()))
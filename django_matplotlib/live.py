@@ -0,0 +1,420 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Live plots updated with Server-Sent Events.
+
+The page with a live plot is rendered once, with the data available up to
+a *cursor* (the greatest value of an increasing field, like the primary
+key, or the number of rows of an in memory dataset). Then the browser
+opens an ``EventSource`` to the same view, and the view pushes only the
+rows after the cursor of the stream::
+
+    id: 1042
+    event: rows
+    data: {"cursor": "1042", "columns": {"x": [...], "y": [...]}}
+
+Every event is ``O(new rows)``: the querysets are filtered with
+``cursor_field > cursor`` (use an indexed field). The cursor of every
+stream travels in the ``id`` of the events, so when the connection is
+closed the browser reconnects with the ``Last-Event-ID`` header and the
+stream continues where it was. The streams are closed after ``duration``
+seconds, so a WSGI worker is never blocked forever by a client.
+
+In the browser the rows are appended to the lines of the mpld3 figure of
+the plot, and a ``djmpl:rows`` event with the rows is dispatched on the
+``div.djmpl-live`` element, so any client-side plot can be updated.
+
+See ``django_matplotlib.views.LivePlotMixin``.
+
+"""
+
+__all__ = [
+    "check_cursor",
+    "current_cursor",
+    "until_cursor",
+    "read_rows",
+    "format_event",
+    "stream_events",
+    "astream_events",
+    "LivePlot",
+]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import asyncio
+import datetime as dt
+import html
+import json
+import time
+
+import attr
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import core, settings
+from .aggregate import _is_queryset
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Comment sent when there is no new data, so the proxies keep the
+#: connection open and the closed connections are detected.
+KEEPALIVE = ": keepalive\n\n"
+
+#: Javascript of the client. Appends the rows to the lines of the mpld3
+#: figure and dispatches the ``djmpl:rows`` event.
+LIVE_JS = """
+(function(root){
+  var columns = JSON.parse(root.dataset.columns);
+  var windowSize = +root.dataset.window, url = root.dataset.url;
+  window.djmplLive = window.djmplLive || {};
+  var source = window.djmplLive[url];
+  if (!source){
+    source = window.djmplLive[url] = new EventSource(url);
+  }
+  function mpld3Lines(){
+    if (!window.mpld3) return [];
+    var lines = [];
+    mpld3.figures.forEach(function(fig){
+      if (!root.querySelector("[id='" + fig.figid + "']")) return;
+      fig.axes.forEach(function(ax){
+        ax.elements.forEach(function(el){
+          if (el instanceof mpld3.Line) lines.push(el);
+        });
+      });
+    });
+    return lines;
+  }
+  function append(data){
+    var xs = data.columns[columns[0]], starts = new Map();
+    var lines = mpld3Lines();
+    lines.forEach(function(line, idx){
+      var ys = data.columns[columns[Math.min(idx + 1, columns.length - 1)]];
+      var table = line.data, i;
+      if (!starts.has(table)){
+        starts.set(table, table.length);
+        for (i = 0; i < xs.length; i++)
+          table.push(table.length ? table[0].slice() : []);
+      }
+      var start = starts.get(table);
+      for (i = 0; i < xs.length; i++){
+        table[start + i][line.props.xindex] = xs[i];
+        table[start + i][line.props.yindex] = ys[i];
+      }
+    });
+    starts.forEach(function(start, table){
+      if (windowSize && table.length > windowSize)
+        table.splice(0, table.length - windowSize);
+    });
+    lines.forEach(function(line){
+      line.path.attr("d", line.datafunc(line.data, line.pathcodes));
+    });
+  }
+  source.addEventListener("rows", function(e){
+    var data = JSON.parse(e.data);
+    append(data);
+    root.dispatchEvent(new CustomEvent("djmpl:rows", {detail: data}));
+  });
+})(document.currentScript.previousElementSibling);
+"""
+
+
+# =============================================================================
+# CURSORS
+# =============================================================================
+
+
+def _cursor_str(value) -> str:
+    if isinstance(value, (dt.date, dt.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _length(data, columns) -> int:
+    if hasattr(data, "chunks") and hasattr(data, "values_list"):
+        return data.count()
+    return len(data[columns[0]])
+
+
+def check_cursor(data, cursor, cursor_field="pk") -> str:
+    """Validate a cursor received from the client and return it.
+
+    For querysets the cursor must be empty or a valid value of
+    ``cursor_field``, otherwise a non negative number of rows. Raises
+    ``ValueError`` if the cursor is invalid.
+
+    """
+    if _is_queryset(data):
+        if cursor == "":
+            return cursor
+        opts = data.model._meta
+        try:
+            field = (
+                opts.pk
+                if cursor_field == "pk"
+                else opts.get_field(cursor_field)
+            )
+        except FieldDoesNotExist:
+            # a lookup through relations, validated by the database
+            return cursor
+        try:
+            field.to_python(cursor)
+        except ValidationError as err:
+            raise ValueError(f"Invalid cursor {cursor!r}") from err
+        return cursor
+    if cursor != "" and not (cursor.isascii() and cursor.isdigit()):
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    return cursor
+
+
+def current_cursor(data, columns, cursor_field="pk") -> str:
+    """Return the cursor of the last row of ``data``.
+
+    For querysets is the greatest value of ``cursor_field`` (an empty
+    string if there are no rows), otherwise the number of rows.
+
+    """
+    if _is_queryset(data):
+        value = (
+            data.order_by(f"-{cursor_field}")
+            .values_list(cursor_field, flat=True)
+            .first()
+        )
+        return "" if value is None else _cursor_str(value)
+    return str(_length(data, columns))
+
+
+def until_cursor(data, cursor, cursor_field="pk"):
+    """Restrict ``data`` to the rows up to ``cursor`` (included), so the
+    rows added after the cursor was computed are only sent by the stream.
+
+    Only the querysets and data sources are restricted, the other objects
+    are returned unchanged.
+
+    """
+    if _is_queryset(data):
+        if cursor == "":
+            return data.none()
+        return data.filter(**{f"{cursor_field}__lte": cursor})
+    if hasattr(data, "chunks") and hasattr(data, "values_list"):
+        return data[: int(cursor)]
+    return data
+
+
+def read_rows(data, columns, cursor, cursor_field="pk", limit=1000) -> tuple:
+    """Read at most ``limit`` rows of ``data`` after ``cursor``.
+
+    Parameters
+    ----------
+    data:
+        A django queryset, a ``datasources.DataSource`` or a mapping of
+        columns (dict, structured array, DataFrame).
+    columns: sequence
+        Names of the columns to read.
+    cursor: str
+        Cursor of the last row already sent. An empty string (or ``None``)
+        means from the first row.
+    cursor_field: str
+        The increasing field used as cursor in the querysets.
+    limit: int
+        Maximum number of rows.
+
+    Returns
+    -------
+    A tuple with a dict of lists (one list per column) and the new cursor.
+
+    """
+    columns = tuple(columns)
+
+    if _is_queryset(data):
+        queryset = data
+        if cursor:
+            queryset = queryset.filter(**{f"{cursor_field}__gt": cursor})
+        rows = list(
+            queryset.order_by(cursor_field).values_list(
+                cursor_field, *columns
+            )[:limit]
+        )
+        if not rows:
+            return {col: [] for col in columns}, cursor
+        values = list(zip(*rows))
+        result = {col: list(vals) for col, vals in zip(columns, values[1:])}
+        return result, _cursor_str(rows[-1][0])
+
+    start = int(cursor or 0)
+    stop = min(start + limit, _length(data, columns))
+    if stop <= start:
+        return {col: [] for col in columns}, cursor
+    if hasattr(data, "chunks") and hasattr(data, "values_list"):
+        chunk = data.values_list(*columns)[start:stop].read()
+    else:
+        chunk = {col: data[col][start:stop] for col in columns}
+    result = {
+        col: (
+            chunk[col].tolist()
+            if hasattr(chunk[col], "tolist")
+            else list(chunk[col])
+        )
+        for col in columns
+    }
+    return result, str(stop)
+
+
+# =============================================================================
+# SERVER-SENT EVENTS
+# =============================================================================
+
+
+def format_event(data, event_id=None, event=None, retry=None) -> str:
+    """Format ``data`` as a Server-Sent Event, encoded as JSON."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    if retry is not None:
+        lines.append(f"retry: {int(retry)}")
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":"))
+    lines.append(f"data: {payload}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _rows_event(rows, cursor) -> str:
+    return format_event(
+        {"cursor": cursor, "columns": rows}, event_id=cursor, event="rows"
+    )
+
+
+def stream_events(
+    read,
+    cursor,
+    interval=1.0,
+    duration=60.0,
+    retry=None,
+    sleep=time.sleep,
+    clock=time.monotonic,
+):
+    """Generator of the events of a stream.
+
+    ``read(cursor)`` must return the new rows and the new cursor (like
+    ``read_rows``). When there are new rows they are sent immediately and
+    the source is read again, otherwise a keepalive comment is sent and the
+    generator sleeps ``interval`` seconds. The generator ends after
+    ``duration`` seconds. ``retry`` is the reconnection time of the client
+    in milliseconds.
+
+    """
+    deadline = clock() + duration
+    if retry is not None:
+        yield f"retry: {int(retry)}\n\n"
+    while clock() < deadline:
+        rows, new_cursor = read(cursor)
+        if new_cursor != cursor:
+            cursor = new_cursor
+            yield _rows_event(rows, cursor)
+            continue
+        yield KEEPALIVE
+        sleep(interval)
+
+
+async def astream_events(
+    read, cursor, interval=1.0, duration=60.0, retry=None
+):
+    """Asynchronous version of ``stream_events`` for ASGI servers.
+
+    ``read`` is a synchronous function (like ``read_rows``) executed in a
+    thread with ``asgiref.sync.sync_to_async``, so it can query the
+    database, and the event loop is never blocked while the stream waits
+    for new data.
+
+    """
+    from asgiref.sync import sync_to_async
+
+    aread = sync_to_async(read)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+    if retry is not None:
+        yield f"retry: {int(retry)}\n\n"
+    while loop.time() < deadline:
+        rows, new_cursor = await aread(cursor)
+        if new_cursor != cursor:
+            cursor = new_cursor
+            yield _rows_event(rows, cursor)
+            continue
+        yield KEEPALIVE
+        await asyncio.sleep(interval)
+
+
+# =============================================================================
+# PLOT
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class LivePlot:
+    """A plot updated with the events of a stream.
+
+    Has the same API than ``DjangoMatplotlibWrapper`` to write the plot
+    into a template. The html of the wrapped ``plot`` is written inside a
+    ``div.djmpl-live`` with the client of the stream.
+
+    Parameters
+    ----------
+    plot:
+        The rendered plot (usually a ``DjangoMatplotlibWrapper``).
+    url: str
+        Url of the stream.
+    columns: tuple
+        Names of the columns of the rows. The first column is the x of the
+        lines of the mpld3 figures and the next ones the y of every line.
+    window: int (optional)
+        Maximum number of rows kept by the client in every line.
+
+    """
+
+    plot = attr.ib()
+    url: str = attr.ib()
+    columns: tuple = attr.ib(converter=tuple)
+    window: int = attr.ib(default=None)
+
+    @property
+    def plot_format(self) -> str:
+        return self.plot.plot_format
+
+    @property
+    def template_engine(self) -> str:
+        return core.template_by_alias(self.plot.template_engine)
+
+    def safe(self, img) -> object:
+        formater = settings.TEMPLATES_FORMATERS[self.template_engine]
+        return formater(img)
+
+    def html_str(self) -> str:
+        columns = html.escape(json.dumps(list(self.columns)))
+        return (
+            f"<div class='djmpl djmpl-live' data-url='{html.escape(self.url)}'"
+            f" data-columns='{columns}' data-window='{self.window or 0}'>"
+            f"{self.plot.html_str()}</div><script>{LIVE_JS}</script>"
+        )
+
+    def to_html(self) -> str:
+        return self.safe(self.html_str())
+
+    def content_hash(self) -> str:
+        return core.content_hash(self.html_str())
+
+    def figaxes(self) -> tuple:
+        return self.plot.figaxes()
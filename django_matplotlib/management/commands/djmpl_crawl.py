@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Command to warm-up the caches of the plot views.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import crawl, export
+
+
+# =============================================================================
+# COMMAND
+# =============================================================================
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every plot view of the project with the parameter sets of "
+        "settings.DJMPL_CRAWL to fill the caches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-c", "--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--rate", type=float, help="Maximum requests by second"
+        )
+        parser.add_argument("--host")
+        parser.add_argument("--urlconf")
+        parser.add_argument(
+            "--params",
+            help="JSON file with the parameter sets (instead of the settings)",
+        )
+
+    def handle(self, *args, **options):
+        param_sets = None
+        if options["params"]:
+            with open(options["params"]) as fp:
+                param_sets = json.load(fp)
+
+        plot_urls = export.discover_plot_urls(options["urlconf"])
+        requests, skipped = crawl.build_requests(plot_urls, param_sets)
+        for plot_url in skipped:
+            self.stderr.write(
+                f"Skipping {plot_url.view_name}: the url needs the "
+                f"parameters {list(plot_url.params)}"
+            )
+        if not requests:
+            raise CommandError("No plot views to request")
+
+        def report(result):
+            if result["error"]:
+                self.stderr.write(f"error {result['url']}: {result['error']}")
+
+        results = crawl.crawl(
+            requests,
+            concurrency=options["concurrency"],
+            rate=options["rate"],
+            host=options["host"],
+            callback=report,
+        )
+
+        summary = crawl.summarize(results)
+        width = max(len(row["view"]) for row in summary)
+        self.stdout.write(
+            f"{'view':<{width}} {'reqs':>5} {'errs':>5} {'min ms':>8} "
+            f"{'median ms':>10} {'max ms':>8} {'total s':>8}"
+        )
+        for row in summary:
+            self.stdout.write(
+                f"{row['view']:<{width}} {row['requests']:>5} "
+                f"{row['errors']:>5} {row['min'] * 1000:>8.1f} "
+                f"{row['median'] * 1000:>10.1f} {row['max'] * 1000:>8.1f} "
+                f"{row['total']:>8.2f}"
+            )
+
+        errors = sum(row["errors"] for row in summary)
+        self.stdout.write(f"{len(results)} requests, {errors} errors")
+        if errors:
+            raise CommandError(f"{errors} requests failed")
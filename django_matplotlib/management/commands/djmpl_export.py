@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Command to export the plot pages as static files.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import export
+
+
+# =============================================================================
+# COMMAND
+# =============================================================================
+
+
+class Command(BaseCommand):
+    help = (
+        "Render plot pages into a static directory, with the images as "
+        "content-hashed files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="*", help="Paths of the pages")
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Export all the plot views without url parameters",
+        )
+        parser.add_argument("-o", "--output", required=True)
+        parser.add_argument(
+            "-j", "--jobs", type=int, default=os.cpu_count() or 1
+        )
+        parser.add_argument("--host")
+        parser.add_argument("--base-url")
+        parser.add_argument("--urlconf")
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Write also the unchanged pages",
+        )
+        parser.add_argument(
+            "--no-deterministic",
+            dest="deterministic",
+            action="store_false",
+        )
+
+    def handle(self, *args, **options):
+        urls = list(options["urls"])
+        if options["all"]:
+            for plot_url in export.discover_plot_urls(options["urlconf"]):
+                if plot_url.params:
+                    self.stderr.write(
+                        f"Skipping {plot_url.view_name}: the url needs the "
+                        f"parameters {list(plot_url.params)}"
+                    )
+                else:
+                    urls.append(plot_url.url())
+        if not urls:
+            raise CommandError("No urls to export. Use --all or give urls")
+
+        def report(result):
+            if result["status"] == "error":
+                line = f"error      {result['url']}: {result['error']}"
+                self.stderr.write(line)
+            else:
+                self.stdout.write(
+                    f"{result['status']:<10} {result['url']} -> "
+                    f"{result['path']} ({len(result['images'])} images, "
+                    f"{result['seconds']:.2f}s)"
+                )
+
+        results = export.export(
+            dict.fromkeys(urls),
+            options["output"],
+            jobs=min(options["jobs"], len(urls)),
+            host=options["host"],
+            base_url=options["base_url"],
+            deterministic=options["deterministic"],
+            force=options["force"],
+            callback=report,
+        )
+
+        counts = {"written": 0, "unchanged": 0, "error": 0}
+        for result in results:
+            counts[result["status"]] += 1
+        self.stdout.write(
+            "{written} written, {unchanged} unchanged, {error} errors".format(
+                **counts
+            )
+        )
+        if counts["error"]:
+            raise CommandError(f"{counts['error']} pages failed")
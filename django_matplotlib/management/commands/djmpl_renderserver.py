@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Command to start the djmpl render server.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+from django.core.management.base import BaseCommand
+
+from ...renderserver import RenderServer
+
+
+# =============================================================================
+# COMMAND
+# =============================================================================
+
+
+class Command(BaseCommand):
+    help = "Start the djmpl render server over a Unix socket."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", dest="socket_path")
+        parser.add_argument("--workers", type=int)
+        parser.add_argument("--max-jobs", type=int)
+        parser.add_argument("--max-rss", type=int, help="In bytes")
+        parser.add_argument("--timeout", type=float)
+        parser.add_argument(
+            "--allow",
+            dest="allowed",
+            action="append",
+            help="'module:qualname' of an allowed draw callable or class",
+        )
+
+    def handle(self, *args, **options):
+        keys = (
+            "socket_path",
+            "workers",
+            "max_jobs",
+            "max_rss",
+            "allowed",
+            "timeout",
+        )
+        params = {k: options[k] for k in keys if options[k] is not None}
+
+        server = RenderServer.from_settings(**params)
+        server.start()
+        self.stdout.write(
+            f"djmpl render server listening on {server.socket_path} "
+            f"with {server.workers} workers"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
@@ -0,0 +1,619 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""In-process metrics of the rendered plots in the Prometheus format.
+
+The ``REGISTRY`` has counters, gauges and histograms labelled by view,
+plot method and format, fed by ``DjangoMatplotlibWrapper``, the views and
+the caches of django-matplotlib:
+
+- ``djmpl_plots_rendered_total``: number of encoded plots.
+- ``djmpl_render_seconds``: time to draw a plot in the views.
+- ``djmpl_encode_seconds``: time to encode a plot (png, svg or mpld3).
+- ``djmpl_encoded_bytes``: size of the encoded plots.
+- ``djmpl_open_figures``: open pyplot figures.
+- ``djmpl_cache_requests_total``: hits and misses of the caches.
+
+The metrics are exposed by ``django_matplotlib.views.MetricsView``,
+included with ``django_matplotlib.metrics_urls`` and restricted to the
+clients in ``settings.DJMPL_METRICS_ALLOWED_IPS``.
+
+With preforked workers (gunicorn, uwsgi) every process has its own
+registry. If ``settings.DJMPL_METRICS_DIR`` is defined, every process
+writes its values to a file in that directory (at most once every
+``FLUSH_INTERVAL`` seconds and at exit) and the metrics view aggregates
+the files of all the processes. The counters and histograms of the
+finished processes are kept, so they never decrease, and the gauges of
+the finished processes are discarded. When a process writes its first
+file, the files of the finished processes (and a file left with the same
+pid by a finished process) are merged into ``RETIRED_FILE`` and removed.
+A failed write is logged and never fails a request.
+
+"""
+
+__all__ = ["Counter", "Gauge", "Histogram", "Registry", "REGISTRY"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import atexit
+import bisect
+import contextlib
+import glob
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import attr
+
+from . import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Buckets of the histograms of durations, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+#: Buckets of the histograms of sizes, in bytes (from 1 KiB to 16 MiB).
+SIZE_BUCKETS = tuple(1024 * 4**exp for exp in range(8))
+
+#: Minimum seconds between two writes of the file of a process.
+FLUSH_INTERVAL = 1.0
+
+#: Labels of the metrics of the plots.
+PLOT_LABELS = ("view", "method", "format")
+
+#: File with the counters and histograms of the finished processes.
+RETIRED_FILE = "retired.json"
+
+logger = logging.getLogger("django_matplotlib")
+
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+
+@attr.s
+class Metric:
+    """Base class of the metrics.
+
+    The values are stored by the tuple of the values of the labels.
+
+    """
+
+    kind = None
+
+    name: str = attr.ib()
+    documentation: str = attr.ib()
+    labelnames: tuple = attr.ib(default=(), converter=tuple)
+    registry = attr.ib(default=None, repr=False, eq=False)
+    values: dict = attr.ib(factory=dict, init=False, repr=False, eq=False)
+
+    def key(self, labels) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} requires the labels {self.labelnames}, "
+                f"got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _update(self, labels, func):
+        key = self.key(labels)
+        registry = self.registry
+        if registry is None:
+            func(key)
+            return
+        with registry.lock:
+            registry.check_fork()
+            func(key)
+        registry.maybe_flush()
+
+    def samples(self) -> list:
+        """The ``[labels, value]`` pairs of the metric."""
+        return [[list(key), value] for key, value in self.values.items()]
+
+    def reset(self):
+        self.values.clear()
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+
+        def update(key):
+            self.values[key] = self.values.get(key, 0) + amount
+
+        self._update(labels, update)
+
+
+@attr.s
+class Gauge(Metric):
+    """A value that goes up and down.
+
+    If ``function`` is defined, the gauge has no labels and its value is
+    the result of calling the function when the metrics are collected.
+
+    """
+
+    kind = "gauge"
+
+    function = attr.ib(default=None, repr=False, eq=False)
+
+    def set(self, value, **labels):
+        def update(key):
+            self.values[key] = value
+
+        self._update(labels, update)
+
+    def inc(self, amount=1, **labels):
+        def update(key):
+            self.values[key] = self.values.get(key, 0) + amount
+
+        self._update(labels, update)
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> list:
+        if self.function is not None:
+            return [[[], self.function()]]
+        return super().samples()
+
+
+@attr.s
+class Histogram(Metric):
+    """Distribution of observed values in buckets.
+
+    Every value is a list with the (non cumulative) count of every bucket,
+    the count of the values greater than the last bucket, the sum and the
+    count of the observed values.
+
+    """
+
+    kind = "histogram"
+
+    buckets: tuple = attr.ib(default=LATENCY_BUCKETS, converter=tuple)
+
+    def observe(self, value, **labels):
+        idx = bisect.bisect_left(self.buckets, value)
+
+        def update(key):
+            data = self.values.get(key)
+            if data is None:
+                data = self.values[key] = [0] * (len(self.buckets) + 3)
+            data[idx] += 1
+            data[-2] += value
+            data[-1] += 1
+
+        self._update(labels, update)
+
+
+# =============================================================================
+# REGISTRY
+# =============================================================================
+
+
+@attr.s
+class Registry:
+    """A collection of metrics.
+
+    Parameters
+    ----------
+    directory: str (optional)
+        Directory shared by all the processes. By default
+        ``settings.DJMPL_METRICS_DIR``.
+
+    """
+
+    directory: str = attr.ib(default=None)
+    metrics: dict = attr.ib(factory=dict, init=False, repr=False)
+    lock = attr.ib(factory=threading.RLock, init=False, repr=False)
+    _pid: int = attr.ib(factory=os.getpid, init=False, repr=False)
+    _last_flush: float = attr.ib(default=0.0, init=False, repr=False)
+    _retired_pid: int = attr.ib(default=None, init=False, repr=False)
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Duplicated metric {metric.name}")
+        metric.registry = self
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), function=None):
+        return self.register(
+            Gauge(name, documentation, labelnames, function=function)
+        )
+
+    def histogram(
+        self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(
+            Histogram(name, documentation, labelnames, buckets=buckets)
+        )
+
+    def reset(self):
+        """Clear the values of all the metrics."""
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.reset()
+
+    def check_fork(self):
+        """Reset the values inherited from the parent process after a
+        fork, so they are not counted twice.
+
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._last_flush = 0.0
+            for metric in self.metrics.values():
+                metric.reset()
+
+    # COLLECT =================================================================
+
+    def snapshot(self) -> dict:
+        """Return the values of all the metrics as a JSON serializable
+        dict.
+
+        """
+        with self.lock:
+            self.check_fork()
+            return {
+                name: {
+                    "type": metric.kind,
+                    "help": metric.documentation,
+                    "labelnames": list(metric.labelnames),
+                    "buckets": list(getattr(metric, "buckets", [])),
+                    "samples": metric.samples(),
+                }
+                for name, metric in self.metrics.items()
+            }
+
+    def get_directory(self):
+        return self.directory or settings.DJMPL_METRICS_DIR
+
+    def retire(self, directory):
+        """Merge the files of the finished processes into ``RETIRED_FILE``
+        and remove them.
+
+        The file of the current pid is also retired: it was written by a
+        finished process with the same pid, because this process did not
+        write yet.
+
+        """
+        with _retired_lock(directory, exclusive=True):
+            retired_path = os.path.join(directory, RETIRED_FILE)
+            snapshots, paths = [], []
+            for pid, path in _pid_files(directory):
+                if pid != os.getpid() and pid_alive(pid):
+                    continue
+                paths.append(path)
+                snapshots.append((False, _read_snapshot(path)))
+            if not paths:
+                return
+            snapshots.append((False, _read_snapshot(retired_path)))
+            _write_json(directory, retired_path, merge(snapshots))
+            for path in paths:
+                os.remove(path)
+
+    def flush(self):
+        """Write the snapshot of this process into the shared directory.
+
+        The errors are logged, so a failed write never fails a request.
+
+        """
+        directory = self.get_directory()
+        if not directory:
+            return
+        with self.lock:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                if self._retired_pid != os.getpid():
+                    self.retire(directory)
+                    self._retired_pid = os.getpid()
+                path = os.path.join(directory, f"{os.getpid()}.json")
+                _write_json(directory, path, self.snapshot())
+            except OSError:
+                logger.exception("djmpl metrics flush to %r failed", directory)
+            self._last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        """Flush if the last flush was more than ``FLUSH_INTERVAL`` seconds
+        ago.
+
+        """
+        if (
+            self.get_directory()
+            and time.monotonic() - self._last_flush > FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def collect(self) -> dict:
+        """Return the snapshot of the metrics of all the processes (or only
+        of this process if there is no shared directory).
+
+        """
+        directory = self.get_directory()
+        if not directory:
+            return self.snapshot()
+
+        self.flush()
+        with _retired_lock(directory, exclusive=False):
+            retired_path = os.path.join(directory, RETIRED_FILE)
+            snapshots = [(False, _read_snapshot(retired_path))]
+            for pid, path in _pid_files(directory):
+                snapshots.append((pid_alive(pid), _read_snapshot(path)))
+        return merge(snapshots)
+
+
+# =============================================================================
+# AGGREGATION AND EXPOSITION
+# =============================================================================
+
+
+@contextlib.contextmanager
+def _retired_lock(directory, exclusive):
+    # the files are not retired while other process collects them
+    with open(os.path.join(directory, "retired.lock"), "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def _pid_files(directory):
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name.isdigit():
+            yield int(name), path
+
+
+def _read_snapshot(path) -> dict:
+    try:
+        with open(path) as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(directory, path, data):
+    # a unique temporary file, renamed atomically
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as fp:
+            json.dump(data, fp)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def pid_alive(pid: int) -> bool:
+    """Return True if the process ``pid`` exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _add(left, right):
+    if isinstance(left, list):
+        return [a + b for a, b in zip(left, right)]
+    return left + right
+
+
+def merge(snapshots) -> dict:
+    """Aggregate the ``(alive, snapshot)`` pairs of many processes.
+
+    The values are added. The gauges of the processes that are not alive
+    are discarded.
+
+    """
+    merged = {}
+    for alive, snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            if metric["type"] == "gauge" and not alive:
+                continue
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                target["samples"][key] = (
+                    value if current is None else _add(current, value)
+                )
+    for metric in merged.values():
+        metric["samples"] = [
+            [list(key), value] for key, value in metric["samples"].items()
+        ]
+    return merged
+
+
+def _escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{%s}" % ",".join(f'{n}="{_escape(v)}"' for n, v in pairs)
+
+
+def _number(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def exposition(snapshot: dict) -> str:
+    """Write a snapshot in the Prometheus text format."""
+    lines = []
+    for name, metric in sorted(snapshot.items()):
+        names = metric["labelnames"]
+        lines.append(f"# HELP {name} {_escape(metric['help'])}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for labels, value in sorted(metric["samples"]):
+            if metric["type"] != "histogram":
+                lines.append(
+                    f"{name}{_labels(names, labels)} {_number(value)}"
+                )
+                continue
+            cumulative = 0
+            bounds = list(metric["buckets"]) + [math.inf]
+            for bound, count in zip(bounds, value[:-2]):
+                cumulative += count
+                le = (("le", _number(bound)),)
+                lines.append(
+                    f"{name}_bucket{_labels(names, labels, le)} {cumulative}"
+                )
+            lines.append(
+                f"{name}_sum{_labels(names, labels)} {_number(value[-2])}"
+            )
+            lines.append(f"{name}_count{_labels(names, labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+# =============================================================================
+# DJANGO-MATPLOTLIB METRICS
+# =============================================================================
+
+
+def _open_figures() -> int:
+    # pyplot is not imported only to count zero figures
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    return len(pyplot.get_fignums()) if pyplot is not None else 0
+
+
+def _admission_in_use() -> float:
+    admission = sys.modules.get("django_matplotlib.admission")
+    return admission.in_use() if admission is not None else 0
+
+
+#: The registry of django-matplotlib.
+REGISTRY = Registry()
+
+PLOTS_RENDERED = REGISTRY.counter(
+    "djmpl_plots_rendered_total", "Number of encoded plots.", PLOT_LABELS
+)
+
+RENDER_SECONDS = REGISTRY.histogram(
+    "djmpl_render_seconds", "Seconds to draw a plot.", PLOT_LABELS
+)
+
+ENCODE_SECONDS = REGISTRY.histogram(
+    "djmpl_encode_seconds", "Seconds to encode a plot.", PLOT_LABELS
+)
+
+ENCODED_BYTES = REGISTRY.histogram(
+    "djmpl_encoded_bytes",
+    "Size in bytes of the encoded plots.",
+    PLOT_LABELS,
+    buckets=SIZE_BUCKETS,
+)
+
+OPEN_FIGURES = REGISTRY.gauge(
+    "djmpl_open_figures", "Open pyplot figures.", function=_open_figures
+)
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "djmpl_cache_requests_total",
+    "Requests to the caches of django-matplotlib by result (hit or miss).",
+    ("namespace", "result"),
+)
+
+
+ADMISSION_REQUESTS = REGISTRY.counter(
+    "djmpl_admission_requests_total",
+    "Requests of the plot views by admission result (admitted, degraded, "
+    "stale or shed).",
+    ("result",),
+)
+
+ADMISSION_IN_USE = REGISTRY.gauge(
+    "djmpl_admission_budget_in_use",
+    "Render cost in use in the admission budget.",
+    function=_admission_in_use,
+)
+
+
+def plot_labels(labels: dict, plot_format: str) -> dict:
+    """The labels of the metrics of a plot."""
+    return {
+        "view": labels.get("view", ""),
+        "method": labels.get("method", ""),
+        "format": plot_format,
+    }
+
+
+def observe_render(labels: dict, plot_format: str, seconds: float):
+    """Record the time to draw a plot."""
+    if settings.DJMPL_METRICS:
+        RENDER_SECONDS.observe(seconds, **plot_labels(labels, plot_format))
+
+
+def observe_encode(labels: dict, plot_format: str, seconds: float, size):
+    """Record an encoded plot, the time to encode it and its size."""
+    if settings.DJMPL_METRICS:
+        labels = plot_labels(labels, plot_format)
+        PLOTS_RENDERED.inc(**labels)
+        ENCODE_SECONDS.observe(seconds, **labels)
+        ENCODED_BYTES.observe(size, **labels)
+
+
+def observe_cache(namespace: str, hit: bool):
+    """Record a hit or a miss of a cache."""
+    if settings.DJMPL_METRICS:
+        CACHE_REQUESTS.inc(
+            namespace=namespace, result="hit" if hit else "miss"
+        )
+
+
+def observe_admission(result: str):
+    """Record the admission result of a request."""
+    if settings.DJMPL_METRICS:
+        ADMISSION_REQUESTS.inc(result=result)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        REGISTRY.flush()
+    except OSError:  # pragma: no cover
+        pass
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""URL of the metrics of django-matplotlib.
+
+The metrics expose the names of the views and the load of the server, so
+they are apart from the public endpoints of ``django_matplotlib.urls``.
+Include them in a private path of the project with::
+
+    path("internal/metrics/", include("django_matplotlib.metrics_urls"))
+
+Only the clients in ``settings.DJMPL_METRICS_ALLOWED_IPS`` can read them
+(see ``django_matplotlib.views.MetricsView``).
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+from django.urls import path
+
+from . import views
+
+
+# =============================================================================
+# URLS
+# =============================================================================
+
+app_name = "djmpl-metrics"
+
+urlpatterns = [
+    path("", views.MetricsView.as_view(), name="metrics"),
+]
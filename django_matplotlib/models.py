@@ -20,6 +20,7 @@ __all__ = ["MatplotlibManager"]
 
 from django.db import models
 
+from . import layout as _layout
 from .core import subplots
 
 
@@ -42,14 +43,22 @@ class MatplotlibManager(models.Manager):
         """Draw the plot"""
         raise NotImplementedError("Please implement the draw_plot method")
 
-    def plot_all(self, plot_format="png", tight_layout=True):
+    def plot_all(self, plot_format="png", tight_layout=True, layout=None):
+        """Draw all the plots.
+
+        ``layout`` is the layout strategy of the figures (see
+        ``django_matplotlib.layout``), by default "tight" if
+        ``tight_layout`` is True.
+
+        """
+        if layout is None and tight_layout:
+            layout = "tight"
         draw_methods = self.get_draw_methods()
         plots = []
         for dm in draw_methods:
             plot = self.get_plot(plot_format=plot_format)
             fig, ax = plot.figaxes()
             dm(fig=fig, ax=ax)
-            if tight_layout:
-                fig.tight_layout()
+            _layout.apply_layout(fig, layout)
             plots.append(plot)
         return plots
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Compact encodings of the data embedded in the mpld3 figures.
+
+By default mpld3 embeds the data of the figure as JSON lists of numbers,
+which are big and slow to parse for plots with many points. The
+``typed`` encoding packs every column of the data as a base64 typed
+array (``Float32Array``, ``Float64Array`` or ``Int32Array``) and the
+``typed-delta`` encoding also stores the integer columns as differences
+between consecutive values. A small decoder is embedded in the html
+and rebuilds the data before ``mpld3.draw_figure`` is called.
+
+A float column is packed as ``Float32Array`` only if the error of the
+conversion is negligible compared with the range of the column (so it
+is invisible in the plot), otherwise is packed as ``Float64Array``.
+
+With ``stable_ids=True`` the random ids of the elements assigned by mpld3
+(the process id followed by an uuid4) are replaced by sequential ids and
+the id of the figure is derived from its content, so the same figure
+always produces the same html.
+
+"""
+
+__all__ = ["encode_data", "decode_data", "stabilize_ids", "fig_to_html"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+
+import numpy as np
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Maximum error of a Float32 column relative to the range of its values.
+FLOAT32_RTOL = 1e-6
+
+#: Mark of the encoded arrays inside the figure json.
+TYPED_MARK = "__djmpl_typed__"
+
+_INT32 = np.iinfo(np.int32)
+
+_DTYPES = {"f32": "<f4", "f64": "<f8", "i32": "<i4"}
+
+_UUID_RE = "[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+
+#: Javascript decoder of the typed arrays.
+DECODER_JS = """
+window.djmplDecodeFigure = window.djmplDecodeFigure || function(fig){
+  var TYPES = {f32: Float32Array, f64: Float64Array, i32: Int32Array};
+  function column(c){
+    var bin = atob(c.b), buf = new Uint8Array(bin.length);
+    for (var i = 0; i < bin.length; i++) buf[i] = bin.charCodeAt(i);
+    var arr = new TYPES[c.t](buf.buffer);
+    if (c.d) for (var i = 1; i < arr.length; i++) arr[i] += arr[i - 1];
+    return arr;
+  }
+  for (var key in fig.data){
+    var v = fig.data[key];
+    if (!v || !v.%(mark)s) continue;
+    var cols = v.cols.map(column), rows = new Array(v.n);
+    for (var i = 0; i < v.n; i++){
+      var row = new Array(cols.length);
+      for (var j = 0; j < cols.length; j++) row[j] = cols[j][i];
+      rows[i] = row;
+    }
+    fig.data[key] = rows;
+  }
+  return fig;
+};
+""" % {
+    "mark": TYPED_MARK
+}
+
+
+# =============================================================================
+# ENCODE/DECODE
+# =============================================================================
+
+
+def _b64(arr, dtype):
+    return base64.b64encode(arr.astype(dtype).tobytes()).decode("ascii")
+
+
+def encode_column(col, delta=False) -> dict:
+    """Encode a 1D float array as a typed array description.
+
+    The result is a dict with the type ``t`` (f32, f64 or i32), the
+    ``d`` (delta) flag and the base64 bytes ``b``.
+
+    """
+    finite = col[np.isfinite(col)]
+    is_int = (
+        len(finite) == len(col)
+        and np.all(np.equal(np.mod(col, 1), 0))
+        and (not len(col) or (col.min() >= _INT32.min))
+        and (not len(col) or (col.max() <= _INT32.max))
+    )
+    if is_int:
+        values = col.astype(np.int64)
+        if delta:
+            values = np.diff(values, prepend=0)
+        return {"t": "i32", "d": int(delta), "b": _b64(values, "<i4")}
+
+    span = np.ptp(finite) if len(finite) else 0.0
+    error = np.abs(finite.astype(np.float32) - finite).max(initial=0.0)
+    ctype = "f32" if error <= span * FLOAT32_RTOL else "f64"
+    return {"t": ctype, "d": 0, "b": _b64(col, _DTYPES[ctype])}
+
+
+def decode_column(enc) -> np.ndarray:
+    """Inverse of ``encode_column``, as a float array."""
+    raw = base64.b64decode(enc["b"])
+    values = np.frombuffer(raw, dtype=_DTYPES[enc["t"]])
+    if enc["d"]:
+        values = np.cumsum(values, dtype=np.int64)
+    return values.astype(float)
+
+
+def encode_data(data: dict, delta=False) -> dict:
+    """Encode the ``data`` of a mpld3 figure dict as typed arrays."""
+    encoded = {}
+    for key, rows in data.items():
+        arr = np.asarray(rows, dtype=float)
+        if arr.ndim != 2:
+            encoded[key] = rows
+            continue
+        encoded[key] = {
+            TYPED_MARK: 1,
+            "n": arr.shape[0],
+            "cols": [encode_column(col, delta=delta) for col in arr.T],
+        }
+    return encoded
+
+
+def decode_data(data: dict) -> dict:
+    """Inverse of ``encode_data`` (the python version of the javascript
+    decoder).
+
+    """
+    decoded = {}
+    for key, value in data.items():
+        if isinstance(value, dict) and value.get(TYPED_MARK):
+            cols = [decode_column(c) for c in value["cols"]]
+            value = np.column_stack(cols).reshape(value["n"], len(cols))
+            value = value.tolist()
+        decoded[key] = value
+    return decoded
+
+
+# =============================================================================
+# HTML
+# =============================================================================
+
+
+def export_figure(fig) -> tuple:
+    """Export a figure with the mpld3 renderer.
+
+    Returns the figure dict, the extra css and the extra javascript of
+    the plugins.
+
+    The exporter raises the zorder of the legends on every call, so the
+    original zorders are restored to export the same figure every time.
+
+    """
+    from mpld3.mpld3renderer import MPLD3Renderer
+    from mpld3.mplexporter import Exporter
+
+    zorders = [
+        (artist, artist.get_zorder())
+        for ax in fig.axes
+        if ax.get_legend() is not None
+        for artist in ax.get_legend().findobj()
+    ]
+
+    renderer = MPLD3Renderer()
+    try:
+        Exporter(renderer, close_mpl=False).run(fig)
+    finally:
+        for artist, zorder in zorders:
+            artist.set_zorder(zorder)
+    _, figure_json, extra_css, extra_js = renderer.finished_figures[0]
+    return figure_json, extra_css, extra_js
+
+
+def stabilize_ids(*texts) -> list:
+    """Replace the mpld3 ids of the elements in ``texts`` by sequential
+    ids, numbered in order of appearance.
+
+    The same id gets the same replacement in all the texts.
+
+    """
+    pattern = re.compile(re.escape(str(os.getpid())) + _UUID_RE)
+    mapping = {}
+
+    def replace(match):
+        uid = match.group(0)
+        if uid not in mapping:
+            mapping[uid] = f"djmpl{len(mapping)}"
+        return mapping[uid]
+
+    return [pattern.sub(replace, text) for text in texts]
+
+
+def fig_to_html(fig, encoding="json", figid=None, stable_ids=False) -> str:
+    """Write the html of a mpld3 figure with an encoding of the data.
+
+    Parameters
+    ----------
+    fig:
+        Matplotlib figure class.
+    encoding: str
+        One of ``settings.AVAILABLE_MPLD3_ENCODINGS``: "json", "typed"
+        or "typed-delta".
+    figid: str (optional)
+        The id of the html element of the figure. By default is random
+        (or a hash of the figure if ``stable_ids`` is True).
+    stable_ids: bool (Default: False)
+        If True the ids of the elements are sequential instead of random,
+        so the html is the same for the same figure.
+
+    """
+    from mpld3 import urls
+    from mpld3._display import GENERAL_HTML, NumpyEncoder
+
+    figure_json, extra_css, extra_js = export_figure(fig)
+
+    decoder = ""
+    figure_js = json.dumps(figure_json, cls=NumpyEncoder)
+    if encoding != "json":
+        figure_json = dict(figure_json)
+        figure_json["data"] = encode_data(
+            figure_json["data"], delta=(encoding == "typed-delta")
+        )
+        figure_js = "djmplDecodeFigure({})".format(
+            json.dumps(figure_json, cls=NumpyEncoder)
+        )
+        decoder = f"<script>{DECODER_JS}</script>"
+
+    if stable_ids:
+        figure_js, extra_css, extra_js = stabilize_ids(
+            figure_js, extra_css, extra_js
+        )
+
+    if figid is None and stable_ids:
+        digest = hashlib.sha1(figure_js.encode("utf-8")).hexdigest()  # nosec
+        figid = f"fig_djmpl{digest[:12]}"
+    elif figid is None:
+        figid = "fig_djmpl{}".format(random.randint(0, 10**10))  # nosec
+
+    html = GENERAL_HTML.render(
+        figid=json.dumps(figid),
+        d3_url=urls.D3_URL,
+        mpld3_url=urls.MPLD3_URL,
+        figure_json=figure_js,
+        extra_css=extra_css,
+        extra_js=extra_js,
+        include_libraries=True,
+    )
+    return decoder + html
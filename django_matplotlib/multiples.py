@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Small multiples: many plots drawn as the axes of a single figure.
+
+Every figure has a fixed cost (creation, layout and encoding) that
+dominates the render time of pages with many small charts. In the small
+multiples mode all the plot methods are drawn in the axes of one figure
+with an automatic grid, the figure is encoded once, and every panel is
+shown in the templates by cropping the shared image with CSS.
+
+Only the "png" and "svg" formats are supported.
+
+"""
+
+__all__ = [
+    "grid_shape",
+    "panel_bboxes",
+    "Panel",
+    "PanelSheet",
+    "render_small_multiples",
+]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import base64
+import hashlib
+import math
+import time
+
+import attr
+
+from . import core, layout, metrics, settings
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Default (width, height) in inches of every panel.
+DEFAULT_PANEL_SIZE = (3.2, 2.4)
+
+_MIMETYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class PanelSheet:
+    """The image shared by all the panels.
+
+    Parameters
+    ----------
+    content: bytes
+        The png or svg file.
+    plot_format: str
+        "png" or "svg".
+    width, height: int
+        Size in pixels of the image.
+    css_class: str
+        CSS class of the panels of this image.
+
+    """
+
+    content: bytes = attr.ib(repr=False)
+    plot_format: str = attr.ib(validator=attr.validators.in_(_MIMETYPES))
+    width: int = attr.ib()
+    height: int = attr.ib()
+    css_class: str = attr.ib()
+
+    def style(self) -> str:
+        """The ``<style>`` element with the image."""
+        mimetype = _MIMETYPES[self.plot_format]
+        data = base64.b64encode(self.content).decode("ascii")
+        return (
+            f"<style>.{self.css_class}{{display:inline-block;"
+            f"background-image:url(data:{mimetype};base64,{data});"
+            f"background-size:{self.width}px {self.height}px;"
+            "background-repeat:no-repeat}</style>"
+        )
+
+
+@attr.s(frozen=True)
+class Panel:
+    """One plot of a small multiples figure.
+
+    Has the same API than ``DjangoMatplotlibWrapper`` to write the plot
+    into a template. The html of the first panel includes the ``<style>``
+    with the shared image, so it must be rendered (the order of the panels
+    in the page is not important).
+
+    """
+
+    sheet: PanelSheet = attr.ib(repr=False)
+    index: int = attr.ib()
+    name: str = attr.ib()
+    bbox: tuple = attr.ib(converter=tuple)
+    template_engine = attr.ib(converter=core.template_by_alias)
+    fig = attr.ib(default=None, repr=False, eq=False)
+    axes = attr.ib(default=None, repr=False, eq=False)
+
+    @property
+    def plot_format(self) -> str:
+        return self.sheet.plot_format
+
+    def safe(self, img) -> object:
+        formater = settings.TEMPLATES_FORMATERS[self.template_engine]
+        return formater(img)
+
+    def html_str(self) -> str:
+        x, y, width, height = self.bbox
+        style = self.sheet.style() if self.index == 0 else ""
+        return (
+            f"{style}<div class='djmpl djmpl-panel {self.sheet.css_class}' "
+            f"title='{self.name}' "
+            f"style='width:{width}px;height:{height}px;"
+            f"background-position:{-x}px {-y}px'></div>"
+        )
+
+    def to_html(self) -> str:
+        return self.safe(self.html_str())
+
+    def content_hash(self) -> str:
+        return core.content_hash(self.html_str())
+
+    def figaxes(self) -> tuple:
+        return self.fig, self.axes
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def grid_shape(size: int, ncols: int = None) -> tuple:
+    """Return the (nrows, ncols) of a grid for ``size`` panels.
+
+    By default the grid is as square as possible, with more columns than
+    rows.
+
+    """
+    if size < 1:
+        raise ValueError("The grid needs at least one panel")
+    ncols = min(ncols or math.ceil(math.sqrt(size)), size)
+    return math.ceil(size / ncols), ncols
+
+
+def panel_bboxes(fig, axes, shape) -> list:
+    """Split the figure in one (x, y, width, height) box in pixels for every
+    cell of the grid, from the top-left corner of the figure.
+
+    The boundaries between the cells are in the middle of the space
+    between the axes and their labels, so every box includes the labels of
+    its axes and the boxes of the outer cells extends to the border of the
+    figure. The figure must be already drawn, so the layout is applied.
+
+    """
+    nrows, ncols = shape
+    width, height = fig.bbox.width, fig.bbox.height
+    renderer = fig.canvas.get_renderer()
+    extents = [
+        ax.get_tightbbox(renderer) if ax.get_visible() else None for ax in axes
+    ]
+
+    def edges(starts, ends):
+        middles = [(e + s) / 2 for e, s in zip(ends[:-1], starts[1:])]
+        return [0.0] + middles + [1.0]
+
+    columns = [
+        [e for e in extents[col::ncols] if e is not None]
+        for col in range(ncols)
+    ]
+    col_edges = edges(
+        [min(e.x0 for e in column) / width for column in columns],
+        [max(e.x1 for e in column) / width for column in columns],
+    )
+    # the rows grows to the bottom
+    rows = [
+        [e for e in extents[row * ncols : (row + 1) * ncols] if e is not None]
+        for row in range(nrows)
+    ]
+    row_edges = edges(
+        [1 - max(e.y1 for e in row) / height for row in rows],
+        [1 - min(e.y0 for e in row) / height for row in rows],
+    )
+
+    bboxes = []
+    for idx in range(len(axes)):
+        row, col = divmod(idx, ncols)
+        left = round(col_edges[col] * width)
+        top = round(row_edges[row] * height)
+        right = round(col_edges[col + 1] * width)
+        bottom = round(row_edges[row + 1] * height)
+        bboxes.append((left, top, right - left, bottom - top))
+    return bboxes
+
+
+def render_small_multiples(
+    draw_methods,
+    data,
+    plot_format=settings.DJMPL_FORMAT,
+    template_engine=settings.DJMPL_TEMPLATE_ENGINE,
+    ncols=None,
+    sharex=False,
+    sharey=False,
+    panel_size=None,
+    layout_name="tight",
+    rasterize_threshold=settings.DJMPL_RASTERIZE_THRESHOLD,
+    deterministic=None,
+    subplots_kwargs=None,
+    labels=None,
+    **kwargs,
+) -> list:
+    """Draw all the ``draw_methods`` in one figure and return a ``Panel``
+    for every one.
+
+    Parameters
+    ----------
+    draw_methods: sequence
+        Callables that receive ``data``, ``fig``, ``ax`` and ``kwargs``,
+        like the plot methods of the views.
+    data:
+        The data passed to every draw method.
+    plot_format: str
+        "png" or "svg".
+    ncols: int (optional)
+        Number of columns of the grid. By default the grid is square.
+    sharex, sharey: bool or str
+        Share the axes like ``matplotlib.pyplot.subplots``.
+    panel_size: tuple (optional)
+        (width, height) in inches of every panel. By default the
+        ``figsize`` of ``subplots_kwargs`` or ``DEFAULT_PANEL_SIZE``.
+    layout_name: str
+        Layout strategy of the figure (see ``django_matplotlib.layout``).
+    subplots_kwargs: dict (optional)
+        Extra parameters for ``matplotlib.pyplot.subplots``. The
+        ``figsize`` is used as the size of every panel.
+    labels: dict (optional)
+        The ``view`` and ``method`` labels of the metrics.
+
+    """
+    if plot_format not in _MIMETYPES:
+        raise ValueError(
+            f"Small multiples only support the formats {list(_MIMETYPES)}"
+        )
+
+    subplots_kwargs = dict(subplots_kwargs or {})
+    figsize = subplots_kwargs.pop("figsize", None)
+    panel_size = panel_size or figsize or DEFAULT_PANEL_SIZE
+
+    nrows, ncols = grid_shape(len(draw_methods), ncols)
+    subplots_kwargs = {
+        **subplots_kwargs,
+        "figsize": (ncols * panel_size[0], nrows * panel_size[1]),
+        "nrows": nrows,
+        "ncols": ncols,
+        "sharex": sharex,
+        "sharey": sharey,
+        "squeeze": False,
+    }
+    plot = core.subplots(
+        plot_format=plot_format,
+        template_engine="str",
+        rasterize_threshold=rasterize_threshold,
+        deterministic=deterministic,
+        **subplots_kwargs,
+    )
+    fig, axes = plot.figaxes()
+    axes = list(axes.flat)
+
+    for draw_method, ax in zip(draw_methods, axes):
+        draw_method(data=data, fig=fig, ax=ax, **kwargs)
+    for ax in axes[len(draw_methods) :]:
+        ax.set_visible(False)
+
+    layout.apply_layout(
+        fig, layout_name, key=layout.subplots_key(subplots_kwargs)
+    )
+
+    start = time.perf_counter()
+    content = plot.to_bytes(plot_format, dpi=fig.dpi)
+    metrics.observe_encode(
+        labels or {}, plot_format, time.perf_counter() - start, len(content)
+    )
+    # the constrained layout moves the axes when the figure is drawn
+    bboxes = panel_bboxes(fig, axes, (nrows, ncols))
+    digest = hashlib.sha1(content).hexdigest()  # nosec
+    sheet = PanelSheet(
+        content=content,
+        plot_format=plot_format,
+        width=round(fig.bbox.width),
+        height=round(fig.bbox.height),
+        css_class=f"djmpl-sheet-{digest[:12]}",
+    )
+    return [
+        Panel(
+            sheet=sheet,
+            index=idx,
+            name=getattr(draw_method, "__name__", str(idx)),
+            bbox=bbox,
+            template_engine=template_engine,
+            fig=fig,
+            axes=ax,
+        )
+        for idx, (draw_method, ax, bbox) in enumerate(
+            zip(draw_methods, axes, bboxes)
+        )
+    ]
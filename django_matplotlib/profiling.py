@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Opt-in per-request profiling of the plot views.
+
+When ``settings.DJMPL_PROFILE`` is enabled, a staff user can add the query
+parameter ``?djmpl_profile`` (or the header ``X-Djmpl-Profile``) to a plot
+view to profile the request. Every phase (the data fetch, every draw
+method and the encoding of every plot) is executed inside ``cProfile``
+and ``tracemalloc``; the stats are written to ``DIR`` as ``.prof`` files
+(readable with ``pstats`` or ``snakeviz``) and ``.tracemalloc``
+snapshots (``tracemalloc.Snapshot.load``), and the response has a
+header with the summary of the phases::
+
+    X-Djmpl-Profile: fetch;dur=0.2;mem=0.0, draw:plot_a;dur=81.3;mem=1.2,
+                     encode:plot_a;dur=40.1;mem=3.4
+
+where ``dur`` is in milliseconds and ``mem`` is the peak of the memory
+allocated in the phase in MiB (in Python < 3.9, without
+``tracemalloc.reset_peak``, the memory still allocated at the end of the
+phase). tracemalloc is global to the process, so
+the memory is traced in only one request at a time; the phases of the
+requests profiled at the same time have no ``mem``.
+
+Querysets are lazy, so the time of the queries is usually part of the
+first draw method that iterates over the data.
+
+"""
+
+__all__ = ["Profiler", "profiler_for_request"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import contextlib
+import cProfile
+import os
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+
+import attr
+
+from . import settings
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Default options of the profiler, updated with ``settings.DJMPL_PROFILE``.
+DEFAULT_OPTIONS = {
+    "DIR": os.path.join(tempfile.gettempdir(), "djmpl-profiles"),
+    "PARAM": "djmpl_profile",
+    "HEADER": "X-Djmpl-Profile",
+    "TRACEMALLOC": True,
+    "STAFF_ONLY": True,
+}
+
+_MiB = 1024 * 1024
+
+# held by the profiler that traces the memory
+_TRACE_LOCK = threading.Lock()
+
+
+# =============================================================================
+# PROFILER
+# =============================================================================
+
+
+def _allocated(start_snapshot, snapshot) -> int:
+    """The memory allocated between the two snapshots and not released.
+
+    Used where ``tracemalloc.reset_peak`` is not available (Python < 3.9)
+    and the peak of the phase can not be measured.
+
+    """
+    stats = snapshot.compare_to(start_snapshot, "filename")
+    return sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+
+
+@attr.s(frozen=True)
+class Phase:
+    """The measures of a profiled phase (``memory`` is None if the memory
+    was not traced).
+
+    """
+
+    name: str = attr.ib()
+    duration: float = attr.ib()
+    memory: int = attr.ib()
+    files: tuple = attr.ib(default=())
+
+    def summary(self) -> str:
+        summary = f"{self.name};dur={self.duration * 1000:.1f}"
+        if self.memory is not None:
+            summary += f";mem={self.memory / _MiB:.1f}"
+        return summary
+
+
+@attr.s
+class Profiler:
+    """Profile the phases of a request with cProfile and tracemalloc.
+
+    Parameters
+    ----------
+    directory: str
+        Where the ``.prof`` and ``.tracemalloc`` files are written.
+    prefix: str
+        Prefix of the name of the files of the request.
+    trace_memory: bool
+        If False tracemalloc is not used. Only one profiler traces the
+        memory at a time, call ``stop`` to release it.
+    header: str
+        Name of the response header with the summary.
+
+    """
+
+    directory: str = attr.ib()
+    prefix: str = attr.ib()
+    trace_memory: bool = attr.ib(default=True)
+    header: str = attr.ib(default=DEFAULT_OPTIONS["HEADER"])
+    phases: list = attr.ib(factory=list, init=False)
+    _started_tracemalloc: bool = attr.ib(default=False, init=False)
+    _tracing: bool = attr.ib(default=None, init=False)
+    _lock = attr.ib(factory=threading.Lock, init=False, repr=False)
+
+    def _filename(self, name, ext):
+        slug = re.sub(r"[^\w.-]+", "_", name)
+        idx = len(self.phases)
+        return os.path.join(
+            self.directory, f"{self.prefix}-{idx:02d}-{slug}.{ext}"
+        )
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Profile the code inside the context as the phase ``name``."""
+        tracing, start_snapshot = self._start_tracing(), None
+        if tracing:
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            else:
+                start_snapshot = tracemalloc.take_snapshot()
+            start_memory = tracemalloc.get_traced_memory()[0]
+
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            duration = time.perf_counter() - start
+
+            memory, files = None, []
+            os.makedirs(self.directory, exist_ok=True)
+
+            prof_path = self._filename(name, "prof")
+            profile.dump_stats(prof_path)
+            files.append(prof_path)
+
+            if tracing:
+                if start_snapshot is None:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    memory = max(peak - start_memory, 0)
+                    snapshot = tracemalloc.take_snapshot()
+                else:
+                    snapshot = tracemalloc.take_snapshot()
+                    memory = _allocated(start_snapshot, snapshot)
+                snapshot_path = self._filename(name, "tracemalloc")
+                snapshot.dump(snapshot_path)
+                files.append(snapshot_path)
+
+            self.phases.append(
+                Phase(
+                    name=name,
+                    duration=duration,
+                    memory=memory,
+                    files=tuple(files),
+                )
+            )
+
+    def _start_tracing(self) -> bool:
+        # decided in the first phase: trace only if no other profiler does
+        if self._tracing is None:
+            self._tracing = self.trace_memory and _TRACE_LOCK.acquire(
+                blocking=False
+            )
+            if self._tracing and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+        return self._tracing
+
+    def stop(self):
+        """Stop tracemalloc if was started by this profiler and let other
+        profiler trace the memory. Can be called many times.
+
+        """
+        with self._lock:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+            if self._tracing:
+                self._tracing = False
+                _TRACE_LOCK.release()
+
+    def summary(self) -> str:
+        """The summary of all the phases, for the response header."""
+        return ", ".join(phase.summary() for phase in self.phases)
+
+    @property
+    def files(self) -> list:
+        """All the written files."""
+        return [path for phase in self.phases for path in phase.files]
+
+
+@attr.s(frozen=True)
+class ProfiledPlot:
+    """Proxy of a plot that profiles its encoding (``html_str``)."""
+
+    plot = attr.ib()
+    name: str = attr.ib()
+    profiler: Profiler = attr.ib(repr=False)
+
+    def __getattr__(self, attrname):
+        if attrname == "plot":
+            raise AttributeError(attrname)
+        return getattr(self.plot, attrname)
+
+    def html_str(self) -> str:
+        with self.profiler.phase(f"encode:{self.name}"):
+            return self.plot.html_str()
+
+    def to_html(self) -> str:
+        return self.plot.safe(self.html_str())
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def options_from_settings() -> dict:
+    """Return the options of the profiler or ``None`` if the profiling is
+    disabled.
+
+    """
+    if not settings.DJMPL_PROFILE:
+        return None
+    options = dict(DEFAULT_OPTIONS)
+    if isinstance(settings.DJMPL_PROFILE, dict):
+        options.update(settings.DJMPL_PROFILE)
+    return options
+
+
+def is_requested(request, options) -> bool:
+    """Return True if the request asks for profiling and is allowed."""
+    header = "HTTP_" + options["HEADER"].upper().replace("-", "_")
+    asked = options["PARAM"] in request.GET or header in request.META
+    if not asked:
+        return False
+    if options["STAFF_ONLY"]:
+        user = getattr(request, "user", None)
+        return bool(getattr(user, "is_staff", False))
+    return True
+
+
+def profiler_for_request(request) -> Profiler:
+    """Return a ``Profiler`` if the request must be profiled, otherwise
+    ``None``.
+
+    """
+    options = options_from_settings()
+    if options is None or not is_requested(request, options):
+        return None
+    prefix = "{}-{}-{}".format(
+        time.strftime("%Y%m%d-%H%M%S"),
+        re.sub(r"[^\w]+", "_", request.path).strip("_") or "root",
+        uuid.uuid4().hex[:8],
+    )
+    return Profiler(
+        directory=options["DIR"],
+        prefix=prefix,
+        trace_memory=options["TRACEMALLOC"],
+        header=options["HEADER"],
+    )
+
+
+def annotate_response(response, profiler):
+    """Add the summary header to the response and stop the profiler.
+
+    Must be called after the response is rendered (the plots are encoded
+    when the template is rendered).
+
+    """
+    profiler.stop()
+    response[profiler.header] = profiler.summary()
+    return response
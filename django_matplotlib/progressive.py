@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Progressive "png" plots: a low resolution preview followed by the full
+resolution image.
+
+A big "png" plot inlined as a ``data:`` URI is downloaded with the html of
+the page and delays its first paint. In the progressive mode the figure is
+written twice: a tiny preview (a few hundred bytes at
+``settings.DJMPL_PROGRESSIVE_PREVIEW_DPI``) is inlined as the background of
+the ``<img>``, and the full resolution image is stored in the
+``settings.DJMPL_CACHE`` and linked with ``loading="lazy"``. The browser
+shows the blurry preview immediately and downloads the full image only
+when it scrolls into view, so the plots below the fold cost nothing on the
+first paint.
+
+The images are served by the ``djmpl:image`` url (include
+``django_matplotlib.urls`` in the project). They are named with the hash
+of their content, so they can be cached forever by the browsers. The
+image can be requested by any worker of the project, so the
+``settings.DJMPL_CACHE`` must be shared by all the processes (memcached,
+redis, database or file based): the local memory and dummy caches raise
+``ImproperlyConfigured``. The images are stored for
+``settings.DJMPL_PROGRESSIVE_TIMEOUT`` seconds, which must be longer than
+the pages with the plots are cached.
+
+See ``django_matplotlib.views.MultiPlotMixin.progressive``.
+
+"""
+
+__all__ = [
+    "image_name",
+    "store_image",
+    "get_image",
+    "check_shared_cache",
+    "ProgressivePlot",
+]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import base64
+import hashlib
+import time
+
+import attr
+
+from django.core.exceptions import ImproperlyConfigured
+
+from . import cache, core, metrics, settings
+
+
+# =============================================================================
+# IMAGES
+# =============================================================================
+
+
+#: Cache backends that are not shared by the processes of the project.
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def _image_key(name: str) -> str:
+    return cache.make_key("image", name)
+
+
+def check_shared_cache():
+    """Raise ``ImproperlyConfigured`` if the ``settings.DJMPL_CACHE`` is
+    not shared by the processes of the project.
+
+    """
+    backend = cache.get_cache()
+    path = f"{type(backend).__module__}.{type(backend).__qualname__}"
+    if path in LOCAL_CACHE_BACKENDS:
+        raise ImproperlyConfigured(
+            "The progressive plots require a settings.DJMPL_CACHE shared "
+            f"by all the processes, not a {path!r}"
+        )
+
+
+def image_name(content: bytes) -> str:
+    """The name of an image: the hash of its content."""
+    return hashlib.sha256(content).hexdigest()[:32]
+
+
+def store_image(content: bytes, timeout=None) -> str:
+    """Store a "png" image in the cache and return its name (see
+    ``image_name``).
+
+    """
+    name = image_name(content)
+    timeout = (
+        settings.DJMPL_PROGRESSIVE_TIMEOUT if timeout is None else timeout
+    )
+    cache.get_cache().set(_image_key(name), content, timeout)
+    return name
+
+
+def get_image(name: str):
+    """Return the image stored with ``name`` or ``None``."""
+    content = cache.get_cache().get(_image_key(name))
+    metrics.observe_cache("image", hit=content is not None)
+    return content
+
+
+# =============================================================================
+# PLOT
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class ProgressivePlot:
+    """A "png" plot shown as a low resolution preview until the full
+    resolution image is loaded.
+
+    Has the same API than ``DjangoMatplotlibWrapper`` to write the plot
+    into a template. The figure is encoded when the html is built.
+
+    Parameters
+    ----------
+    plot:
+        The ``DjangoMatplotlibWrapper`` of the drawn figure.
+    preview_dpi: int (optional)
+        Resolution of the preview. By default
+        ``settings.DJMPL_PROGRESSIVE_PREVIEW_DPI``.
+    timeout: int (optional)
+        Seconds the full image is stored in the cache. By default
+        ``settings.DJMPL_PROGRESSIVE_TIMEOUT``.
+
+    """
+
+    plot = attr.ib()
+    preview_dpi: int = attr.ib(default=None)
+    timeout: int = attr.ib(default=None)
+
+    @property
+    def plot_format(self) -> str:
+        return self.plot.plot_format
+
+    @property
+    def template_engine(self) -> str:
+        return core.template_by_alias(self.plot.template_engine)
+
+    def safe(self, img) -> object:
+        formater = settings.TEMPLATES_FORMATERS[self.template_engine]
+        return formater(img)
+
+    def image_url(self, name: str) -> str:
+        """The url of the full image ``name``."""
+        from django.urls import reverse
+
+        return reverse("djmpl:image", kwargs={"name": name})
+
+    def _encode(self) -> tuple:
+        preview_dpi = (
+            settings.DJMPL_PROGRESSIVE_PREVIEW_DPI
+            if self.preview_dpi is None
+            else self.preview_dpi
+        )
+        start = time.perf_counter()
+        full = self.plot.to_bytes("png")
+        preview = self.plot.to_bytes("png", dpi=preview_dpi)
+        metrics.observe_encode(
+            self.plot.labels,
+            "png",
+            time.perf_counter() - start,
+            len(full) + len(preview),
+        )
+        return full, preview
+
+    def _html(self, name, preview) -> str:
+        fig = self.plot.fig
+        width, height = fig.get_size_inches() * fig.dpi
+        preview = base64.b64encode(preview).decode("ascii")
+        return (
+            "<div class='djmpl djmpl-png djmpl-progressive'>"
+            f"<img src='{self.image_url(name)}' loading='lazy' "
+            f"decoding='async' width='{round(width)}' "
+            f"height='{round(height)}' style='max-width:100%;height:auto;"
+            f"background-image:url(data:image/png;base64,{preview});"
+            "background-size:100% 100%'></div>"
+        )
+
+    def html_str(self) -> str:
+        check_shared_cache()
+        full, preview = self._encode()
+        return self._html(store_image(full, self.timeout), preview)
+
+    def to_html(self) -> str:
+        return self.safe(self.html_str())
+
+    def content_hash(self) -> str:
+        # the html of html_str, without storing the image
+        full, preview = self._encode()
+        return core.content_hash(self._html(image_name(full), preview))
+
+    def figaxes(self) -> tuple:
+        return self.plot.figaxes()
@@ -0,0 +1,635 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Out-of-process rendering of plots.
+
+The render server is a local daemon that keeps a pool of worker processes
+with matplotlib loaded. The clients (the django workers) send render jobs
+through a Unix socket and receive the encoded plot, so the memory of
+matplotlib (font caches, fragmentation) and the crashes of the backends
+stay outside of the django workers.
+
+A job is composed by the reference of a draw callable
+(``"module:qualname"``), JSON serializable data and the options of the
+plot. The server only renders the callables allowed in the ``ALLOWED``
+option: a list of ``"module:qualname"`` references, where the reference
+of a class (``"myapp.views:SalesView"``) allows all its public methods.
+The workers are recycled after a number of jobs or when their resident
+memory is over a limit.
+
+By default the socket is created in a private directory (mode 0700) of
+the user, inside ``$XDG_RUNTIME_DIR`` or the temporary directory.
+
+The server is started with ``python manage.py djmpl_renderserver`` and the
+views use it when ``settings.DJMPL_RENDER_ENGINE`` is ``"server"``.
+
+"""
+
+__all__ = ["RenderClient", "RenderServer", "RemotePlot", "RenderError"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import importlib
+import inspect
+import json
+import multiprocessing as mp
+import os
+import queue
+import resource
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import traceback
+
+import attr
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+import matplotlib.pyplot as plt
+
+import numpy as np
+
+from . import core, layout, settings
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Struct used to encode the size of every message frame.
+FRAME_HEADER = struct.Struct("!I")
+
+#: Default options of the render server. Every key can be overwritten with
+#: the ``settings.DJMPL_RENDER_SERVER`` dictionary.
+DEFAULT_OPTIONS = {
+    # path of the unix socket (None = a private directory of the user)
+    "SOCKET": None,
+    # "module:qualname" references of the draw callables and the classes
+    # (views) that the server renders
+    "ALLOWED": [],
+    # number of worker processes
+    "WORKERS": max(1, (os.cpu_count() or 1) // 2),
+    # recycle the worker after this number of jobs (None = never)
+    "MAX_JOBS": 500,
+    # recycle the worker if the resident memory is over this number of
+    # bytes (None = never)
+    "MAX_RSS": 512 * 1024 * 1024,
+    # seconds to wait for a job
+    "TIMEOUT": 30,
+}
+
+
+# =============================================================================
+# EXCEPTIONS
+# =============================================================================
+
+
+class RenderError(RuntimeError):
+    """The render server fails to render a plot."""
+
+
+# =============================================================================
+# PROTOCOL
+# =============================================================================
+
+
+class PlotDataEncoder(DjangoJSONEncoder):
+    """JSON encoder for the data and options of the jobs.
+
+    Support all the types of ``DjangoJSONEncoder`` plus numpy arrays and
+    scalars, and querysets (serialized as a list of dicts).
+
+    """
+
+    def default(self, o):
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        if isinstance(o, np.generic):
+            return o.item()
+        if hasattr(o, "values") and hasattr(o, "model"):
+            return list(o.values())
+        return super().default(o)
+
+
+def options_from_settings() -> dict:
+    """Return the options of the render server.
+
+    The values of ``DEFAULT_OPTIONS`` are updated with the
+    ``settings.DJMPL_RENDER_SERVER`` dictionary.
+
+    """
+    options = dict(DEFAULT_OPTIONS)
+    options.update(settings.DJMPL_RENDER_SERVER)
+    if options["SOCKET"] is None:
+        options["SOCKET"] = default_socket_path()
+    return options
+
+
+def private_directory(path) -> str:
+    """Create the directory ``path`` with mode 0700 (if it not exists)
+    and check that it is only accessible by the current user.
+
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise RenderError(
+            f"The directory {path!r} of the render server socket must be "
+            "owned by the current user and only accessible by it"
+        )
+    return path
+
+
+def default_socket_path() -> str:
+    """Path of the socket in a private directory of the current user."""
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    directory = private_directory(os.path.join(base, f"djmpl-{os.getuid()}"))
+    return os.path.join(directory, "render.sock")
+
+
+def send_frame(sock, payload: bytes):
+    """Write a size prefixed message into a socket."""
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def recv_frame(sock) -> bytes:
+    """Read a size prefixed message from a socket."""
+
+    def recv_exactly(size):
+        chunks, missing = [], size
+        while missing:
+            chunk = sock.recv(min(missing, 1024 * 1024))
+            if not chunk:
+                raise ConnectionError("Connection closed by the peer")
+            chunks.append(chunk)
+            missing -= len(chunk)
+        return b"".join(chunks)
+
+    (size,) = FRAME_HEADER.unpack(recv_exactly(FRAME_HEADER.size))
+    return recv_exactly(size)
+
+
+def callable_reference(func) -> str:
+    """Return the ``"module:qualname"`` reference of a callable.
+
+    Bound methods are referenced through the class of their instance.
+
+    """
+    owner = getattr(func, "__self__", None)
+    if owner is not None and not inspect.ismodule(owner):
+        cls = owner if inspect.isclass(owner) else type(owner)
+        return f"{cls.__module__}:{cls.__qualname__}.{func.__name__}"
+    return f"{func.__module__}:{func.__qualname__}"
+
+
+def is_allowed(reference: str, allowed) -> bool:
+    """Return True if the ``"module:qualname"`` reference is in the
+    ``allowed`` references or is a public method of an allowed class.
+
+    """
+    module_name, _, qualname = reference.partition(":")
+    parts = qualname.split(".")
+    if not module_name or any(not p or p.startswith("_") for p in parts):
+        return False
+    owner = f"{module_name}:{'.'.join(parts[:-1])}"
+    return reference in allowed or (len(parts) > 1 and owner in allowed)
+
+
+def resolve_reference(reference: str):
+    """Retrieve the callable referenced by ``"module:qualname"``.
+
+    If the callable is defined inside a class, the class is instantiated
+    without arguments and the bound method is returned.
+
+    """
+    module_name, qualname = reference.split(":", 1)
+    obj = importlib.import_module(module_name)
+    *owners, name = qualname.split(".")
+    for owner in owners:
+        obj = getattr(obj, owner)
+    if inspect.isclass(obj):
+        obj = obj()
+    return getattr(obj, name)
+
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+
+def current_rss() -> int:
+    """Resident memory of the current process in bytes."""
+    try:
+        with open("/proc/self/statm") as fp:
+            pages = int(fp.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak (in KiB on linux), the best we have
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def render_job(job: dict) -> bytes:
+    """Draw and encode a plot described by a job."""
+    draw = resolve_reference(job["draw"])
+    options = job.get("options", {})
+
+    plot = core.subplots(
+        plot_format=options.get("plot_format", settings.DJMPL_FORMAT),
+        template_engine="str",
+        rasterize_threshold=options.get("rasterize_threshold"),
+        mpld3_encoding=options.get(
+            "mpld3_encoding", settings.DJMPL_MPLD3_ENCODING
+        ),
+        deterministic=options.get("deterministic"),
+        **options.get("subplots_kwargs", {}),
+    )
+    fig, ax = plot.figaxes()
+    try:
+        draw(data=job.get("data"), fig=fig, ax=ax, **job.get("kwargs", {}))
+        subplots_kwargs = options.get("subplots_kwargs", {})
+        layout.apply_layout(
+            fig,
+            options.get("layout"),
+            key=layout.subplots_key(subplots_kwargs),
+        )
+        return plot.html_str().encode("utf-8")
+    finally:
+        plt.close("all")
+
+
+def worker_main(conn, max_jobs, max_rss):
+    """Main loop of a worker process.
+
+    Receive jobs from ``conn`` until it receives ``None`` or the worker
+    must be recycled. Every response is a tuple
+    ``(ok, payload, retire)``.
+
+    """
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+    jobs = 0
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        try:
+            ok, payload = True, render_job(job)
+        except Exception:
+            ok, payload = False, traceback.format_exc()
+
+        jobs += 1
+        retire = bool(
+            (max_jobs and jobs >= max_jobs)
+            or (max_rss and current_rss() > max_rss)
+        )
+        conn.send((ok, payload, retire))
+        if retire:
+            break
+    conn.close()
+
+
+@attr.s
+class _Worker:
+    process = attr.ib()
+    conn = attr.ib()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def stop(self, timeout=5):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+
+
+class _JobHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        render_server = self.server.render_server
+        try:
+            job = json.loads(recv_frame(self.request))
+        except (ConnectionError, ValueError):
+            return
+
+        try:
+            pid, payload = render_server.submit(job)
+            header = {"ok": True, "worker": pid}
+        except RenderError as err:
+            header, payload = {"ok": False, "error": str(err)}, b""
+
+        send_frame(self.request, json.dumps(header).encode("utf-8"))
+        send_frame(self.request, payload)
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+@attr.s
+class RenderServer:
+    """Pool of matplotlib processes that render the jobs received through
+    a Unix socket.
+
+    Parameters
+    ----------
+    socket_path: str
+        Path of the unix socket.
+    workers: int
+        Number of worker processes.
+    max_jobs: int or None
+        Recycle a worker after this number of jobs.
+    max_rss: int or None
+        Recycle a worker when its resident memory is over this number of
+        bytes.
+    allowed: list of str
+        The ``"module:qualname"`` references of the callables and classes
+        that can be rendered (see ``is_allowed``).
+    timeout: float
+        Seconds to wait for the result of a job. Workers that exceed this
+        time are killed.
+    start_method: str
+        The multiprocessing start method for the workers. By default
+        ``spawn`` so every worker starts with a fresh interpreter.
+
+    """
+
+    socket_path: str = attr.ib()
+    workers: int = attr.ib(default=1)
+    max_jobs: int = attr.ib(default=None)
+    max_rss: int = attr.ib(default=None)
+    allowed: tuple = attr.ib(default=(), converter=tuple)
+    timeout: float = attr.ib(default=DEFAULT_OPTIONS["TIMEOUT"])
+    start_method: str = attr.ib(default="spawn")
+
+    _idle = attr.ib(init=False, factory=queue.Queue, repr=False)
+    _server = attr.ib(init=False, default=None, repr=False)
+    _ctx = attr.ib(init=False, default=None, repr=False)
+
+    @classmethod
+    def from_settings(cls, **kwargs):
+        """Create a server with the ``settings.DJMPL_RENDER_SERVER``
+        options, ``kwargs`` has precedence over the settings.
+
+        """
+        options = options_from_settings()
+        params = {
+            "socket_path": options["SOCKET"],
+            "workers": options["WORKERS"],
+            "max_jobs": options["MAX_JOBS"],
+            "max_rss": options["MAX_RSS"],
+            "allowed": options["ALLOWED"],
+            "timeout": options["TIMEOUT"],
+        }
+        params.update(kwargs)
+        return cls(**params)
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=worker_main,
+            args=(child_conn, self.max_jobs, self.max_rss),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process=process, conn=parent_conn)
+
+    def submit(self, job: dict) -> tuple:
+        """Render a job in the first idle worker.
+
+        Returns a tuple with the pid of the worker and the encoded plot.
+        If the worker dies, exceeds the timeout or the job fails a
+        ``RenderError`` is raised, also if the draw callable is not
+        allowed.
+
+        """
+        reference = job.get("draw")
+        if not isinstance(reference, str) or not is_allowed(
+            reference, self.allowed
+        ):
+            raise RenderError(f"{reference!r} is not allowed in the server")
+
+        worker = self._idle.get()
+        retire, pid = True, worker.pid
+        try:
+            worker.conn.send(job)
+            if not worker.conn.poll(self.timeout):
+                raise RenderError(f"Timeout rendering {job.get('draw')!r}")
+            ok, payload, retire = worker.conn.recv()
+        except (EOFError, OSError) as err:
+            raise RenderError(f"Worker {pid} crashed") from err
+        finally:
+            if retire:
+                worker.stop()
+                worker = self._spawn()
+            self._idle.put(worker)
+
+        if not ok:
+            raise RenderError(payload)
+        return pid, payload
+
+    def start(self):
+        """Start the workers and bind the socket."""
+        self._ctx = mp.get_context(self.start_method)
+        for _ in range(self.workers):
+            self._idle.put(self._spawn())
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        # the socket is created with mode 0600, without a window where
+        # other users can connect
+        umask = os.umask(0o177)
+        try:
+            self._server = _UnixServer(self.socket_path, _JobHandler)
+        finally:
+            os.umask(umask)
+        self._server.render_server = self
+
+    def serve_forever(self):
+        """Start the server (if is not started) and handle the jobs until
+        ``shutdown`` is called.
+
+        """
+        if self._server is None:
+            self.start()
+        self._server.serve_forever()
+
+    def shutdown(self):
+        """Stop the server and all the workers."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        while not self._idle.empty():
+            self._idle.get().stop()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+# =============================================================================
+# CLIENT
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class RemotePlot:
+    """A plot rendered by the render server.
+
+    Has the same API than ``DjangoMatplotlibWrapper`` to write the plot
+    into a template, but the figure and the axes are not available.
+
+    """
+
+    html: str = attr.ib(repr=False)
+    plot_format: str = attr.ib()
+    template_engine = attr.ib(converter=core.template_by_alias)
+    worker: int = attr.ib(default=None)
+
+    def safe(self, img) -> object:
+        formater = settings.TEMPLATES_FORMATERS[self.template_engine]
+        return formater(img)
+
+    def html_str(self) -> str:
+        return self.html
+
+    def to_html(self) -> str:
+        return self.safe(self.html_str())
+
+    def content_hash(self) -> str:
+        return core.content_hash(self.html_str())
+
+    def figaxes(self) -> tuple:
+        raise RenderError("Remote plots has no figure and axes")
+
+
+@attr.s(frozen=True)
+class RenderClient:
+    """Client of the render server.
+
+    Parameters
+    ----------
+    socket_path: str
+        Path of the unix socket of the server.
+    timeout: float
+        Seconds to wait for a response.
+
+    """
+
+    socket_path: str = attr.ib()
+    timeout: float = attr.ib(default=DEFAULT_OPTIONS["TIMEOUT"])
+
+    @classmethod
+    def from_settings(cls):
+        """Create a client with the ``settings.DJMPL_RENDER_SERVER``
+        options.
+
+        """
+        options = options_from_settings()
+        return cls(socket_path=options["SOCKET"], timeout=options["TIMEOUT"])
+
+    def submit(self, job: dict) -> tuple:
+        """Send a job to the server and return the pid of the worker and
+        the encoded plot.
+
+        """
+        payload = json.dumps(job, cls=PlotDataEncoder).encode("utf-8")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+                send_frame(sock, payload)
+                header = json.loads(recv_frame(sock))
+                body = recv_frame(sock)
+            except (OSError, ConnectionError) as err:
+                raise RenderError(str(err)) from err
+        if not header["ok"]:
+            raise RenderError(header["error"])
+        return header["worker"], body
+
+    def render(
+        self,
+        draw,
+        data=None,
+        plot_format: str = settings.DJMPL_FORMAT,
+        template_engine: str = settings.DJMPL_TEMPLATE_ENGINE,
+        rasterize_threshold: int = settings.DJMPL_RASTERIZE_THRESHOLD,
+        mpld3_encoding: str = settings.DJMPL_MPLD3_ENCODING,
+        deterministic: bool = None,
+        layout: str = None,
+        subplots_kwargs: dict = None,
+        **kwargs,
+    ) -> RemotePlot:
+        """Render a plot in the server.
+
+        Parameters
+        ----------
+        draw: callable or str
+            The draw function (or its ``"module:qualname"`` reference).
+            Receives the same parameters than the plot methods of the
+            views (``data``, ``fig``, ``ax`` and ``kwargs``).
+        data:
+            JSON serializable data passed to the draw function.
+        kwargs:
+            JSON serializable extra parameters for the draw function.
+
+        """
+        reference = draw if isinstance(draw, str) else callable_reference(draw)
+        job = {
+            "draw": reference,
+            "data": data,
+            "kwargs": kwargs,
+            "options": {
+                "plot_format": plot_format,
+                "rasterize_threshold": rasterize_threshold,
+                "mpld3_encoding": mpld3_encoding,
+                "deterministic": deterministic,
+                "layout": layout,
+                "subplots_kwargs": subplots_kwargs or {},
+            },
+        }
+        pid, body = self.submit(job)
+        return RemotePlot(
+            html=body.decode("utf-8"),
+            plot_format=plot_format,
+            template_engine=template_engine,
+            worker=pid,
+        )
+
+
+def get_client() -> RenderClient:
+    """Return a client of the render server configured in the settings."""
+    return RenderClient.from_settings()
@@ -20,7 +20,22 @@
 from django.conf import settings
 from django.utils.safestring import mark_safe
 
-import jinja2
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def jinja2_markup(value):
+    """Mark a string as safe for jinja2 templates.
+
+    jinja2 is imported here, so is only loaded if a plot is rendered
+    for jinja2.
+
+    """
+    import jinja2
+
+    return jinja2.Markup(value)
 
 
 # =============================================================================
@@ -40,7 +55,7 @@ DEFAULT_TEMPLATE_ENGINE = settings.TEMPLATES[0]["BACKEND"]
 #: the image into the final HTML.
 TEMPLATES_FORMATERS = {
     "django.template.backends.django.DjangoTemplates": mark_safe,
-    "django.template.backends.jinja2.Jinja2": jinja2.Markup,
+    "django.template.backends.jinja2.Jinja2": jinja2_markup,
     "str": str,
 }
 
@@ -58,3 +73,168 @@ TEMPLATE_ALIAS = {
 DJMPL_TEMPLATE_ENGINE: str = getattr(
     settings, "DJMPL_TEMPLATE_ENGINE", DEFAULT_TEMPLATE_ENGINE
 )
+
+#: Minimum number of points an artist (line or collection) must have to be
+#: rasterized when the plot is written as a vector format (svg). ``None``
+#: disables the adaptive rasterization. This can be changed with a
+#: ``settings.DJMPL_RASTERIZE_THRESHOLD`` variable.
+DJMPL_RASTERIZE_THRESHOLD: int = getattr(
+    settings, "DJMPL_RASTERIZE_THRESHOLD", None
+)
+
+#: Available engines to render the plots of the views. ``local`` draws the
+#: plots inside the django process and ``server`` sends them to the
+#: djmpl render server.
+AVAILABLE_RENDER_ENGINES: list = ["local", "server"]
+
+#: Engine used to render the plots of the views. This can be changed with a
+#: ``settings.DJMPL_RENDER_ENGINE`` variable.
+DJMPL_RENDER_ENGINE: str = getattr(
+    settings, "DJMPL_RENDER_ENGINE", AVAILABLE_RENDER_ENGINES[0]
+)
+
+#: Options of the render server (``SOCKET``, ``ALLOWED``, ``WORKERS``,
+#: ``MAX_JOBS``, ``MAX_RSS`` and ``TIMEOUT``). This can be changed with a
+#: ``settings.DJMPL_RENDER_SERVER`` dictionary.
+DJMPL_RENDER_SERVER: dict = getattr(settings, "DJMPL_RENDER_SERVER", {})
+
+#: Warm-up executed when django starts (``AppConfig.ready``). ``None``
+#: disables the warm-up, otherwise is a dictionary with the keys
+#: ``FONT_CACHE`` (bool), ``BACKENDS`` (list of matplotlib backends to
+#: import) and ``FORMATS`` (list of plot formats to render a throwaway
+#: figure). This can be changed with a ``settings.DJMPL_WARMUP`` variable.
+DJMPL_WARMUP: dict = getattr(settings, "DJMPL_WARMUP", None)
+
+#: Available strategies to layout the axes of the figures: ``tight``
+#: (``fig.tight_layout()`` on every render), ``cached`` (``tight_layout``
+#: computed once and reused on figures with the same geometry and labels),
+#: ``constrained`` (matplotlib constrained layout) and ``fixed`` (the
+#: margins of ``DJMPL_LAYOUT_MARGINS``).
+AVAILABLE_LAYOUTS: list = ["tight", "cached", "constrained", "fixed"]
+
+#: Maximum number of layouts stored by the ``cached`` strategy. This can
+#: be changed with a ``settings.DJMPL_LAYOUT_CACHE_SIZE`` variable.
+DJMPL_LAYOUT_CACHE_SIZE: int = getattr(
+    settings, "DJMPL_LAYOUT_CACHE_SIZE", 1024
+)
+
+#: Margins of the ``fixed`` layout as parameters of
+#: ``Figure.subplots_adjust``. This can be changed with a
+#: ``settings.DJMPL_LAYOUT_MARGINS`` dictionary.
+DJMPL_LAYOUT_MARGINS: dict = getattr(
+    settings,
+    "DJMPL_LAYOUT_MARGINS",
+    {
+        "left": 0.1,
+        "right": 0.95,
+        "bottom": 0.1,
+        "top": 0.92,
+        "wspace": 0.25,
+        "hspace": 0.3,
+    },
+)
+
+#: Alias of the django cache (``settings.CACHES``) where the rendered
+#: plots are stored. This can be changed with a ``settings.DJMPL_CACHE``
+#: variable.
+DJMPL_CACHE: str = getattr(settings, "DJMPL_CACHE", "default")
+
+#: Default seconds that a rendered plot is stored in the cache. This can
+#: be changed with a ``settings.DJMPL_CACHE_TIMEOUT`` variable.
+DJMPL_CACHE_TIMEOUT: int = getattr(settings, "DJMPL_CACHE_TIMEOUT", 300)
+
+#: Available encodings of the data embedded in the mpld3 plots: ``json``
+#: (plain JSON lists, the mpld3 default), ``typed`` (base64 typed arrays)
+#: and ``typed-delta`` (typed arrays with the integer columns stored as
+#: deltas).
+AVAILABLE_MPLD3_ENCODINGS: list = ["json", "typed", "typed-delta"]
+
+#: Default encoding of the data of the mpld3 plots. This can be changed
+#: with a ``settings.DJMPL_MPLD3_ENCODING`` variable.
+DJMPL_MPLD3_ENCODING: str = getattr(
+    settings, "DJMPL_MPLD3_ENCODING", AVAILABLE_MPLD3_ENCODINGS[0]
+)
+
+#: If True the plots are written byte-stable: without timestamps nor
+#: software metadata, with a fixed ``svg.hashsalt`` and stable element ids
+#: in the mpld3 plots. This can be changed with a
+#: ``settings.DJMPL_DETERMINISTIC`` variable.
+DJMPL_DETERMINISTIC: bool = getattr(settings, "DJMPL_DETERMINISTIC", False)
+
+#: Per-request profiling of the plot views. ``None`` disables the
+#: profiling, otherwise is ``True`` or a dictionary with the keys ``DIR``
+#: (where the ``.prof`` and ``.tracemalloc`` files are written), ``PARAM``
+#: (query parameter that activates the profiling), ``HEADER`` (request
+#: header that activates the profiling and response header with the
+#: summary), ``TRACEMALLOC`` (bool) and ``STAFF_ONLY`` (bool). This can be
+#: changed with a ``settings.DJMPL_PROFILE`` variable.
+DJMPL_PROFILE: dict = getattr(settings, "DJMPL_PROFILE", None)
+
+#: If True the rendered plots and the caches are recorded in the metrics
+#: registry (``django_matplotlib.metrics``). This can be changed with a
+#: ``settings.DJMPL_METRICS`` variable.
+DJMPL_METRICS: bool = getattr(settings, "DJMPL_METRICS", True)
+
+#: Directory shared by all the worker processes to aggregate their
+#: metrics. ``None`` exposes only the metrics of the process that serves
+#: the request. This can be changed with a ``settings.DJMPL_METRICS_DIR``
+#: variable.
+DJMPL_METRICS_DIR: str = getattr(settings, "DJMPL_METRICS_DIR", None)
+
+#: Addresses or networks (``"10.0.0.0/8"``) of the clients allowed to read
+#: the metrics view, by default only the local host. This can be changed
+#: with a ``settings.DJMPL_METRICS_ALLOWED_IPS`` variable.
+DJMPL_METRICS_ALLOWED_IPS: tuple = getattr(
+    settings, "DJMPL_METRICS_ALLOWED_IPS", ("127.0.0.1", "::1")
+)
+
+#: Maximum number of backgrounds stored by the incremental (blitting)
+#: render of the "png" plots. Every background is a RGBA image of the size
+#: of the figure. This can be changed with a
+#: ``settings.DJMPL_BLIT_CACHE_SIZE`` variable.
+DJMPL_BLIT_CACHE_SIZE: int = getattr(settings, "DJMPL_BLIT_CACHE_SIZE", 32)
+
+#: Parameter sets of the views requested by the ``djmpl_crawl`` command.
+#: Maps the name of an url pattern (``"namespace:name"``) or the dotted path
+#: of a view class to a list of dicts. The keys of every dict that are
+#: parameters of the url are used to build the path, the rest are sent in
+#: the query string. This can be changed with a ``settings.DJMPL_CRAWL``
+#: dictionary.
+DJMPL_CRAWL: dict = getattr(settings, "DJMPL_CRAWL", {})
+
+#: Resolution (dots per inch) of the inline previews of the progressive
+#: "png" plots. This can be changed with a
+#: ``settings.DJMPL_PROGRESSIVE_PREVIEW_DPI`` variable.
+DJMPL_PROGRESSIVE_PREVIEW_DPI: int = getattr(
+    settings, "DJMPL_PROGRESSIVE_PREVIEW_DPI", 10
+)
+
+#: Seconds that the full images of the progressive "png" plots are stored
+#: in the ``DJMPL_CACHE``. Must be longer than the time the pages with the
+#: plots are cached. This can be changed with a
+#: ``settings.DJMPL_PROGRESSIVE_TIMEOUT`` variable.
+DJMPL_PROGRESSIVE_TIMEOUT: int = getattr(
+    settings, "DJMPL_PROGRESSIVE_TIMEOUT", 24 * 60 * 60
+)
+
+#: Number of threads that render the plots of the async jinja2 templates
+#: (see ``django_matplotlib.jinja2ext``). ``None`` uses the default of
+#: ``concurrent.futures.ThreadPoolExecutor``. This can be changed with a
+#: ``settings.DJMPL_ASYNC_WORKERS`` variable.
+DJMPL_ASYNC_WORKERS: int = getattr(settings, "DJMPL_ASYNC_WORKERS", None)
+
+#: Admission control of the renders of the plot views. ``None`` disables
+#: it, otherwise is ``True`` or a dictionary with the keys ``BUDGET``,
+#: ``QUEUE_TIMEOUT``, ``DEGRADE_AT``, ``FORMAT_WEIGHTS``, ``DEGRADED_DPI``,
+#: ``STALE_TIMEOUT`` and ``RETRY_AFTER`` (see
+#: ``django_matplotlib.admission``). This can be changed with a
+#: ``settings.DJMPL_ADMISSION`` variable.
+DJMPL_ADMISSION: dict = getattr(settings, "DJMPL_ADMISSION", None)
+
+#: Default seconds that an expired named plot (``django_matplotlib.fragments``)
+#: is still served while it is drawn again in background. ``0`` disables
+#: the stale plots. This can be changed with a
+#: ``settings.DJMPL_CACHE_STALE_TIMEOUT`` variable.
+DJMPL_CACHE_STALE_TIMEOUT: int = getattr(
+    settings, "DJMPL_CACHE_STALE_TIMEOUT", 0
+)
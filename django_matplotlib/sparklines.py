@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Batch rendering of sparklines for list pages.
+
+Creating a matplotlib figure for every row of a list is too slow for
+pages with hundreds of rows. This module renders all the series of a
+page at once:
+
+- ``svg_sparklines`` builds a tiny inline SVG polyline for every series
+  directly with NumPy, without matplotlib.
+- ``sprite_sparklines`` draws all the series in a single matplotlib
+  figure (a sprite sheet, one row per series) and every sparkline is a
+  ``<span>`` that shows its row with a CSS background offset.
+
+Example
+-------
+
+.. code-block:: python
+
+    class StockListView(ListView):
+        model = Stock
+
+        def get_context_data(self, **kwargs):
+            context = super().get_context_data(**kwargs)
+            stocks = context["object_list"]
+            series = [stock.last_prices() for stock in stocks]
+            context["rows"] = zip(stocks, sparklines.svg_sparklines(series))
+            return context
+
+"""
+
+__all__ = ["svg_sparklines", "sprite_sparklines", "SpriteSheet"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import base64
+import html
+import io
+import re
+import warnings
+
+import attr
+
+import numpy as np
+
+from . import core, settings
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: The SVG coordinates are integers in units of 1/SVG_SCALE pixels.
+SVG_SCALE = 10
+
+#: Vertical margin of the lines in pixels, so the stroke is not clipped.
+PADDING = 1
+
+#: A CSS identifier usable as the class of the sprite sheet sparklines.
+CSS_CLASS_RE = re.compile(r"-?[_a-zA-Z][_a-zA-Z0-9-]*")
+
+
+# =============================================================================
+# COMMON
+# =============================================================================
+
+
+def _as_matrix(series) -> tuple:
+    """Stack the series in a 2D float array padded with NaN.
+
+    Returns the matrix and the length of every series.
+
+    """
+    series = [np.asarray(s, dtype=float).ravel() for s in series]
+    lengths = np.array([len(s) for s in series], dtype=float)
+    matrix = np.full((len(series), int(lengths.max(initial=0))), np.nan)
+    for idx, values in enumerate(series):
+        matrix[idx, : len(values)] = values
+    return matrix, lengths
+
+
+def _scale_rows(matrix, height, shared) -> np.ndarray:
+    """Scale every row of ``matrix`` to ``[PADDING, height - PADDING]``
+    with the maximum at the top (y grows to the bottom).
+
+    """
+    # the empty series are all NaN rows
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if shared:
+            vmin, vmax = np.nanmin(matrix), np.nanmax(matrix)
+        else:
+            vmin = np.nanmin(matrix, axis=1, keepdims=True)
+            vmax = np.nanmax(matrix, axis=1, keepdims=True)
+        span = np.where(vmax > vmin, vmax - vmin, 1.0)
+        norm = np.where(vmax > vmin, (matrix - vmin) / span, 0.5)
+    return PADDING + (1.0 - norm) * (height - 2 * PADDING)
+
+
+def _check_css_class(css_class):
+    """Raise ValueError if ``css_class`` is not a CSS identifier."""
+    if not isinstance(css_class, str) or not CSS_CLASS_RE.fullmatch(css_class):
+        raise ValueError(f"Invalid CSS class {css_class!r}")
+
+
+def _x_positions(matrix, lengths, width) -> np.ndarray:
+    """The x of every point: every row spans all the ``width``."""
+    steps = width / np.maximum(lengths - 1, 1)
+    return np.arange(matrix.shape[1]) * steps[:, None]
+
+
+# =============================================================================
+# SVG
+# =============================================================================
+
+
+def svg_sparklines(
+    series,
+    width=100,
+    height=20,
+    shared=False,
+    color="currentColor",
+    linewidth=1,
+    template_engine=settings.DJMPL_TEMPLATE_ENGINE,
+) -> list:
+    """Build an inline SVG sparkline for every series.
+
+    The coordinates of all the series are computed in a single vectorized
+    pass and written as integers, so the cost of every sparkline is a few
+    microseconds. The NaN values are skipped.
+
+    Parameters
+    ----------
+    series: sequence
+        Sequence of 1D arrays, not necessarily of the same length.
+    width, height: int
+        Size of every sparkline in pixels.
+    shared: bool (Default: False)
+        If True all the sparklines share the same vertical scale, otherwise
+        every series is scaled to its own range.
+    color: str
+        Color of the lines.
+    linewidth: float
+        Width of the lines in pixels.
+    template_engine: str
+        Engine used to mark as safe the result.
+
+    Returns
+    -------
+    A list with the html of every sparkline, marked safe for
+    ``template_engine``.
+
+    """
+    formater = settings.TEMPLATES_FORMATERS[
+        core.template_by_alias(template_engine)
+    ]
+    matrix, lengths = _as_matrix(series)
+    xs = np.rint(_x_positions(matrix, lengths, width) * SVG_SCALE)
+    ys = np.rint(_scale_rows(matrix, height, shared) * SVG_SCALE)
+
+    # interleave the x and y of every point
+    points = np.empty((matrix.shape[0], matrix.shape[1] * 2))
+    points[:, 0::2] = xs
+    points[:, 1::2] = ys
+
+    head = (
+        f"<svg class='djmpl djmpl-sparkline' width='{width}' "
+        f"height='{height}' viewBox='0 0 {width * SVG_SCALE} "
+        f"{height * SVG_SCALE}'><polyline fill='none' "
+        f"stroke='{html.escape(str(color))}' "
+        f"stroke-width='{linewidth * SVG_SCALE}' points='"
+    )
+    tail = "'/></svg>"
+
+    svgs = []
+    for row, values in zip(points, matrix):
+        valid = np.repeat(~np.isnan(values), 2)
+        coords = " ".join(map(str, row[valid].astype(np.int64).tolist()))
+        svgs.append(formater(head + coords + tail))
+    return svgs
+
+
+# =============================================================================
+# SPRITE SHEET
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class SpriteSheet:
+    """A PNG with one sparkline per row.
+
+    ``style()`` returns a ``<style>`` element with the image, that must be
+    included once in the page, and ``html(index)`` returns the element
+    that shows the sparkline ``index``.
+
+    """
+
+    png: bytes = attr.ib(repr=False)
+    width: int = attr.ib()
+    height: int = attr.ib()
+    size: int = attr.ib()
+    template_engine = attr.ib(converter=core.template_by_alias)
+    css_class: str = attr.ib(default="djmpl-sprite")
+
+    @css_class.validator
+    def _check_css_class(self, attribute, value):
+        _check_css_class(value)
+
+    def __len__(self):
+        return self.size
+
+    def safe(self, html) -> object:
+        formater = settings.TEMPLATES_FORMATERS[self.template_engine]
+        return formater(html)
+
+    def offset(self, index: int) -> tuple:
+        """The (x, y) background position of the sparkline ``index``."""
+        if not 0 <= index < self.size:
+            raise IndexError("Sprite index out of range")
+        return 0, -index * self.height
+
+    def style(self) -> object:
+        """The ``<style>`` element with the image of the sprite sheet."""
+        png = base64.b64encode(self.png).decode("ascii")
+        return self.safe(
+            f"<style>.{self.css_class}{{display:inline-block;"
+            f"width:{self.width}px;height:{self.height}px;"
+            f"background-image:url(data:image/png;base64,{png})}}</style>"
+        )
+
+    def html(self, index: int) -> object:
+        """The element that shows the sparkline ``index``."""
+        x, y = self.offset(index)
+        return self.safe(
+            f"<span class='djmpl djmpl-sparkline {self.css_class}' "
+            f"style='background-position:{x}px {y}px'></span>"
+        )
+
+    def __iter__(self):
+        return (self.html(idx) for idx in range(self.size))
+
+
+def sprite_sparklines(
+    series,
+    width=100,
+    height=20,
+    shared=False,
+    color="C0",
+    linewidth=1,
+    dpi=100,
+    css_class="djmpl-sprite",
+    template_engine=settings.DJMPL_TEMPLATE_ENGINE,
+) -> SpriteSheet:
+    """Draw all the series in a single image, one row per series.
+
+    All the lines are drawn as a single ``LineCollection``, so the cost of
+    matplotlib is paid once for all the page.
+
+    Parameters
+    ----------
+    series: sequence
+        Sequence of 1D arrays, not necessarily of the same length.
+    width, height: int
+        Size of every sparkline in pixels.
+    shared: bool (Default: False)
+        If True all the sparklines share the same vertical scale, otherwise
+        every series is scaled to its own range.
+    color: str
+        Matplotlib color of the lines.
+    linewidth: float
+        Width of the lines in pixels.
+    dpi: int
+        Resolution of the image.
+    css_class: str
+        CSS class of the sparklines. Use different classes for different
+        sprite sheets in the same page. Must be a valid CSS identifier.
+    template_engine: str
+        Engine used to mark as safe the html.
+
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+
+    _check_css_class(css_class)
+
+    matrix, lengths = _as_matrix(series)
+    size = matrix.shape[0]
+
+    xs = _x_positions(matrix, lengths, width)
+    ys = _scale_rows(matrix, height, shared)
+    ys = ys + (np.arange(size) * height)[:, None]
+    segments = [
+        np.column_stack([x[~np.isnan(y)], y[~np.isnan(y)]])
+        for x, y in zip(xs, ys)
+    ]
+
+    total = max(size, 1) * height
+    fig = Figure(figsize=(width / dpi, total / dpi), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+    ax.add_collection(
+        LineCollection(
+            segments, colors=color, linewidths=linewidth * 72.0 / dpi
+        )
+    )
+    ax.set_xlim(0, width)
+    ax.set_ylim(total, 0)
+
+    buf = io.BytesIO()
+    fig.savefig(
+        buf,
+        format="png",
+        dpi=dpi,
+        transparent=True,
+        metadata=core.DETERMINISTIC_PNG_METADATA,
+    )
+    return SpriteSheet(
+        png=buf.getvalue(),
+        width=width,
+        height=height,
+        size=size,
+        template_engine=template_engine,
+        css_class=css_class,
+    )
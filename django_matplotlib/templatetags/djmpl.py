@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Django template tags of django-matplotlib.
+
+Usage:
+
+.. code-block:: html+django
+
+    {% load djmpl %}
+    {% djmpl_plot "sales" 2020 format="svg" %}
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+from django import template
+
+from .. import fragments
+
+
+# =============================================================================
+# TAGS
+# =============================================================================
+
+register = template.Library()
+
+
+@register.simple_tag
+def djmpl_plot(name, *args, **kwargs):
+    """Render the named plot ``name`` with the arguments of the tag.
+
+    The special arguments ``format``, ``version``, ``timeout`` and
+    ``stale_timeout`` are not passed to the plot (see
+    ``django_matplotlib.fragments.render_plot``).
+
+    """
+    return fragments.render_plot(
+        name,
+        *args,
+        plot_format=kwargs.pop("format", None),
+        template_engine="django",
+        version=kwargs.pop("version", None),
+        timeout=kwargs.pop("timeout", None),
+        stale_timeout=kwargs.pop("stale_timeout", None),
+        **kwargs,
+    )
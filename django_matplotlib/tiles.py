@@ -0,0 +1,520 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Zoomable tiled plots for huge datasets.
+
+A tiled plot is shown by a small javascript viewer that requests square
+PNG tiles of the plot as the user pans and zooms, like a web map. At the
+zoom level ``z`` the extent of the data is split in ``2**z x 2**z`` tiles
+and every tile is drawn only with the points inside its window,
+downsampled to keep the minimum and maximum of every pixel column (so
+the peaks are never lost).
+
+The rendered tiles are stored in the django cache configured in
+``settings.DJMPL_CACHE``, so a file based cache works as a LRU disk store
+of tiles and exploring a dataset costs a few small images per pan.
+
+See ``django_matplotlib.views.TiledPlotMixin``.
+
+"""
+
+__all__ = [
+    "Tile",
+    "MinMaxAggregator",
+    "minmax_downsample",
+    "iter_window",
+    "window",
+    "downsample",
+    "render_tile",
+    "get_tile",
+    "TiledPlot",
+]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import html
+import io
+
+import attr
+
+import numpy as np
+
+from . import cache, core, metrics, settings
+from .aggregate import iter_chunks
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Greatest zoom level of a ``Tile`` (``2**z`` tiles by side), so an
+#: arbitrary zoom never builds a huge integer.
+MAX_ZOOM = 32
+
+#: Javascript of the viewer. Pans with the mouse and zooms with the wheel.
+VIEWER_JS = """
+(function(root){
+  var size = +root.dataset.size, maxZoom = +root.dataset.maxZoom;
+  var url = root.dataset.url, z = +root.dataset.zoom, imgs = {};
+  var W = root.clientWidth, H = root.clientHeight;
+  var ox = (size * Math.pow(2, z) - W) / 2;
+  var oy = (size * Math.pow(2, z) - H) / 2;
+  function draw(){
+    var n = Math.pow(2, z), seen = {};
+    var x0 = Math.max(0, Math.floor(ox / size));
+    var x1 = Math.min(n - 1, Math.floor((ox + W - 1) / size));
+    var y0 = Math.max(0, Math.floor(oy / size));
+    var y1 = Math.min(n - 1, Math.floor((oy + H - 1) / size));
+    for (var x = x0; x <= x1; x++) for (var y = y0; y <= y1; y++){
+      var key = z + "/" + x + "/" + y, img = imgs[key];
+      seen[key] = true;
+      if (!img){
+        img = imgs[key] = new Image(size, size);
+        img.draggable = false;
+        img.style.position = "absolute";
+        img.src = url + key;
+        root.appendChild(img);
+      }
+      img.style.left = (x * size - ox) + "px";
+      img.style.top = (y * size - oy) + "px";
+    }
+    for (var key in imgs) if (!seen[key]){
+      root.removeChild(imgs[key]);
+      delete imgs[key];
+    }
+  }
+  root.addEventListener("mousedown", function(e){
+    var sx = e.clientX, sy = e.clientY, bx = ox, by = oy;
+    function move(ev){
+      ox = bx - (ev.clientX - sx); oy = by - (ev.clientY - sy); draw();
+    }
+    function up(){
+      document.removeEventListener("mousemove", move);
+      document.removeEventListener("mouseup", up);
+    }
+    document.addEventListener("mousemove", move);
+    document.addEventListener("mouseup", up);
+    e.preventDefault();
+  });
+  root.addEventListener("wheel", function(e){
+    e.preventDefault();
+    var nz = z + (e.deltaY < 0 ? 1 : -1);
+    if (nz < 0 || nz > maxZoom) return;
+    var r = root.getBoundingClientRect(), f = nz > z ? 2 : 0.5;
+    var cx = e.clientX - r.left, cy = e.clientY - r.top;
+    ox = (ox + cx) * f - cx; oy = (oy + cy) * f - cy; z = nz;
+    draw();
+  }, {passive: false});
+  draw();
+})(document.currentScript.previousElementSibling);
+"""
+
+
+# =============================================================================
+# TILES
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class Tile:
+    """A tile of the zoom level ``z``. ``x`` grows to the right and ``y``
+    grows to the bottom, like in the web maps.
+
+    """
+
+    z: int = attr.ib(converter=int)
+    x: int = attr.ib(converter=int)
+    y: int = attr.ib(converter=int)
+
+    @z.validator
+    def _check_z(self, attribute, value):
+        if not 0 <= value <= MAX_ZOOM:
+            raise ValueError(f"Invalid zoom {value}")
+
+    @x.validator
+    @y.validator
+    def _check_xy(self, attribute, value):
+        if not 0 <= value < 2**self.z:
+            raise ValueError(
+                f"Invalid tile {attribute.name}={value} for zoom {self.z}"
+            )
+
+    @classmethod
+    def parse(cls, value: str, max_zoom: int = MAX_ZOOM) -> "Tile":
+        """Create a tile from a ``"z/x/y"`` string.
+
+        The zoom is checked against ``max_zoom`` before ``x`` and ``y``.
+
+        """
+        try:
+            z, x, y = value.split("/")
+            if not 0 <= int(z) <= max_zoom:
+                raise ValueError(f"Zoom {z} out of range")
+            return cls(z=z, x=x, y=y)
+        except (TypeError, ValueError) as err:
+            raise ValueError(f"Invalid tile {value!r}") from err
+
+    def __str__(self):
+        return f"{self.z}/{self.x}/{self.y}"
+
+    def bounds(self, xlim, ylim) -> tuple:
+        """The ``(xlim, ylim)`` of the tile inside the full extent."""
+        (x0, x1), (y0, y1) = xlim, ylim
+        n = 2**self.z
+        width, height = (x1 - x0) / n, (y1 - y0) / n
+        left = x0 + self.x * width
+        top = y1 - self.y * height
+        return (left, left + width), (top - height, top)
+
+
+# =============================================================================
+# DATA
+# =============================================================================
+
+
+@attr.s
+class MinMaxAggregator:
+    """Incremental reduction of the points to the minimum and the maximum
+    ``y`` of every one of the ``bins`` columns of ``xlim``.
+
+    The memory used is proportional to ``bins`` and not to the number of
+    points. The result has at most ``2 * bins`` points, plus the nearest
+    point at each side of ``xlim`` (to draw the lines that cross the
+    borders), sorted in the order of arrival. If no more than
+    ``2 * bins`` points are added, all of them are returned.
+
+    Parameters
+    ----------
+    xlim: tuple
+        The (min, max) of the window.
+    bins: int
+        Number of columns.
+
+    """
+
+    xlim: tuple = attr.ib(converter=tuple)
+    bins: int = attr.ib(converter=int)
+
+    _seen: int = attr.ib(default=0, init=False, repr=False)
+    _small: list = attr.ib(factory=list, init=False, repr=False)
+    _min = attr.ib(init=False, repr=False)
+    _max = attr.ib(init=False, repr=False)
+    _before = attr.ib(default=None, init=False, repr=False)
+    _after = attr.ib(default=None, init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        # the (index, x, y) of the minimum and the maximum of every column
+        self._min = (
+            np.full(self.bins, -1, dtype=np.int64),
+            np.zeros(self.bins),
+            np.full(self.bins, np.inf),
+        )
+        self._max = (
+            np.full(self.bins, -1, dtype=np.int64),
+            np.zeros(self.bins),
+            np.full(self.bins, -np.inf),
+        )
+
+    def _update_columns(self, acc, cols, idx, x, y, better):
+        current = acc[2][cols]
+        mask = better(y, current)
+        cols = cols[mask]
+        acc[0][cols], acc[1][cols], acc[2][cols] = idx[mask], x[mask], y[mask]
+
+    def _nearest(self, point, idx, x, y, pick, better):
+        if not len(x):
+            return point
+        pos = pick(x)
+        if point is None or better(x[pos], point[1]):
+            return idx[pos], x[pos], y[pos]
+        return point
+
+    def update(self, x, y):
+        """Add a chunk of points. The points with NaN are ignored."""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        idx = np.arange(self._seen, self._seen + len(x), dtype=np.int64)
+        self._seen += len(x)
+
+        if self._small is not None:
+            if self._seen <= 2 * self.bins:
+                self._small.append((x, y))
+            else:
+                self._small = None
+
+        x0, x1 = self.xlim
+        valid = np.isfinite(x) & np.isfinite(y)
+        inside = valid & (x >= x0) & (x <= x1)
+
+        before = valid & (x < x0)
+        self._before = self._nearest(
+            self._before,
+            idx[before],
+            x[before],
+            y[before],
+            np.argmax,
+            np.greater,
+        )
+        after = valid & (x > x1)
+        self._after = self._nearest(
+            self._after, idx[after], x[after], y[after], np.argmin, np.less
+        )
+
+        idx, x, y = idx[inside], x[inside], y[inside]
+        if not len(x):
+            return
+        cols = np.floor((x - x0) * (self.bins / ((x1 - x0) or 1.0)))
+        cols = np.clip(cols, 0, self.bins - 1).astype(np.intp)
+
+        # the first and the last point of every column sorted by y are the
+        # minimum and the maximum of the column in the chunk
+        order = np.lexsort((y, cols))
+        ordered = cols[order]
+        firsts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        lasts = np.r_[firsts[1:] - 1, len(ordered) - 1].astype(np.intp)
+        for acc, pos, better in (
+            (self._min, order[firsts], np.less),
+            (self._max, order[lasts], np.greater),
+        ):
+            self._update_columns(
+                acc, cols[pos], idx[pos], x[pos], y[pos], better
+            )
+
+    def result(self) -> tuple:
+        """Return the ``x`` and ``y`` arrays of the kept points."""
+        if self._small is not None:
+            if not self._small:
+                return np.array([]), np.array([])
+            xs, ys = zip(*self._small)
+            return np.concatenate(xs), np.concatenate(ys)
+
+        points = [self._min, self._max]
+        points.extend(
+            tuple(np.array([value]) for value in point)
+            for point in (self._before, self._after)
+            if point is not None
+        )
+        idx, x, y = (np.concatenate(column) for column in zip(*points))
+        idx, keep = np.unique(idx, return_index=True)
+        keep = keep[idx >= 0]
+        return x[keep], y[keep]
+
+
+def minmax_downsample(x, y, xlim, bins: int) -> tuple:
+    """Reduce the points to the minimum and the maximum ``y`` of every one
+    of the ``bins`` columns of ``xlim`` (see ``MinMaxAggregator``).
+
+    """
+    aggregator = MinMaxAggregator(xlim=xlim, bins=bins)
+    aggregator.update(x, y)
+    return aggregator.result()
+
+
+def iter_window(data, x="x", y="y", xlim=None, is_sorted=True):
+    """Iterate over the points of ``data`` inside ``xlim`` yielding tuples
+    with chunks of the ``x`` and ``y`` arrays.
+
+    If the data is sorted by ``x`` (``is_sorted``) the window is found with
+    a binary search and only the rows inside it are readed (plus one row
+    at each side). Otherwise all the data is scanned in chunks.
+
+    Parameters
+    ----------
+    data:
+        A django queryset, a ``datasources.DataSource`` or a mapping with
+        the columns.
+    x, y: str
+        The names of the columns.
+    xlim: tuple (optional)
+        The (min, max) of the window. ``None`` selects all the data.
+
+    """
+    if hasattr(data, "values_list") and hasattr(data, "aggregate"):
+        if xlim is not None:
+            data = data.filter(
+                **{f"{x}__gte": xlim[0], f"{x}__lte": xlim[1]}
+            ).order_by(x)
+        chunks = iter_chunks(data, (x, y))
+    elif is_sorted and xlim is not None:
+        xs = np.asarray(data[x])
+        start = max(np.searchsorted(xs, xlim[0], side="left") - 1, 0)
+        stop = np.searchsorted(xs, xlim[1], side="right") + 1
+        if hasattr(data, "chunks"):
+            chunks = iter_chunks(data[start:stop], (x, y))
+        else:
+            ys = np.asarray(data[y])
+            chunks = iter_chunks(None, (xs[start:stop], ys[start:stop]))
+    else:
+        chunks = iter_chunks(data, (x, y))
+        if xlim is not None:
+            chunks = _clip_chunks(chunks, xlim)
+
+    for cx, cy in chunks:
+        yield np.asarray(cx, dtype=float), np.asarray(cy, dtype=float)
+
+
+def _clip_chunks(chunks, xlim):
+    for cx, cy in chunks:
+        cx, cy = np.asarray(cx, dtype=float), np.asarray(cy)
+        mask = (cx >= xlim[0]) & (cx <= xlim[1])
+        yield cx[mask], cy[mask]
+
+
+def window(data, x="x", y="y", xlim=None, is_sorted=True) -> tuple:
+    """Return the ``x`` and ``y`` arrays of the points of ``data`` inside
+    ``xlim`` (see ``iter_window``).
+
+    """
+    chunks = list(iter_window(data, x=x, y=y, xlim=xlim, is_sorted=is_sorted))
+    if not chunks:
+        return np.array([]), np.array([])
+    xs, ys = zip(*chunks)
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def downsample(data, xlim, bins, x="x", y="y", is_sorted=True) -> tuple:
+    """Return the ``x`` and ``y`` arrays of the minimum and the maximum of
+    every one of the ``bins`` columns of ``xlim``.
+
+    The chunks of ``iter_window`` are reduced one at a time with a
+    ``MinMaxAggregator``, so the memory does not grow with the number of
+    points in the window. The other parameters are the same of ``window``.
+
+    """
+    aggregator = MinMaxAggregator(xlim=xlim, bins=bins)
+    for cx, cy in iter_window(data, x=x, y=y, xlim=xlim, is_sorted=is_sorted):
+        aggregator.update(cx, cy)
+    return aggregator.result()
+
+
+# =============================================================================
+# RENDER
+# =============================================================================
+
+
+def render_tile(
+    draw, data, tile, xlim, ylim, size=256, dpi=100, **kwargs
+) -> bytes:
+    """Draw a tile and return it as a transparent PNG.
+
+    ``draw`` receives the same parameters than the plot methods of the
+    views (``data``, ``fig``, ``ax`` and ``kwargs``). The axes cover all
+    the figure, has no decorations and its limits are the bounds of the
+    tile inside the full extent ``xlim``, ``ylim``.
+
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(size / dpi, size / dpi), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+
+    draw(data=data, fig=fig, ax=ax, **kwargs)
+
+    txlim, tylim = tile.bounds(xlim, ylim)
+    ax.set_xlim(txlim)
+    ax.set_ylim(tylim)
+
+    buf = io.BytesIO()
+    fig.savefig(
+        buf,
+        format="png",
+        dpi=dpi,
+        transparent=True,
+        metadata=core.DETERMINISTIC_PNG_METADATA,
+    )
+    return buf.getvalue()
+
+
+def get_tile(key_parts, render, timeout=settings.DJMPL_CACHE_TIMEOUT):
+    """Return the PNG of a tile from the cache or render it with
+    ``render()`` and store it.
+
+    ``key_parts`` identifies the tile (the plot, the tile and the extent).
+
+    """
+    tile_cache = cache.get_cache()
+    key = cache.make_key("tile", *key_parts)
+    png = tile_cache.get(key)
+    metrics.observe_cache("tile", hit=png is not None)
+    if png is None:
+        png = render()
+        tile_cache.set(key, png, timeout)
+    return png
+
+
+# =============================================================================
+# VIEWER
+# =============================================================================
+
+
+@attr.s(frozen=True)
+class TiledPlot:
+    """The viewer of a tiled plot.
+
+    Has the same API than ``DjangoMatplotlibWrapper`` to write the plot
+    into a template, but the figure and the axes are not available.
+
+    Parameters
+    ----------
+    url: str
+        Prefix of the url of the tiles. The viewer appends ``"z/x/y"``.
+    size: int
+        Size in pixels of the tiles.
+    max_zoom: int
+        Maximum zoom level.
+    viewer_size: tuple
+        (width, height) in pixels of the viewer.
+    zoom: int
+        Initial zoom level.
+
+    """
+
+    url: str = attr.ib()
+    template_engine = attr.ib(converter=core.template_by_alias)
+    size: int = attr.ib(default=256)
+    max_zoom: int = attr.ib(default=12)
+    viewer_size: tuple = attr.ib(default=(512, 512), converter=tuple)
+    zoom: int = attr.ib(default=1)
+
+    @property
+    def plot_format(self) -> str:
+        return "tiles"
+
+    def safe(self, img) -> object:
+        formater = settings.TEMPLATES_FORMATERS[self.template_engine]
+        return formater(img)
+
+    def html_str(self) -> str:
+        width, height = self.viewer_size
+        style = (
+            f"position:relative;overflow:hidden;cursor:move;"
+            f"width:{width}px;height:{height}px"
+        )
+        return (
+            f"<div class='djmpl djmpl-tiles' style='{style}' "
+            f"data-url='{html.escape(self.url)}' data-size='{self.size}' "
+            f"data-max-zoom='{self.max_zoom}' data-zoom='{self.zoom}'>"
+            f"</div><script>{VIEWER_JS}</script>"
+        )
+
+    def to_html(self) -> str:
+        return self.safe(self.html_str())
+
+    def content_hash(self) -> str:
+        return core.content_hash(self.html_str())
+
+    def figaxes(self) -> tuple:
+        raise AttributeError("Tiled plots has no figure and axes")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""URLs of the django-matplotlib endpoints.
+
+Include them in the project with::
+
+    path("djmpl/", include("django_matplotlib.urls"))
+
+The metrics are in ``django_matplotlib.metrics_urls``, to be included
+apart (see ``django_matplotlib.views.MetricsView``).
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+from django.urls import path
+
+from . import views
+
+
+# =============================================================================
+# URLS
+# =============================================================================
+
+app_name = "djmpl"
+
+urlpatterns = [
+    path("images/<slug:name>.png", views.ImageView.as_view(), name="image"),
+]
@@ -12,18 +12,50 @@
 
 """
 
-__all__ = ["MultiPlotMixin", "PlotMixin", "MultiPlotView", "PlotView"]
+__all__ = [
+    "MultiPlotMixin",
+    "PlotMixin",
+    "TiledPlotMixin",
+    "LivePlotMixin",
+    "MultiPlotView",
+    "PlotView",
+    "TiledPlotView",
+    "LivePlotView",
+    "MetricsView",
+    "ImageView",
+]
 
 # =============================================================================
 # IMPORTS
 # =============================================================================
 
+import contextlib
+import ipaddress
 import re
-
-from django.core.exceptions import ImproperlyConfigured
+import time
+import urllib.parse
+import weakref
+
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    StreamingHttpResponse,
+)
+from django.utils.cache import get_cache_key, has_vary_header, learn_cache_key
+from django.views.generic.base import View
 from django.views.generic.list import ListView
 
-from . import core, settings
+from . import cache, core, layout, metrics, settings
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+#: Prefix of the cache keys of the pages served to the shed requests.
+STALE_PAGE_PREFIX = f"{cache.KEY_PREFIX}.page"
 
 
 # =============================================================================
@@ -39,8 +71,10 @@ class MultiPlotMixin:
     #: The format to render the plots in the html
     plot_format = settings.DJMPL_FORMAT
 
-    #: The template engine where the plot will be rendered.
-    template_engine = settings.DEFAULT_TEMPLATE_ENGINE
+    #: The template engine where the plot will be rendered. This is also
+    #: the engine used by ``TemplateResponseMixin``, so ``None`` means the
+    #: first template engine configured in ``settings.TEMPLATES``.
+    template_engine = None
 
     #: Parameters to be passed when the ``matplotlib.pyplot.subplots```
     #: functions is called.
@@ -52,12 +86,75 @@ class MultiPlotMixin:
     #: More info: https://matplotlib.org/3.2.1/tutorials/intermediate/tight_layout_guide.html # noqa
     tight_layout = False
 
+    #: Layout strategy of the figures: "tight", "cached", "constrained",
+    #: "fixed" or None. If is None, "tight" is used when ``tight_layout``
+    #: is True. The "cached" strategy computes the ``tight_layout`` once
+    #: and reuses it in the figures with the same geometry and labels.
+    layout = None
+
+    #: Lines and collections with more points than this value are rasterized
+    #: in the vector formats (svg). ``None`` disables the rasterization.
+    rasterize_threshold = settings.DJMPL_RASTERIZE_THRESHOLD
+
+    #: How the data is embedded in the mpld3 plots: "json", "typed" (base64
+    #: typed arrays) or "typed-delta".
+    mpld3_encoding = settings.DJMPL_MPLD3_ENCODING
+
+    #: If True the plots are written byte-stable (without timestamps and
+    #: with stable ids). ``None`` means ``settings.DJMPL_DETERMINISTIC``.
+    deterministic = None
+
+    #: Where the plots are rendered: "local" (inside the django process) or
+    #: "server" (in the djmpl render server).
+    render_engine = settings.DJMPL_RENDER_ENGINE
+
+    #: If this is True all the plot methods are drawn as the axes of a single
+    #: figure, encoded once, and every plot in the template is a crop of
+    #: the shared image. Only for the "png" and "svg" formats.
+    small_multiples = False
+
+    #: Parameters of the small multiples figure: ``ncols``, ``sharex``,
+    #: ``sharey`` and ``panel_size`` (in inches).
+    small_multiples_kwargs = None
+
+    #: If this is True the "png" plots are rendered incrementally: the
+    #: axes, ticks, labels and the non animated artists are drawn once and
+    #: cached as a background (for the same layout and limits) and the next
+    #: renders only draw the artists created with ``animated=True`` over
+    #: it. Only for the "local" render engine.
+    blit = False
+
+    #: If this is True the "png" plots are progressive: a low resolution
+    #: preview is inlined in the page and the full image is loaded lazily
+    #: from the ``djmpl:image`` url when it scrolls into view (see
+    #: ``django_matplotlib.progressive``). Only for the "local" render
+    #: engine.
+    progressive = False
+
+    #: The profiler of the request, if the profiling is enabled in
+    #: ``settings.DJMPL_PROFILE`` and requested (see
+    #: ``django_matplotlib.profiling``).
+    profiler = None
+
     #: The plot methods must match whit this regex
     plot_method_regex = r"^plot_"
 
-    #: Data used to populate the plot.
+    #: Data used to populate the plot. Can be any object, like a list, a
+    #: queryset or a lazy ``django_matplotlib.datasources.DataSource``.
     plot_data = None
 
+    #: A ``django_matplotlib.frames.Pipeline`` that converts the plot data
+    #: into typed arrays or a pandas DataFrame and transforms it once,
+    #: before all the plot methods.
+    plot_pipeline = None
+
+    #: If False the requests of the view are not accounted by the admission
+    #: control of ``settings.DJMPL_ADMISSION``.
+    admission = True
+
+    #: The ticket of the request in the admission budget.
+    admission_ticket = None
+
     def get_subplots_kwargs(self):
         """Retrieve the parameters for the ``matplotlib.pyplot.subplots`` or
         empty dict if it's the class variable ``subplot_kwargs`` is
@@ -74,6 +171,17 @@ class MultiPlotMixin:
         """
         return bool(self.tight_layout)
 
+    def get_layout(self):
+        """Return the layout strategy of the figures.
+
+        By default check the class variable ``layout`` and if is not
+        defined, uses "tight" if ``get_tight_layout()`` is True.
+
+        """
+        if self.layout is not None:
+            return self.layout
+        return "tight" if self.get_tight_layout() else None
+
     def get_plot_format(self):
         """Retrieve the format to render the plots in the html.
 
@@ -82,6 +190,119 @@ class MultiPlotMixin:
         """
         return self.plot_format
 
+    def get_rasterize_threshold(self):
+        """Retrieve the minimum number of points to rasterize an artist.
+
+        By default check the class variable ``rasterize_threshold``.
+
+        """
+        return self.rasterize_threshold
+
+    def get_mpld3_encoding(self):
+        """Retrieve the encoding of the data of the mpld3 plots.
+
+        By default check the class variable ``mpld3_encoding``.
+
+        """
+        return self.mpld3_encoding
+
+    def get_deterministic(self):
+        """Return True if the plots must be written byte-stable.
+
+        By default check the class variable ``deterministic`` and if is not
+        defined, uses ``settings.DJMPL_DETERMINISTIC``.
+
+        """
+        if self.deterministic is not None:
+            return bool(self.deterministic)
+        return settings.DJMPL_DETERMINISTIC
+
+    def get_small_multiples(self):
+        """Return True if the plots are drawn in a single figure.
+
+        By default check the class variable ``small_multiples``.
+
+        """
+        return bool(self.small_multiples)
+
+    def get_small_multiples_kwargs(self):
+        """Retrieve the parameters of the small multiples figure or an
+        empty dict if the class variable ``small_multiples_kwargs`` is not
+        defined.
+
+        """
+        return self.small_multiples_kwargs or {}
+
+    def get_blit(self):
+        """Return True if the "png" plots are rendered incrementally.
+
+        By default check the class variable ``blit``.
+
+        """
+        return bool(self.blit)
+
+    def get_progressive(self):
+        """Return True if the "png" plots are progressive.
+
+        By default check the class variable ``progressive``.
+
+        """
+        return bool(self.progressive)
+
+    def get_profiler(self):
+        """Return the profiler of the request or ``None`` if the request is
+        not profiled.
+
+        """
+        if self.profiler is None and settings.DJMPL_PROFILE:
+            from . import profiling
+
+            self.profiler = profiling.profiler_for_request(self.request)
+        return self.profiler
+
+    def stop_profiler(self):
+        """Stop the profiler of the request (if any), the memory tracing
+        is released for other requests.
+
+        """
+        if self.profiler is not None:
+            self.profiler.stop()
+
+    def profile_phase(self, name):
+        """Context manager that profiles a phase of the request, if the
+        request is profiled.
+
+        """
+        profiler = self.get_profiler()
+        if profiler is None:
+            return contextlib.nullcontext()
+        return profiler.phase(name)
+
+    def get_metrics_labels(self, draw_method):
+        """Return the ``view`` and ``method`` labels of the metrics of the
+        plot drawn by ``draw_method``.
+
+        """
+        cls = type(self)
+        return {
+            "view": f"{cls.__module__}.{cls.__qualname__}",
+            "method": getattr(draw_method, "__name__", ""),
+        }
+
+    def get_render_engine(self):
+        """Retrieve where the plots are rendered ("local" or "server").
+
+        By default check the class variable ``render_engine``.
+
+        """
+        render_engine = self.render_engine
+        if render_engine not in settings.AVAILABLE_RENDER_ENGINES:
+            raise ImproperlyConfigured(
+                f"Invalid render engine {render_engine!r}. "
+                f"Options: {settings.AVAILABLE_RENDER_ENGINES}"
+            )
+        return render_engine
+
     def get_template_engine(self):
         """Retrieve the name template engine for this view.
 
@@ -89,7 +310,7 @@ class MultiPlotMixin:
         ``settings.TEMPLATES`` is returned.
 
         """
-        return self.template_engine
+        return self.template_engine or settings.DEFAULT_TEMPLATE_ENGINE
 
     def get_plot_methods(self):
         """Retrieve all the method in-charge of plot the figures.
@@ -134,10 +355,132 @@ class MultiPlotMixin:
             f"'{cls}.plot_data', '{cls}.object_list' or '{cls}.get_queryset()'"
         )
 
+    def get_plot_pipeline(self):
+        """Return the pipeline of the plot data or ``None``.
+
+        By default check the class variable ``plot_pipeline``.
+
+        """
+        return self.plot_pipeline
+
+    def transform_plot_data(self, data):
+        """Evaluate the pipeline of the plot data, if any, and return the
+        data passed to the plot methods.
+
+        """
+        pipeline = self.get_plot_pipeline()
+        if pipeline is None:
+            return data
+        with self.profile_phase("transform"):
+            return pipeline.evaluate(data)
+
     def get_plot_context(self):
         "Returns a dictionary to be passed to all the plots_methods"
         return {}
 
+    def render_plot(self, draw_method, data, options, **kwargs):
+        """Create a plot and draw it with ``draw_method``.
+
+        ``options`` is a dict with the ``subplots_kwargs``, ``layout``,
+        ``plot_format``, ``template_engine``, ``rasterize_threshold``,
+        ``mpld3_encoding``, ``deterministic``, ``blit``, ``progressive``
+        and ``render_engine`` of the plot. If the render engine is "server"
+        the plot is drawn by the djmpl render server, so ``data`` and
+        ``kwargs`` must be JSON serializable (querysets are converted into
+        a list of dicts), the view must be instantiable without arguments
+        and allowed in the ``ALLOWED`` option of the server.
+
+        """
+        is_progressive = (
+            options["progressive"] and options["plot_format"] == "png"
+        )
+        if is_progressive:
+            from . import progressive
+
+            if options["render_engine"] != "local":
+                raise ImproperlyConfigured(
+                    "Progressive plots are only supported by the 'local' "
+                    "engine"
+                )
+            progressive.check_shared_cache()
+
+        if options["render_engine"] == "server":
+            from . import renderserver
+
+            client = renderserver.get_client()
+            return client.render(
+                draw_method,
+                data=data,
+                plot_format=options["plot_format"],
+                template_engine=options["template_engine"],
+                rasterize_threshold=options["rasterize_threshold"],
+                mpld3_encoding=options["mpld3_encoding"],
+                deterministic=options["deterministic"],
+                layout=options["layout"],
+                subplots_kwargs=options["subplots_kwargs"],
+                **kwargs,
+            )
+
+        plot = core.subplots(
+            plot_format=options["plot_format"],
+            template_engine=options["template_engine"],
+            rasterize_threshold=options["rasterize_threshold"],
+            mpld3_encoding=options["mpld3_encoding"],
+            deterministic=options["deterministic"],
+            labels=self.get_metrics_labels(draw_method),
+            blit=options["blit"],
+            blit_key=(
+                self.get_metrics_labels(draw_method)["view"],
+                draw_method.__name__,
+                layout.subplots_key(options["subplots_kwargs"]),
+            ),
+            **options["subplots_kwargs"],
+        )
+
+        fig, ax = plot.figaxes()
+        draw_method(data=data, fig=fig, ax=ax, **kwargs)
+
+        layout.apply_layout(
+            fig,
+            options["layout"],
+            key=layout.subplots_key(options["subplots_kwargs"]),
+        )
+
+        if is_progressive:
+            return progressive.ProgressivePlot(plot)
+        return plot
+
+    def render_small_multiples(self, draw_methods, data, options, **kwargs):
+        """Draw all the ``draw_methods`` in one figure and return a
+        ``django_matplotlib.multiples.Panel`` for every one.
+
+        """
+        from . import multiples
+
+        if options["render_engine"] != "local":
+            raise ImproperlyConfigured(
+                "Small multiples are only supported by the 'local' engine"
+            )
+        try:
+            return multiples.render_small_multiples(
+                draw_methods,
+                data,
+                plot_format=options["plot_format"],
+                template_engine=options["template_engine"],
+                layout_name=options["layout"],
+                rasterize_threshold=options["rasterize_threshold"],
+                deterministic=options["deterministic"],
+                subplots_kwargs=options["subplots_kwargs"],
+                labels={
+                    **self.get_metrics_labels(None),
+                    "method": "small_multiples",
+                },
+                **self.get_small_multiples_kwargs(),
+                **kwargs,
+            )
+        except ValueError as err:
+            raise ImproperlyConfigured(str(err)) from err
+
     def get_context_data(self, **kwargs):
         """Overridden version of `.TemplateResponseMixin` to inject the
         plot into the template's context.
@@ -149,44 +492,288 @@ class MultiPlotMixin:
         kwargs.update(plot_context)
 
         # retrive the data for the plot
-        data = self.get_plot_data()
-
-        # get the subplots_kwargs
-        subplot_kwargs = self.get_subplots_kwargs()
-
-        # auto tight_layout and formats
-        tight_layout = self.get_tight_layout()
-        plot_format = self.get_plot_format()
-        template_engine = self.get_template_engine()
+        with self.profile_phase("fetch"):
+            data = self.get_plot_data()
+        data = self.transform_plot_data(data)
+
+        # plot options
+        options = {
+            "subplots_kwargs": self.get_subplots_kwargs(),
+            "layout": self.get_layout(),
+            "plot_format": self.get_plot_format(),
+            "template_engine": self.get_template_engine(),
+            "rasterize_threshold": self.get_rasterize_threshold(),
+            "mpld3_encoding": self.get_mpld3_encoding(),
+            "deterministic": self.get_deterministic(),
+            "blit": self.get_blit(),
+            "progressive": self.get_progressive(),
+            "render_engine": self.get_render_engine(),
+        }
 
         # retrieve all the methods for plot
         draw_methods = self.get_plot_methods()
 
-        plots = []
-        for dm in draw_methods:
-            plot = core.subplots(
-                plot_format=plot_format,
-                template_engine=template_engine,
-                **subplot_kwargs,
+        # wait for room in the render budget, maybe with degraded options
+        options = self.admit_render(data, draw_methods, options)
+
+        if self.get_small_multiples() and draw_methods:
+            start = time.perf_counter()
+            with self.profile_phase("draw:small_multiples"):
+                plots = self.render_small_multiples(
+                    draw_methods, data, options, **kwargs
+                )
+            metrics.observe_render(
+                {**self.get_metrics_labels(None), "method": "small_multiples"},
+                options["plot_format"],
+                time.perf_counter() - start,
             )
-
-            fig, ax = plot.figaxes()
-            dm(data=data, fig=fig, ax=ax, **kwargs)
-
-            if tight_layout:
-                fig.tight_layout()
-
-            plots.append(plot)
+        else:
+            plots = []
+            for dm in draw_methods:
+                start = time.perf_counter()
+                with self.profile_phase(f"draw:{dm.__name__}"):
+                    plots.append(self.render_plot(dm, data, options, **kwargs))
+                metrics.observe_render(
+                    self.get_metrics_labels(dm),
+                    options["plot_format"],
+                    time.perf_counter() - start,
+                )
 
         if not plots:
             raise ImproperlyConfigured("No plot method provided")
 
+        # the plots are encoded when the template is rendered
+        profiler = self.get_profiler()
+        if profiler is not None:
+            from . import profiling
+
+            plots = [
+                profiling.ProfiledPlot(plot, dm.__name__, profiler)
+                for plot, dm in zip(plots, draw_methods)
+            ]
+
         # retrieve the template plot name
         context_plot_name = self.get_context_plot_name()
 
         context[context_plot_name] = plots
         return context
 
+    # ADMISSION CONTROL =======================================================
+
+    def get_admission_options(self):
+        """Return the options of the admission control or ``None`` if the
+        requests of the view are not accounted.
+
+        By default the ``settings.DJMPL_ADMISSION`` options, if the class
+        variable ``admission`` is True.
+
+        """
+        if not self.admission:
+            return None
+
+        from . import admission
+
+        return admission.options_from_settings()
+
+    def get_render_cost(self, data, draw_methods, options, admission_options):
+        """Estimate the cost of the render of the request: the size of the
+        data (the querysets are counted), times the number of plots, times
+        the weight of the format.
+
+        """
+        from . import admission
+
+        return admission.estimate_cost(
+            admission.data_size(data),
+            len(draw_methods),
+            options["plot_format"],
+            admission_options["FORMAT_WEIGHTS"],
+        )
+
+    def get_degraded_options(self, options, admission_options):
+        """Return the plot ``options`` of a request admitted under pressure:
+        the mpld3 plots are rendered as png and the figures with the
+        ``DEGRADED_DPI`` resolution.
+
+        """
+        plot_format = options["plot_format"]
+        return {
+            **options,
+            "plot_format": "png" if plot_format == "mpld3" else plot_format,
+            "subplots_kwargs": {
+                **options["subplots_kwargs"],
+                "dpi": admission_options["DEGRADED_DPI"],
+            },
+        }
+
+    def admit_render(self, data, draw_methods, options):
+        """Reserve the cost of the request in the admission budget and
+        return the plot options (degraded if the budget is under pressure).
+
+        Raises ``django_matplotlib.admission.Overloaded`` if there is no
+        room in the budget after the ``QUEUE_TIMEOUT``.
+
+        """
+        admission_options = self.get_admission_options()
+        if admission_options is None or self.admission_ticket is not None:
+            return options
+
+        from . import admission
+
+        budget = admission.get_budget(admission_options["BUDGET"])
+        cost = self.get_render_cost(
+            data, draw_methods, options, admission_options
+        )
+        self.admission_ticket = budget.acquire(
+            cost,
+            timeout=admission_options["QUEUE_TIMEOUT"],
+            degrade_at=admission_options["DEGRADE_AT"],
+        )
+        if self.admission_ticket.degraded:
+            metrics.observe_admission("degraded")
+            return self.get_degraded_options(options, admission_options)
+        metrics.observe_admission("admitted")
+        return options
+
+    def is_shareable_page(self, response):
+        """Return True if the rendered page can be served to other clients.
+
+        Like the django cache middleware the pages that vary on the
+        cookies, read the session (the authenticated users) or used the
+        CSRF token are private. The middlewares add the ``Vary: Cookie``
+        header after the page is rendered, so the request is checked too.
+
+        """
+        session = getattr(self.request, "session", None)
+        meta = self.request.META
+        return not (
+            has_vary_header(response, "Cookie")
+            or getattr(session, "accessed", False)
+            or meta.get("CSRF_COOKIE_NEEDS_UPDATE")
+            or meta.get("CSRF_COOKIE_USED")
+        )
+
+    def store_stale_page(self, response, admission_options):
+        """Store the rendered page to be served when the requests for the
+        same url are shed.
+
+        The key of the page respects the ``Vary`` headers of the response
+        (see ``django.utils.cache.learn_cache_key``).
+
+        """
+        timeout = admission_options["STALE_TIMEOUT"]
+        if (
+            timeout
+            and self.request.method == "GET"
+            and response.status_code == 200
+            and not self.admission_ticket.degraded
+            and self.is_shareable_page(response)
+        ):
+            backend = cache.get_cache()
+            key = learn_cache_key(
+                self.request,
+                response,
+                timeout,
+                key_prefix=STALE_PAGE_PREFIX,
+                cache=backend,
+            )
+            backend.set(
+                key, (response["Content-Type"], response.content), timeout
+            )
+
+    def get_overloaded_response(self, admission_options):
+        """The response of a shed request: the last page rendered for the
+        same url, or a 503 response.
+
+        """
+        page = None
+        if admission_options["STALE_TIMEOUT"] and self.request.method == "GET":
+            backend = cache.get_cache()
+            key = get_cache_key(
+                self.request,
+                key_prefix=STALE_PAGE_PREFIX,
+                method="GET",
+                cache=backend,
+            )
+            page = None if key is None else backend.get(key)
+            metrics.observe_cache("page", hit=page is not None)
+
+        if page is not None:
+            content_type, content = page
+            response = HttpResponse(content, content_type=content_type)
+            response["X-Djmpl-Admission"] = "stale"
+            metrics.observe_admission("stale")
+            return response
+
+        response = HttpResponse(
+            "The server is overloaded, retry later.",
+            status=503,
+            content_type="text/plain",
+        )
+        response["Retry-After"] = str(admission_options["RETRY_AFTER"])
+        response["X-Djmpl-Admission"] = "shed"
+        metrics.observe_admission("shed")
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        """Overridden version of `.View` to release the admission ticket of
+        the request when the response is rendered, to shed the request
+        when the render budget is exhausted and to stop the profiler of a
+        failed request.
+
+        """
+        from . import admission
+
+        admission_options = self.get_admission_options()
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except admission.Overloaded:
+            self.stop_profiler()
+            return self.get_overloaded_response(admission_options)
+        except BaseException:
+            if self.admission_ticket is not None:
+                self.admission_ticket.release()
+            self.stop_profiler()
+            raise
+
+        ticket = self.admission_ticket
+        if admission_options is None or ticket is None:
+            return response
+        response["X-Djmpl-Admission"] = (
+            "degraded" if ticket.degraded else "admitted"
+        )
+
+        def release(response):
+            ticket.release()
+            self.store_stale_page(response, admission_options)
+
+        if getattr(response, "is_rendered", True):
+            release(response)
+        else:
+            response.add_post_render_callback(release)
+            # released even if the response is discarded without render
+            weakref.finalize(response, ticket.release)
+        return response
+
+    def render_to_response(self, context, **response_kwargs):
+        """Overridden version of `.TemplateResponseMixin` to add the summary
+        of the profiler to the response after the template is rendered.
+
+        """
+        response = super().render_to_response(context, **response_kwargs)
+        profiler = self.get_profiler()
+        if profiler is not None:
+            from . import profiling
+
+            response.add_post_render_callback(
+                lambda response: profiling.annotate_response(
+                    response, profiler
+                )
+            )
+            # stopped even if the response is discarded without render
+            weakref.finalize(response, profiler.stop)
+        return response
+
 
 class PlotMixin(MultiPlotMixin):
 
@@ -208,6 +795,317 @@ class PlotMixin(MultiPlotMixin):
         return context
 
 
+class TiledPlotMixin(MultiPlotMixin):
+    """Mixin for zoomable plots of huge datasets rendered as tiles.
+
+    Every plot method is shown with a viewer that requests PNG tiles to the
+    same view with the query parameter ``?tile=<method>/<z>/<x>/<y>``.
+    The plot methods draw only one tile: ``data`` is a dict with the
+    ``tile_columns`` of the points inside the tile, downsampled to the
+    minimum and maximum of every pixel column. The limits of the axes are
+    set after the plot method is called. The tiles are stored in the
+    ``settings.DJMPL_CACHE``.
+
+    """
+
+    #: The query parameter with the requested tile.
+    tile_param = "tile"
+
+    #: Size in pixels of the tiles.
+    tile_size = 256
+
+    #: DPI of the tiles.
+    tile_dpi = 100
+
+    #: Maximum zoom level. In the zoom z the data is split in 2**z x 2**z
+    #: tiles.
+    tile_max_zoom = 12
+
+    #: (width, height) in pixels of the viewer.
+    tile_viewer_size = (512, 512)
+
+    #: Names of the x and y columns of the data.
+    tile_columns = ("x", "y")
+
+    #: If the data is sorted by x the window of every tile is found with a
+    #: binary search instead of a full scan.
+    tile_sorted = True
+
+    #: ((xmin, xmax), (ymin, ymax)) of all the tiles. ``None`` means the
+    #: limits of the data (computed once and cached).
+    tile_extent = None
+
+    #: Change this value to invalidate the cached tiles.
+    tile_version = None
+
+    #: Seconds to keep the tiles in the cache and in the browser.
+    tile_timeout = settings.DJMPL_CACHE_TIMEOUT
+
+    def get_tile_cache_key(self):
+        """Return the parts of the keys of the cached tiles of this view."""
+        cls = type(self)
+        return (f"{cls.__module__}.{cls.__qualname__}", self.tile_version)
+
+    def get_tile_extent(self, data):
+        """Return the ``((xmin, xmax), (ymin, ymax))`` of all the tiles.
+
+        By default check the class variable ``tile_extent`` and if is not
+        defined computes the limits of the data, and store them in the
+        cache.
+
+        """
+        if self.tile_extent is not None:
+            return self.tile_extent
+
+        from . import aggregate
+
+        x, y = self.tile_columns
+        return cache.get_cache().get_or_set(
+            cache.make_key("tile-extent", *self.get_tile_cache_key()),
+            lambda: aggregate._limits(
+                data, x, y, aggregate.DEFAULT_CHUNK_SIZE
+            ),
+            self.tile_timeout,
+        )
+
+    def get_tile_data(self, data, tile, extent):
+        """Return the data drawn in a tile: a dict with the ``tile_columns``
+        of the points inside the tile, downsampled to the minimum and
+        maximum of every pixel column.
+
+        """
+        from . import tiles
+
+        x, y = self.tile_columns
+        xlim, _ = tile.bounds(*extent)
+        xs, ys = tiles.downsample(
+            data,
+            xlim,
+            bins=self.tile_size,
+            x=x,
+            y=y,
+            is_sorted=self.tile_sorted,
+        )
+        return {x: xs, y: ys}
+
+    def render_tile(self, draw_method, tile, **kwargs):
+        """Return the PNG of a tile of the plot drawn by ``draw_method``."""
+        from . import tiles
+
+        data = self.get_plot_data()
+        extent = self.get_tile_extent(data)
+
+        def render():
+            return tiles.render_tile(
+                draw_method,
+                self.get_tile_data(data, tile, extent),
+                tile,
+                *extent,
+                size=self.tile_size,
+                dpi=self.tile_dpi,
+                **kwargs,
+            )
+
+        key_parts = self.get_tile_cache_key() + (
+            draw_method.__name__,
+            str(tile),
+            extent,
+            self.tile_size,
+            self.tile_dpi,
+        )
+        return tiles.get_tile(key_parts, render, timeout=self.tile_timeout)
+
+    def render_plot(self, draw_method, data, options, **kwargs):
+        """Return the viewer of the tiles drawn by ``draw_method``."""
+        from . import tiles
+
+        url = f"{self.request.path}?{self.tile_param}={draw_method.__name__}/"
+        return tiles.TiledPlot(
+            url=url,
+            template_engine=options["template_engine"],
+            size=self.tile_size,
+            max_zoom=self.tile_max_zoom,
+            viewer_size=self.tile_viewer_size,
+        )
+
+    def get(self, request, *args, **kwargs):
+        """Return a tile if is requested, otherwise the page."""
+        value = request.GET.get(self.tile_param)
+        if value is None:
+            return super().get(request, *args, **kwargs)
+
+        from . import tiles
+
+        name, _, tile = value.partition("/")
+        methods = {m.__name__: m for m in self.get_plot_methods()}
+        try:
+            tile = tiles.Tile.parse(tile, max_zoom=self.tile_max_zoom)
+        except ValueError as err:
+            raise Http404(str(err)) from err
+        if name not in methods:
+            raise Http404(f"Invalid tile {value!r}")
+
+        png = self.render_tile(methods[name], tile, **self.get_plot_context())
+        response = HttpResponse(png, content_type="image/png")
+        response["Cache-Control"] = f"max-age={self.tile_timeout}"
+        return response
+
+
+class LivePlotMixin(MultiPlotMixin):
+    """Mixin for plots updated in the browser with Server-Sent Events.
+
+    The page is rendered once with the data up to the current cursor, and
+    every plot opens a stream to the same view (with the query parameter
+    ``?live=<cursor>``) that pushes only the rows after the cursor. The
+    rows are appended to the lines of the mpld3 plots and dispatched as
+    ``djmpl:rows`` events for the client-side plots (see
+    ``django_matplotlib.live``).
+
+    """
+
+    #: The query parameter with the cursor of the stream.
+    live_param = "live"
+
+    #: Names of the columns sent by the stream. The first one is the x of
+    #: the lines and the next ones the y of every line.
+    live_columns = ("x", "y")
+
+    #: Increasing field of the querysets used as cursor. Must be indexed.
+    live_cursor_field = "pk"
+
+    #: Seconds between two reads of the data when there are no new rows.
+    live_interval = 1.0
+
+    #: Seconds before a stream is closed (the client reconnects).
+    live_duration = 60.0
+
+    #: Reconnection time of the clients in milliseconds.
+    live_retry = 1000
+
+    #: Maximum number of rows of every event.
+    live_batch_size = 1000
+
+    #: Maximum number of rows kept by the clients. ``None`` keeps all.
+    live_window = None
+
+    #: If True the stream is an asynchronous iterator. ``None`` means True
+    #: only if the request is served by ASGI.
+    live_async = None
+
+    #: The cursor of the data of the page.
+    live_cursor = None
+
+    def get_live_source(self):
+        """Return all the data of the view, the stream reads the new rows
+        from here.
+
+        By default is the data of ``MultiPlotMixin.get_plot_data()``.
+
+        """
+        return super().get_plot_data()
+
+    def get_plot_data(self):
+        """Return the data of the page, up to the current cursor."""
+        from . import live
+
+        data = self.get_live_source()
+        if self.live_cursor is None:
+            self.live_cursor = live.current_cursor(
+                data, self.live_columns, self.live_cursor_field
+            )
+        return live.until_cursor(
+            data, self.live_cursor, self.live_cursor_field
+        )
+
+    def get_live_async(self):
+        """Return True if the stream must be an asynchronous iterator.
+
+        By default check the class variable ``live_async`` and if is not
+        defined, uses True if the request is served by ASGI.
+
+        """
+        if self.live_async is not None:
+            return bool(self.live_async)
+
+        from django.core.handlers.asgi import ASGIRequest
+
+        return isinstance(self.request, ASGIRequest)
+
+    def read_live_rows(self, cursor):
+        """Return the rows after ``cursor`` and the new cursor."""
+        from . import live
+
+        return live.read_rows(
+            self.get_live_source(),
+            self.live_columns,
+            cursor,
+            cursor_field=self.live_cursor_field,
+            limit=self.live_batch_size,
+        )
+
+    def render_plot(self, draw_method, data, options, **kwargs):
+        """Render the plot drawn by ``draw_method`` with the client of the
+        stream.
+
+        """
+        from . import live
+
+        plot = super().render_plot(draw_method, data, options, **kwargs)
+        cursor = urllib.parse.quote(self.live_cursor)
+        return live.LivePlot(
+            plot=plot,
+            url=f"{self.request.path}?{self.live_param}={cursor}",
+            columns=self.live_columns,
+            window=self.live_window,
+        )
+
+    def stream(self, cursor):
+        """Return the ``text/event-stream`` response with the rows after
+        ``cursor``.
+
+        """
+        from . import live
+
+        options = {
+            "cursor": cursor,
+            "interval": self.live_interval,
+            "duration": self.live_duration,
+            "retry": self.live_retry,
+        }
+        if self.get_live_async():
+            events = live.astream_events(self.read_live_rows, **options)
+        else:
+            events = live.stream_events(self.read_live_rows, **options)
+        response = StreamingHttpResponse(
+            events, content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def get(self, request, *args, **kwargs):
+        """Return the stream if is requested, otherwise the page.
+
+        The cursor of the stream is the ``Last-Event-ID`` header sent by
+        the reconnected clients, or the one in the query parameter. A
+        malformed cursor returns a 400 response.
+
+        """
+        from . import live
+
+        cursor = request.GET.get(self.live_param)
+        if cursor is None:
+            return super().get(request, *args, **kwargs)
+        cursor = request.headers.get("Last-Event-ID", cursor)
+        try:
+            live.check_cursor(
+                self.get_live_source(), cursor, self.live_cursor_field
+            )
+        except ValueError as err:
+            return HttpResponseBadRequest(str(err), content_type="text/plain")
+        return self.stream(cursor)
+
+
 # =============================================================================
 # THE VIEWS
 # =============================================================================
@@ -225,3 +1123,80 @@ class PlotView(PlotMixin, ListView):
     Generic view that renders a template and passes in a `plot` instance.
     Mixes ``.PlotMixin`` with ``django.views.generic.list.ListView``.
     """
+
+
+class TiledPlotView(TiledPlotMixin, ListView):
+    """
+    Generic view that renders a template and passes in a `plots` instances
+    of zoomable tiled plots.
+    Mixes ``.TiledPlotMixin`` with ``django.views.generic.list.ListView``.
+    """
+
+
+class LivePlotView(LivePlotMixin, ListView):
+    """
+    Generic view that renders a template and passes in a `plots` instances
+    updated with Server-Sent Events.
+    Mixes ``.LivePlotMixin`` with ``django.views.generic.list.ListView``.
+    """
+
+
+class MetricsView(View):
+    """
+    Expose the metrics of django-matplotlib in the Prometheus text format.
+    If ``settings.DJMPL_METRICS_DIR`` is defined, the metrics of all the
+    worker processes are aggregated.
+
+    Only the clients with an address in ``allowed_ips`` (by default
+    ``settings.DJMPL_METRICS_ALLOWED_IPS``) can read the metrics, the
+    rest get a 403. Override ``has_permission`` to use another check (a
+    token, a staff user). Behind a reverse proxy in the same host every
+    request comes from the address of the proxy, so include the metrics
+    (``django_matplotlib.metrics_urls``) in a path that is not proxied.
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+    allowed_ips = None
+
+    def get_allowed_ips(self) -> tuple:
+        if self.allowed_ips is None:
+            return settings.DJMPL_METRICS_ALLOWED_IPS
+        return self.allowed_ips
+
+    def has_permission(self, request) -> bool:
+        """True if the client of ``request`` can read the metrics."""
+        try:
+            address = ipaddress.ip_address(request.META.get("REMOTE_ADDR"))
+        except ValueError:
+            return False
+        return any(
+            address in ipaddress.ip_network(allowed, strict=False)
+            for allowed in self.get_allowed_ips()
+        )
+
+    def get(self, request, *args, **kwargs):
+        if not self.has_permission(request):
+            raise PermissionDenied("Metrics not allowed")
+        snapshot = metrics.REGISTRY.collect()
+        return HttpResponse(
+            metrics.exposition(snapshot), content_type=self.content_type
+        )
+
+
+class ImageView(View):
+    """
+    Serve the full resolution images of the progressive plots stored in
+    the ``settings.DJMPL_CACHE`` (shared by all the processes). The images
+    are named with the hash of their content, so they are cached forever
+    by the browsers.
+    """
+
+    def get(self, request, name, *args, **kwargs):
+        from . import progressive
+
+        content = progressive.get_image(name)
+        if content is None:
+            raise Http404(f"Image {name!r} not found")
+        response = HttpResponse(content, content_type="image/png")
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Warm-up of matplotlib at the start of the django workers.
+
+The first plot rendered by a fresh process pays the scan of the fonts,
+the import of the backends and the cold caches of mathtext and the text
+layout. The ``warmup`` function pays this cost at the start of the
+process (the ``ready()`` of the django app) instead of in the first
+request.
+
+"""
+
+__all__ = ["warmup"]
+
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import importlib
+import logging
+import time
+
+from . import core, settings
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+logger = logging.getLogger("django_matplotlib")
+
+#: Default options of the warm-up, updated with ``settings.DJMPL_WARMUP``.
+DEFAULT_OPTIONS = {
+    "FONT_CACHE": True,
+    "BACKENDS": ["agg", "svg"],
+    "FORMATS": [settings.DJMPL_FORMAT],
+}
+
+
+# =============================================================================
+# STEPS
+# =============================================================================
+
+
+def warm_font_cache():
+    """Load (or build) the matplotlib font cache and resolve the default
+    font.
+
+    """
+    import matplotlib
+    from matplotlib import font_manager
+
+    font_manager.findfont(
+        font_manager.FontProperties(family=matplotlib.rcParams["font.family"])
+    )
+
+
+def warm_backend(backend: str):
+    """Import a matplotlib backend by name (``agg``, ``svg``, ...) or
+    module (``module://package.module``).
+
+    """
+    if backend.startswith("module://"):
+        module_name = backend[len("module://") :]
+    else:
+        module_name = f"matplotlib.backends.backend_{backend.lower()}"
+    importlib.import_module(module_name)
+
+
+def warm_format(plot_format: str):
+    """Render a throwaway figure with text and mathtext in a format."""
+    import matplotlib.pyplot as plt
+
+    plot = core.subplots(plot_format=plot_format, template_engine="str")
+    fig, ax = plot.figaxes()
+    try:
+        ax.plot([0, 1, 2], [0, 1, 4], label=r"$\alpha x^2$")
+        ax.set_title("warm-up")
+        ax.set_xlabel(r"$\sqrt{x}$")
+        ax.legend()
+        fig.tight_layout()
+        plot.html_str()
+    finally:
+        plt.close(fig)
+
+
+# =============================================================================
+# API
+# =============================================================================
+
+
+def warmup(font_cache=True, backends=(), formats=()) -> dict:
+    """Warm-up matplotlib and report the time of every step.
+
+    Parameters
+    ----------
+    font_cache: bool
+        Load the font cache.
+    backends: list
+        Names of the matplotlib backends to import.
+    formats: list
+        Plot formats to render a throwaway figure.
+
+    Returns
+    -------
+    dict:
+        The seconds spent in every step and the ``total``.
+
+    """
+    steps = []
+    if font_cache:
+        steps.append(("font_cache", warm_font_cache, ()))
+    steps.extend((f"backend:{b}", warm_backend, (b,)) for b in backends)
+    steps.extend((f"format:{f}", warm_format, (f,)) for f in formats)
+
+    report, start = {}, time.perf_counter()
+    for name, func, args in steps:
+        step_start = time.perf_counter()
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("djmpl warm-up step %r failed", name)
+        report[name] = time.perf_counter() - step_start
+    report["total"] = time.perf_counter() - start
+
+    logger.info(
+        "djmpl warm-up finished in %.1f ms (%s)",
+        report["total"] * 1000,
+        ", ".join(f"{k}={v * 1000:.1f}ms" for k, v in report.items()),
+    )
+    return report
+
+
+def warmup_from_settings() -> dict:
+    """Execute the warm-up configured in ``settings.DJMPL_WARMUP``.
+
+    Returns the report of ``warmup`` or ``None`` if the warm-up is
+    disabled.
+
+    """
+    if not settings.DJMPL_WARMUP:
+        return None
+
+    options = dict(DEFAULT_OPTIONS)
+    if isinstance(settings.DJMPL_WARMUP, dict):
+        options.update(settings.DJMPL_WARMUP)
+
+    return warmup(
+        font_cache=options["FONT_CACHE"],
+        backends=options["BACKENDS"],
+        formats=options["FORMATS"],
+    )
@@ -37,6 +37,12 @@ PATH = pathlib.Path(os.path.abspath(os.path.dirname(__file__)))
 
 REQUIREMENTS = ["django", "matplotlib", "attrs", "mpld3", "jinja2"]
 
+EXTRAS_REQUIRE = {
+    "parquet": ["pyarrow"],
+    "hdf5": ["h5py"],
+    "pandas": ["pandas"],
+}
+
 with open(PATH / "README.md") as fp:
     LONG_DESCRIPTION = fp.read()
 
@@ -89,6 +95,7 @@ def do_setup():
         py_modules=["ez_setup"],
         packages=PACKAGES,
         install_requires=REQUIREMENTS,
+        extras_require=EXTRAS_REQUIRE,
         include_package_data=True,
     )
 
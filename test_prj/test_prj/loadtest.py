@@ -0,0 +1,405 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Load test of the plot views of the test project.
+
+The synthetic ``LoadTestView`` (``/load/<format>/<plots>/<size>/``) is
+requested by a number of concurrent clients through the WSGI and the ASGI
+applications of the project, called in-process (without network or
+server). The report has the throughput, the p50/p95/p99 latencies and the
+growth of the resident memory of the process, and the command fails if any
+SLO is not met.
+
+Usage (from the ``test_prj`` directory)::
+
+    python -m test_prj.loadtest --clients 8 --requests 200
+    python -m test_prj.loadtest --app asgi --formats png --slo slo.json
+
+The SLO file is a JSON with any of the keys of ``DEFAULT_SLO``.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import argparse
+import asyncio
+import io
+import itertools as it
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import wsgiref.util
+
+import attr
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+FORMATS = ["png", "svg", "mpld3"]
+
+PLOTS = [1, 4]
+
+SIZES = [100, 10_000]
+
+#: Default thresholds. The latencies are in seconds and the memory growth in
+#: bytes.
+DEFAULT_SLO = {
+    "p50": 0.5,
+    "p95": 2.0,
+    "p99": 5.0,
+    "error_rate": 0.0,
+    "rss_growth": 256 * 1024 * 1024,
+    "throughput": 0.0,
+}
+
+
+# =============================================================================
+# REPORT
+# =============================================================================
+
+
+def percentile(values, q) -> float:
+    """The ``q`` percentile (0-100) of ``values``, by linear
+    interpolation.
+
+    """
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    pos = (len(values) - 1) * q / 100.0
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+@attr.s(frozen=True)
+class Report:
+    """The result of the load test of an application."""
+
+    app: str = attr.ib()
+    clients: int = attr.ib()
+    seconds: float = attr.ib()
+    latencies: dict = attr.ib(repr=False)
+    errors: int = attr.ib()
+    rss_start: int = attr.ib()
+    rss_end: int = attr.ib()
+
+    @property
+    def all_latencies(self) -> list:
+        return list(it.chain.from_iterable(self.latencies.values()))
+
+    @property
+    def requests(self) -> int:
+        return len(self.all_latencies)
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    @property
+    def rss_growth(self) -> int:
+        return self.rss_end - self.rss_start
+
+    def percentile(self, q, path=None) -> float:
+        values = self.all_latencies if path is None else self.latencies[path]
+        return percentile(values, q)
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> float:
+        return self.percentile(95)
+
+    @property
+    def p99(self) -> float:
+        return self.percentile(99)
+
+
+def check_slo(report, slo) -> list:
+    """Return the description of every SLO not met by ``report``."""
+    slo = {**DEFAULT_SLO, **slo}
+    violations = []
+    for name in ("p50", "p95", "p99", "error_rate", "rss_growth"):
+        value = getattr(report, name)
+        if value > slo[name]:
+            violations.append(
+                f"{report.app}: {name} {value:.4g} > {slo[name]:.4g}"
+            )
+    if report.throughput < slo["throughput"]:
+        violations.append(
+            f"{report.app}: throughput {report.throughput:.4g} < "
+            f"{slo['throughput']:.4g}"
+        )
+    return violations
+
+
+# =============================================================================
+# CLIENTS
+# =============================================================================
+
+
+def wsgi_request(app, path, host) -> int:
+    """Call the WSGI application with a GET of ``path`` and return the
+    status code.
+
+    """
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": host,
+        "HTTP_HOST": host,
+        "wsgi.input": io.BytesIO(),
+    }
+    wsgiref.util.setup_testing_defaults(environ)
+    status = []
+
+    def start_response(value, headers, exc_info=None):
+        status.append(int(value.split()[0]))
+        return lambda data: None
+
+    result = app(environ, start_response)
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return status[0]
+
+
+async def asgi_request(app, path, host) -> int:
+    """Call the ASGI application with a GET of ``path`` and return the
+    status code.
+
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", host.encode())],
+        "client": ("127.0.0.1", 0),
+        "server": (host, 80),
+    }
+    request_sent = asyncio.Event()
+    status = []
+
+    async def receive():
+        if not request_sent.is_set():
+            request_sent.set()
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # the client never disconnects
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+def _paths_queue(paths, requests):
+    return iter(it.islice(it.cycle(paths), requests))
+
+
+def run_wsgi(app, paths, clients, requests, host) -> tuple:
+    """Request the ``paths`` (round robin) ``requests`` times with
+    ``clients`` threads. Returns the latencies by path and the number of
+    errors.
+
+    """
+    queue, lock = _paths_queue(paths, requests), threading.Lock()
+    latencies = {path: [] for path in paths}
+    errors = [0]
+
+    def client():
+        while True:
+            with lock:
+                path = next(queue, None)
+            if path is None:
+                return
+            start = time.perf_counter()
+            try:
+                status = wsgi_request(app, path, host)
+            except Exception:
+                status = 500
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies[path].append(elapsed)
+                errors[0] += status >= 400
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def run_asgi(app, paths, clients, requests, host) -> tuple:
+    """Like ``run_wsgi`` but with ``clients`` coroutines calling the ASGI
+    application.
+
+    """
+    queue = _paths_queue(paths, requests)
+    latencies = {path: [] for path in paths}
+    errors = [0]
+
+    async def client():
+        for path in queue:
+            start = time.perf_counter()
+            try:
+                status = await asgi_request(app, path, host)
+            except Exception:
+                status = 500
+            latencies[path].append(time.perf_counter() - start)
+            errors[0] += status >= 400
+
+    async def main():
+        await asyncio.gather(*(client() for _ in range(clients)))
+
+    asyncio.run(main())
+    return latencies, errors[0]
+
+
+# =============================================================================
+# API
+# =============================================================================
+
+
+def scenario_paths(formats=FORMATS, plots=PLOTS, sizes=SIZES) -> list:
+    """The paths of the ``LoadTestView`` for every combination."""
+    return [
+        f"/load/{plot_format}/{nplots}/{size}/"
+        for plot_format, nplots, size in it.product(formats, plots, sizes)
+    ]
+
+
+def load_test(app_name, paths, clients=8, requests=200, host=None) -> Report:
+    """Execute the load test with the "wsgi" or "asgi" application of the
+    project.
+
+    Every path is requested once before the test, so the imports and the
+    warm-up of the caches are not measured.
+
+    """
+    from django_matplotlib.export import default_host
+    from django_matplotlib.renderserver import current_rss
+
+    host = host or default_host()
+    if app_name == "wsgi":
+        from .wsgi import application
+
+        runner = run_wsgi
+    elif app_name == "asgi":
+        from .asgi import application
+
+        runner = run_asgi
+    else:
+        raise ValueError(f"Unknown application {app_name!r}")
+
+    runner(application, paths, 1, len(paths), host)
+
+    rss_start = current_rss()
+    start = time.perf_counter()
+    latencies, errors = runner(application, paths, clients, requests, host)
+    seconds = time.perf_counter() - start
+
+    return Report(
+        app=app_name,
+        clients=clients,
+        seconds=seconds,
+        latencies=latencies,
+        errors=errors,
+        rss_start=rss_start,
+        rss_end=current_rss(),
+    )
+
+
+def format_report(report) -> str:
+    """The text of the report of an application."""
+    ms = 1000
+    lines = [
+        f"{report.app}: {report.requests} requests, {report.clients} "
+        f"clients, {report.errors} errors, "
+        f"{report.throughput:.1f} req/s, p50 {report.p50 * ms:.1f} ms, "
+        f"p95 {report.p95 * ms:.1f} ms, p99 {report.p99 * ms:.1f} ms, "
+        f"rss {report.rss_growth / 1024 / 1024:+.1f} MiB",
+        f"  {'path':<28} {'reqs':>5} {'p50 ms':>8} {'p95 ms':>8}",
+    ]
+    for path, values in report.latencies.items():
+        if values:
+            lines.append(
+                f"  {path:<28} {len(values):>5} "
+                f"{statistics.median(values) * ms:>8.1f} "
+                f"{report.percentile(95, path) * ms:>8.1f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--app", choices=["wsgi", "asgi", "both"], default="both"
+    )
+    parser.add_argument("-c", "--clients", type=int, default=8)
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("--formats", nargs="+", default=FORMATS)
+    parser.add_argument("--plots", nargs="+", type=int, default=PLOTS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--host")
+    parser.add_argument("--slo", help="JSON file with the thresholds")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "test_prj.settings")
+
+    slo = {}
+    if args.slo:
+        with open(args.slo) as fp:
+            slo = json.load(fp)
+
+    paths = scenario_paths(args.formats, args.plots, args.sizes)
+    apps = ["wsgi", "asgi"] if args.app == "both" else [args.app]
+
+    violations = []
+    for app_name in apps:
+        report = load_test(
+            app_name, paths, args.clients, args.requests, args.host
+        )
+        print(format_report(report))
+        violations.extend(check_slo(report, slo))
+
+    for violation in violations:
+        print(f"SLO FAILED {violation}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
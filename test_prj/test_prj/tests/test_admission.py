@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.admission
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import threading
+
+from django.middleware.csrf import get_token
+from django.urls import path
+from django.utils.cache import patch_vary_headers
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import admission, cache, settings
+
+import numpy as np
+
+import pytest
+
+
+# =============================================================================
+# VIEWS AND URLS
+# =============================================================================
+
+
+class AdmissionView(djmpl.MultiPlotMixin, TemplateView):
+    template_name = "test_djmpl/MultiPlot.html"
+    plot_format = "mpld3"
+    plot_data = np.arange(100)
+    subplots_kwargs = {"figsize": (2, 2), "dpi": 100}
+
+    def plot_line(self, data, fig, ax):
+        ax.plot(data)
+
+    def plot_fail(self, data, fig, ax):
+        if self.request.GET.get("fail"):
+            raise ValueError("fail")
+
+
+class CsrfAdmissionView(AdmissionView):
+    def plot_line(self, data, fig, ax):
+        ax.plot(data)
+
+    def get_context_data(self, **kwargs):
+        get_token(self.request)
+        return super().get_context_data(**kwargs)
+
+
+class SessionAdmissionView(AdmissionView):
+    def plot_line(self, data, fig, ax):
+        ax.plot(data)
+
+    def get_context_data(self, **kwargs):
+        self.request.session.get("theme")
+        return super().get_context_data(**kwargs)
+
+
+class VaryAdmissionView(AdmissionView):
+    def plot_line(self, data, fig, ax):
+        ax.plot(data)
+
+    def render_to_response(self, context, **kwargs):
+        response = super().render_to_response(context, **kwargs)
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+
+urlpatterns = [
+    path("admission/", AdmissionView.as_view()),
+    path("admission/csrf/", CsrfAdmissionView.as_view()),
+    path("admission/session/", SessionAdmissionView.as_view()),
+    path("admission/vary/", VaryAdmissionView.as_view()),
+]
+
+OPTIONS = {
+    "BUDGET": 1000,
+    "QUEUE_TIMEOUT": 0,
+    "DEGRADE_AT": 0.75,
+    "FORMAT_WEIGHTS": {"png": 1, "mpld3": 2},
+    "DEGRADED_DPI": 20,
+    "STALE_TIMEOUT": 60,
+    "RETRY_AFTER": 7,
+}
+
+
+@pytest.fixture
+def budget(mocker):
+    mocker.patch.object(settings, "DJMPL_ADMISSION", OPTIONS)
+    mocker.patch.dict(admission._BUDGETS, clear=True)
+    cache.get_cache().clear()
+    yield admission.get_budget(OPTIONS["BUDGET"])
+    cache.get_cache().clear()
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_budget_acquire_release():
+    budget = admission.Budget(100)
+    first = budget.acquire(50, degrade_at=0.75)
+    assert not first.degraded
+    second = budget.acquire(40, degrade_at=0.75)
+    assert second.degraded
+    assert budget.pressure == 0.9
+
+    with pytest.raises(admission.Overloaded):
+        budget.acquire(20)
+
+    second.release()
+    second.release()
+    assert (budget.in_use, budget.active) == (50, 1)
+
+    first.release()
+    big = budget.acquire(500)
+    assert big.degraded
+    big.release()
+    assert (budget.in_use, budget.active) == (0, 0)
+
+
+def test_budget_waits_for_room():
+    budget = admission.Budget(100)
+    first = budget.acquire(100)
+    timer = threading.Timer(0.05, first.release)
+    timer.start()
+    second = budget.acquire(100, timeout=5)
+    timer.join()
+    assert first.released and not second.released
+
+
+def test_estimate_cost_and_data_size():
+    assert admission.estimate_cost(100, 2, "mpld3") == 800
+    assert admission.estimate_cost(0, 0, "png", {"png": 3}) == 3
+    assert admission.data_size(None) == 0
+    assert admission.data_size({"x": [1, 2, 3], "y": [1]}) == 3
+    assert admission.data_size(np.arange(7)) == 7
+    assert admission.data_size(object()) == 1
+
+
+def test_disabled_by_default():
+    view = AdmissionView()
+    assert view.get_admission_options() is None
+
+
+@pytest.mark.urls(__name__)
+def test_view_admitted(client, budget):
+    response = client.get("/admission/")
+
+    assert response.status_code == 200
+    assert response["X-Djmpl-Admission"] == "admitted"
+    assert b"djmpl-mpld3" in response.content
+    assert (budget.in_use, budget.active) == (0, 0)
+
+
+@pytest.mark.urls(__name__)
+def test_view_degraded(client, budget):
+    ticket = budget.acquire(500)
+    response = client.get("/admission/")
+    ticket.release()
+
+    assert response["X-Djmpl-Admission"] == "degraded"
+    assert b"djmpl-mpld3" not in response.content
+    assert b"djmpl-png" in response.content
+    assert (budget.in_use, budget.active) == (0, 0)
+
+
+@pytest.mark.urls(__name__)
+def test_view_shed_and_stale(client, budget):
+    ticket = budget.acquire(1000)
+    response = client.get("/admission/")
+    assert response.status_code == 503
+    assert response["Retry-After"] == "7"
+    assert response["X-Djmpl-Admission"] == "shed"
+    ticket.release()
+
+    rendered = client.get("/admission/")
+    assert rendered["X-Djmpl-Admission"] == "admitted"
+
+    ticket = budget.acquire(1000)
+    response = client.get("/admission/")
+    other = client.get("/admission/?other=1")
+    ticket.release()
+    assert response.status_code == 200
+    assert response["X-Djmpl-Admission"] == "stale"
+    assert response.content == rendered.content
+    assert other.status_code == 503
+
+
+@pytest.mark.urls(__name__)
+def test_view_stale_private_pages(client, budget):
+    assert client.get("/admission/csrf/").status_code == 200
+    assert client.get("/admission/session/").status_code == 200
+
+    ticket = budget.acquire(1000)
+    csrf = client.get("/admission/csrf/")
+    session = client.get("/admission/session/")
+    ticket.release()
+    assert csrf.status_code == 503
+    assert session.status_code == 503
+
+
+@pytest.mark.urls(__name__)
+def test_view_stale_respects_vary(client, budget):
+    rendered = client.get("/admission/vary/", HTTP_ACCEPT="text/html")
+    assert rendered["X-Djmpl-Admission"] == "admitted"
+
+    ticket = budget.acquire(1000)
+    same = client.get("/admission/vary/", HTTP_ACCEPT="text/html")
+    other = client.get("/admission/vary/", HTTP_ACCEPT="text/plain")
+    ticket.release()
+    assert same["X-Djmpl-Admission"] == "stale"
+    assert same.content == rendered.content
+    assert other.status_code == 503
+
+
+@pytest.mark.urls(__name__)
+def test_view_releases_on_error(client, budget):
+    client.raise_request_exception = False
+    response = client.get("/admission/?fail=1")
+    assert response.status_code == 500
+    assert (budget.in_use, budget.active) == (0, 0)
+
+
+@pytest.mark.urls(__name__)
+def test_view_opt_out(client, budget, mocker):
+    mocker.patch.object(AdmissionView, "admission", False)
+    ticket = budget.acquire(1000)
+    response = client.get("/admission/")
+    ticket.release()
+    assert response.status_code == 200
+    assert "X-Djmpl-Admission" not in response
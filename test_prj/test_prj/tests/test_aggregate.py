@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.aggregate
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+from django.contrib.auth.models import User
+
+from django_matplotlib import aggregate
+
+import matplotlib.pyplot as plt
+
+import numpy as np
+
+import pytest
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_grid_count():
+    agg = aggregate.GridAggregator(xlim=(0, 4), ylim=(0, 2), shape=(2, 4))
+    agg.update([0.5, 0.5, 3.5, 4.0, 10], [0.5, 0.5, 1.5, 2.0, 10])
+
+    result = agg.result()
+
+    assert result.shape == (2, 4)
+    assert result[0, 0] == 2
+    assert result[1, 3] == 2
+    assert result.mask.sum() == 6
+    assert agg.extent == (0, 4, 0, 2)
+
+
+@pytest.mark.parametrize(
+    "how, expected", [("sum", 4.0), ("mean", 2.0), ("max", 3.0), ("min", 1.0)]
+)
+def test_grid_reductions(how, expected):
+    agg = aggregate.GridAggregator(
+        xlim=(0, 1), ylim=(0, 1), shape=(1, 1), how=how
+    )
+    agg.update([0.1], [0.1], [1.0])
+    agg.update([0.9], [0.9], [3.0])
+
+    assert agg.result()[0, 0] == expected
+
+
+def test_grid_reduction_without_values():
+    agg = aggregate.GridAggregator(
+        xlim=(0, 1), ylim=(0, 1), shape=(1, 1), how="mean"
+    )
+    with pytest.raises(ValueError):
+        agg.update([0.1], [0.1])
+
+
+def test_grid_invalid_reduction():
+    with pytest.raises(ValueError):
+        aggregate.GridAggregator(
+            xlim=(0, 1), ylim=(0, 1), shape=(1, 1), how="median"
+        )
+
+
+def test_iter_chunks_arrays():
+    data = {"x": np.arange(10), "y": np.arange(10) * 2}
+    chunks = list(aggregate.iter_chunks(data, ("x", "y"), chunk_size=4))
+
+    assert [len(cx) for cx, _ in chunks] == [4, 4, 2]
+    np.testing.assert_array_equal(chunks[-1][1], [16, 18])
+
+
+def test_scatter_density_arrays():
+    fig, ax = plt.subplots()
+    x = np.random.default_rng(42).random(10_000)
+
+    img = aggregate.scatter_density(ax, x=x, y=x, shape=(10, 20))
+
+    assert img.get_array().shape == (10, 20)
+    assert img.get_array().sum() == 10_000
+    assert list(ax.images) == [img]
+    plt.close(fig)
+
+
+def test_scatter_density_pixel_shape():
+    fig, ax = plt.subplots(figsize=(2, 1), dpi=100)
+    x = np.arange(100)
+
+    img = aggregate.scatter_density(ax, x=x, y=x)
+
+    bbox = ax.get_window_extent()
+    assert img.get_array().shape == (round(bbox.height), round(bbox.width))
+    plt.close(fig)
+
+
+@pytest.mark.django_db
+def test_scatter_density_queryset():
+    for idx in range(5):
+        User.objects.create(username=f"user{idx}")
+    fig, ax = plt.subplots()
+
+    img = aggregate.scatter_density(
+        ax,
+        User.objects.all(),
+        x="id",
+        y="id",
+        value="id",
+        how="max",
+        shape=(5, 5),
+        chunk_size=2,
+    )
+
+    ids = list(User.objects.values_list("id", flat=True))
+    assert img.get_array().max() == max(ids)
+    assert img.get_extent() == [min(ids), max(ids), min(ids), max(ids)]
+    plt.close(fig)
+
+
+def test_scatter_density_empty_arrays():
+    fig, ax = plt.subplots()
+
+    img = aggregate.scatter_density(ax, x=np.array([]), y=np.array([]))
+
+    assert img.get_extent() == [0.0, 1.0, 0.0, 1.0]
+    assert img.get_array().count() == 0
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+@pytest.mark.django_db
+def test_scatter_density_empty_queryset():
+    fig, ax = plt.subplots()
+
+    img = aggregate.scatter_density(
+        ax, User.objects.none(), x="id", y="id", value="id", how="mean"
+    )
+
+    assert img.get_extent() == [0.0, 1.0, 0.0, 1.0]
+    fig.canvas.draw()
+    plt.close(fig)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.blit
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import io
+
+from django.test import RequestFactory
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import blit
+
+from matplotlib import image
+
+import numpy as np
+
+import pytest
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    blit.clear_cache()
+    yield
+    blit.clear_cache()
+
+
+def make_plot(size, xlim=(0, 100), blit_key="series", **kwargs):
+    plot = djmpl.subplots(
+        plot_format="png",
+        template_engine="str",
+        blit=True,
+        blit_key=blit_key,
+        **kwargs,
+    )
+    fig, ax = plot.figaxes()
+    ax.axhline(0, color="0.8")
+    x = np.arange(size, dtype=float)
+    ax.plot(x, np.cos(x / 10), animated=True)
+    ax.set_title("Series")
+    ax.set_xlim(*xlim)
+    ax.set_ylim(-1.5, 1.5)
+    return plot
+
+
+def pixels(png):
+    return image.imread(io.BytesIO(png))
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_render_png_reuses_background(mocker):
+    first = make_plot(50).to_bytes()
+    assert blit.cache_info()["size"] == 1
+
+    plot = make_plot(50)
+    draw = mocker.spy(plot.fig.canvas, "draw")
+    second = plot.to_bytes()
+
+    draw.assert_not_called()
+    np.testing.assert_array_equal(pixels(first), pixels(second))
+
+
+def test_render_png_draws_the_animated_artists():
+    make_plot(50).to_bytes()
+    incremental = make_plot(80).to_bytes()
+
+    blit.clear_cache()
+    full = make_plot(80).to_bytes()
+    np.testing.assert_array_equal(pixels(incremental), pixels(full))
+
+    static = make_plot(50).to_bytes()
+    assert not np.array_equal(pixels(incremental), pixels(static))
+
+
+def test_render_png_constrained_layout(mocker):
+    miss = make_plot(50, layout="constrained").to_bytes()
+
+    plot = make_plot(50, layout="constrained")
+    draw = mocker.spy(plot.fig.canvas, "draw")
+    hit = plot.to_bytes()
+
+    draw.assert_not_called()
+    np.testing.assert_array_equal(pixels(miss), pixels(hit))
+
+    blit.clear_cache()
+    unlayouted = make_plot(50).to_bytes()
+    assert not np.array_equal(pixels(miss), pixels(unlayouted))
+
+
+def test_render_png_new_limits_redraw(mocker):
+    make_plot(50).to_bytes()
+
+    plot = make_plot(150, xlim=(0, 200))
+    draw = mocker.spy(plot.fig.canvas, "draw")
+    plot.to_bytes()
+
+    draw.assert_called_once()
+    assert blit.cache_info()["size"] == 2
+
+
+def test_to_bytes_with_kwargs_is_not_incremental():
+    plot = make_plot(50)
+    png = plot.to_bytes(dpi=50)
+    assert pixels(png).shape[:2] == (240, 320)
+    assert blit.cache_info()["size"] == 0
+
+
+def test_view_blit():
+    class BlitView(djmpl.PlotMixin, TemplateView):
+        template_name = "test_djmpl/SinglePlot.html"
+        plot_format = "png"
+        plot_data = [1, 2, 3]
+        blit = True
+
+        def plot(self, data, fig, ax):
+            ax.plot(data, animated=True)
+
+    response = BlitView.as_view()(RequestFactory().get("/"))
+    response.render()
+
+    plot = response.context_data["plot"]
+    assert plot.blit
+    assert plot.blit_key[1] == "plot"
+    assert b"data:image/png;base64," in response.content
+    assert blit.cache_info()["size"] == 1
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for the stale-while-revalidate entries of django_matplotlib.cache
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import threading
+import time
+
+from django_matplotlib import cache
+
+import pytest
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+
+@pytest.fixture
+def backend():
+    cache.get_cache().clear()
+    yield cache.get_cache()
+    cache.get_cache().clear()
+
+
+class Counter:
+    def __init__(self, value="new", seconds=0):
+        self.value = value
+        self.seconds = seconds
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.seconds)
+        return self.value
+
+
+def store_stale(backend, key, value="old"):
+    # fresh until one second ago, stored for one more minute
+    cache._store(backend, key, value, -1, 61)
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_miss_and_fresh_hit(backend):
+    render = Counter()
+    key = cache.make_key("test", "fresh")
+
+    assert cache.get_or_render("test", key, render, 60) == "new"
+    assert cache.get_or_render("test", key, render, 60) == "new"
+    assert render.calls == 1
+
+
+def test_timeout_none_is_always_fresh(backend):
+    render = Counter()
+    key = cache.make_key("test", "forever")
+
+    cache.get_or_render("test", key, render, None)
+    cache.get_or_render("test", key, render, None)
+    assert render.calls == 1
+
+
+def test_stale_served_and_refreshed_once(backend):
+    render = Counter(seconds=0.1)
+    key = cache.make_key("test", "stale")
+    store_stale(backend, key)
+
+    values = [
+        cache.get_or_render("test", key, render, 60, stale_timeout=60)
+        for _ in range(5)
+    ]
+    assert values == ["old"] * 5
+
+    cache._get_executor().submit(lambda: None).result()
+    deadline = time.monotonic() + 5
+    while backend.get(f"{key}:lock") and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert render.calls == 1
+    assert cache.get_or_render("test", key, render, 60, 60) == "new"
+    assert render.calls == 1
+
+
+def test_stale_refreshed_in_request(backend):
+    render = Counter()
+    key = cache.make_key("test", "sync")
+    store_stale(backend, key)
+
+    value = cache.get_or_render(
+        "test", key, render, 60, stale_timeout=60, background=False
+    )
+    assert value == "new"
+    assert render.calls == 1
+
+
+def test_stale_without_stale_timeout_renders(backend):
+    render = Counter()
+    key = cache.make_key("test", "expired")
+    store_stale(backend, key)
+
+    assert cache.get_or_render("test", key, render, 60) == "new"
+    assert render.calls == 1
+
+
+def test_failed_refresh_keeps_stale(backend):
+    def fail():
+        raise ValueError("fail")
+
+    key = cache.make_key("test", "fail")
+    store_stale(backend, key)
+
+    value = cache.get_or_render(
+        "test", key, fail, 60, stale_timeout=60, background=False
+    )
+    assert value == "old"
+    assert backend.get(f"{key}:lock") is None
+
+
+def test_single_flight_on_miss(backend):
+    render = Counter(seconds=0.2)
+    key = cache.make_key("test", "flight")
+    results = []
+
+    def request():
+        results.append(cache.get_or_render("test", key, render, 60))
+
+    threads = [threading.Thread(target=request) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["new"] * 5
+    assert render.calls == 1
+
+
+def test_waiter_keeps_lock_of_other_owner(backend, mocker):
+    mocker.patch.object(cache, "LOCK_TIMEOUT", 0.1)
+    mocker.patch.object(cache, "POLL_INTERVAL", 0.01)
+    render = Counter()
+    key = cache.make_key("test", "owner")
+    backend.add(f"{key}:lock", "other", 60)
+
+    assert cache.get_or_render("test", key, render, 60) == "new"
+    assert render.calls == 1
+    assert backend.get(f"{key}:lock") == "other"
+
+
+def test_release_only_own_lock(backend):
+    lock_key = cache.make_key("test", "lock")
+    token = cache._acquire_lock(backend, lock_key)
+    assert cache._acquire_lock(backend, lock_key) is None
+
+    cache._release_lock(backend, lock_key, "other")
+    assert backend.get(lock_key) == token
+    cache._release_lock(backend, lock_key, token)
+    assert backend.get(lock_key) is None
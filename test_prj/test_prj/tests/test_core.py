@@ -23,6 +23,7 @@ from django_matplotlib import core, settings
 
 import jinja2
 
+import matplotlib
 import matplotlib.pyplot as plt
 
 from pyquery import PyQuery as pq
@@ -134,3 +135,157 @@ def test_invalid_and_format(engine):
 def test_invalid_engine(fmt):
     with pytest.raises(core.EngineNotSupported):
         djmpl.subplots(plot_format=fmt, template_engine="%NOT-EXISTS%")
+
+
+@pytest.mark.parametrize("threshold", [None, 10_000])
+def test_svg_sparse_scatter_not_rasterized(threshold):
+    plot = djmpl.subplots(
+        plot_format="svg",
+        template_engine="str",
+        rasterize_threshold=threshold,
+    )
+    fig, ax = plot.figaxes()
+    ax.scatter(range(100), range(100))
+
+    html = plot.to_html()
+
+    assert "<image" not in html
+
+
+def test_svg_dense_scatter_rasterized():
+    plot = djmpl.subplots(
+        plot_format="svg", template_engine="str", rasterize_threshold=100
+    )
+    fig, ax = plot.figaxes()
+    scatter = ax.scatter(range(1000), range(1000))
+    (line,) = ax.plot(range(10))
+    ax.set_title("Title")
+
+    html = plot.to_html()
+
+    assert html.count("<image") == 1
+    assert "<!-- Title -->" in html
+    assert not scatter.get_rasterized()
+    assert not line.get_rasterized()
+
+
+def test_rasterize_dense_artists():
+    fig, ax = plt.subplots()
+    scatter = ax.scatter(range(1000), range(1000))
+    (line,) = ax.plot(range(1000))
+    (small,) = ax.plot(range(10))
+
+    with core.rasterize_dense_artists(fig, 500) as dense:
+        assert dense == [line, scatter]
+        assert scatter.get_rasterized()
+        assert line.get_rasterized()
+        assert not small.get_rasterized()
+
+    assert not scatter.get_rasterized()
+    assert not line.get_rasterized()
+
+
+def test_rasterize_dense_artists_disabled():
+    fig, ax = plt.subplots()
+    scatter = ax.scatter(range(1000), range(1000))
+
+    with core.rasterize_dense_artists(fig, None) as dense:
+        assert dense == []
+        assert not scatter.get_rasterized()
+
+
+def test_artist_size():
+    fig, ax = plt.subplots()
+    scatter = ax.scatter(range(30), range(30))
+    (line,) = ax.plot(range(20))
+    text = ax.text(0, 0, "text")
+
+    assert core.artist_size(scatter) == 30
+    assert core.artist_size(line) == 20
+    assert core.artist_size(text) == 0
+
+
+def _draw_deterministic(plot):
+    fig, ax = plot.figaxes()
+    ax.plot([1, 2, 3], [3, 1, 2], label="line")
+    ax.scatter([1, 2, 3], [1, 2, 3])
+    ax.fill_between([1, 2, 3], [0, 1, 0], clip_on=True)
+    ax.legend()
+    return plot
+
+
+@pytest.mark.parametrize("fmt", settings.AVAILABLE_FORMATS)
+def test_deterministic_byte_stable(fmt):
+    htmls = {
+        _draw_deterministic(
+            djmpl.subplots(
+                plot_format=fmt, template_engine="str", deterministic=True
+            )
+        ).html_str()
+        for _ in range(2)
+    }
+    assert len(htmls) == 1
+
+
+@pytest.mark.parametrize("fmt", settings.AVAILABLE_FORMATS)
+def test_content_hash(fmt):
+    plots = [
+        _draw_deterministic(
+            djmpl.subplots(
+                plot_format=fmt, template_engine="str", deterministic=True
+            )
+        )
+        for _ in range(2)
+    ]
+    assert plots[0].content_hash() == plots[1].content_hash()
+    assert plots[0].content_hash() == core.content_hash(plots[0].html_str())
+
+    plots[1].axes.set_title("other")
+    assert plots[0].content_hash() != plots[1].content_hash()
+
+
+def test_deterministic_svg_without_date():
+    plot = djmpl.subplots(
+        plot_format="svg", template_engine="str", deterministic=True
+    )
+    assert "<dc:date>" not in plot.html_str()
+
+
+def test_deterministic_mpld3_stable_ids():
+    plot = djmpl.subplots(
+        plot_format="mpld3", template_engine="str", deterministic=True
+    )
+    _draw_deterministic(plot)
+    html = plot.html_str()
+    assert "eldjmpl0" in html
+    assert "fig_djmpl" in html
+
+
+def test_rc_context_only_with_rc(mocker):
+    rc_context = mocker.spy(matplotlib, "rc_context")
+
+    djmpl.subplots(plot_format="svg", template_engine="str").html_str()
+    assert rc_context.call_count == 0
+
+    djmpl.subplots(
+        plot_format="svg", template_engine="str", deterministic=True
+    ).html_str()
+    rc_context.assert_called_once_with(
+        {"svg.hashsalt": core.DETERMINISTIC_SVG_HASHSALT}
+    )
+
+
+def test_deterministic_default_from_settings(mocker):
+    mocker.patch.object(settings, "DJMPL_DETERMINISTIC", True)
+    assert djmpl.subplots().deterministic
+
+    mocker.patch.object(settings, "DJMPL_DETERMINISTIC", False)
+    assert not djmpl.subplots().deterministic
+
+
+def test_to_bytes():
+    plot = djmpl.subplots(plot_format="mpld3", template_engine="str")
+    assert plot.to_bytes("png").startswith(b"\x89PNG")
+    assert b"<svg" in plot.to_bytes("svg")
+    with pytest.raises(ValueError):
+        plot.to_bytes()
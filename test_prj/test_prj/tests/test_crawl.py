@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.crawl
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import json
+
+from django.core.management import call_command
+from django.urls import path
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import crawl, export, settings
+
+import pytest
+
+
+# =============================================================================
+# VIEWS AND URLS
+# =============================================================================
+
+
+class SeriesView(djmpl.PlotMixin, TemplateView):
+    template_name = "test_djmpl/SinglePlot.html"
+    plot_format = "png"
+
+    def get_plot_data(self):
+        return [1, int(self.request.GET["top"])]
+
+    def plot(self, data, fig, ax, size):
+        ax.plot(data * size)
+
+
+class StaticView(djmpl.PlotMixin, TemplateView):
+    template_name = "test_djmpl/SinglePlot.html"
+    plot_format = "png"
+    plot_data = [1, 2, 3]
+
+    def plot(self, data, fig, ax):
+        ax.plot(data)
+
+
+urlpatterns = [
+    path("series/<int:size>/", SeriesView.as_view(), name="series"),
+    path("static/", StaticView.as_view(), name="static"),
+]
+
+PARAM_SETS = {"series": [{"size": 2, "top": 5}, {"size": 3, "top": 1}]}
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+@pytest.mark.urls(__name__)
+def test_build_requests():
+    requests, skipped = crawl.build_requests(
+        export.discover_plot_urls(), PARAM_SETS
+    )
+    assert requests == [
+        (f"{__name__}.SeriesView", "/series/2/?top=5"),
+        (f"{__name__}.SeriesView", "/series/3/?top=1"),
+        (f"{__name__}.StaticView", "/static/"),
+    ]
+    assert skipped == []
+
+
+@pytest.mark.urls(__name__)
+def test_build_requests_skip_without_params(mocker):
+    mocker.patch.object(settings, "DJMPL_CRAWL", {})
+    requests, skipped = crawl.build_requests(export.discover_plot_urls())
+    assert requests == [(f"{__name__}.StaticView", "/static/")]
+    assert [s.name for s in skipped] == ["series"]
+
+
+def test_rate_limiter():
+    now, sleeps = [0.0], []
+
+    def sleep(secs):
+        sleeps.append(secs)
+        now[0] += secs
+
+    limiter = crawl.RateLimiter(rate=4, clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        limiter.wait()
+    assert sleeps == [0.25, 0.25]
+
+    crawl.RateLimiter(None, sleep=sleep).wait()
+    assert len(sleeps) == 2
+
+
+@pytest.mark.urls(__name__)
+def test_crawl():
+    requests = [
+        ("series", "/series/2/?top=5"),
+        ("series", "/series/3/"),
+        ("static", "/static/"),
+    ]
+    results = crawl.crawl(requests, concurrency=2)
+
+    by_url = {r["url"]: r for r in results}
+    assert by_url["/series/2/?top=5"]["status"] == 200
+    assert by_url["/static/"]["error"] is None
+    assert by_url["/series/3/"]["error"] == "HTTP 500"
+
+    report = {row["view"]: row for row in crawl.summarize(results)}
+    assert report["series"]["requests"] == 2
+    assert report["series"]["errors"] == 1
+    assert report["static"]["min"] == report["static"]["max"] > 0
+
+
+@pytest.mark.urls(__name__)
+def test_command(tmp_path, capsys):
+    params = tmp_path / "params.json"
+    params.write_text(json.dumps(PARAM_SETS))
+
+    call_command("djmpl_crawl", "--params", str(params), "--rate", "100")
+
+    out, _ = capsys.readouterr()
+    assert "3 requests, 0 errors" in out
+    assert f"{__name__}.SeriesView" in out
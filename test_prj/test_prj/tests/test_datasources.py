@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.datasources
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+from django.test import RequestFactory
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import aggregate, datasources
+
+import matplotlib.pyplot as plt
+
+import numpy as np
+
+import pytest
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+SIZE = 1000
+
+
+@pytest.fixture
+def table():
+    rng = np.random.default_rng(42)
+    return {
+        "time": np.arange(SIZE, dtype=float),
+        "temp": rng.random(SIZE),
+        "sensor": rng.integers(0, 10, SIZE),
+    }
+
+
+@pytest.fixture
+def npy_source(tmp_path, table):
+    dtype = [(name, arr.dtype) for name, arr in table.items()]
+    arr = np.empty(SIZE, dtype=dtype)
+    for name, values in table.items():
+        arr[name] = values
+    path = tmp_path / "data.npy"
+    np.save(path, arr)
+    return datasources.NpyDataSource(str(path))
+
+
+@pytest.fixture
+def npy2d_source(tmp_path, table):
+    path = tmp_path / "data2d.npy"
+    np.save(path, np.column_stack([table["time"], table["temp"]]))
+    return datasources.NpyDataSource(str(path), names=("time", "temp"))
+
+
+@pytest.fixture
+def parquet_source(tmp_path, table):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "data.parquet"
+    pq.write_table(pa.table(table), path, row_group_size=128)
+    return datasources.ParquetDataSource(str(path))
+
+
+@pytest.fixture
+def hdf5_source(tmp_path, table):
+    h5py = pytest.importorskip("h5py")
+    path = tmp_path / "data.h5"
+    with h5py.File(path, "w") as h5file:
+        group = h5file.create_group("sensors")
+        for name, values in table.items():
+            group.create_dataset(name, data=values)
+    return datasources.HDF5DataSource(str(path), group="sensors")
+
+
+@pytest.fixture(params=["npy_source", "parquet_source", "hdf5_source"])
+def source(request):
+    return request.getfixturevalue(request.param)
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_lazy_open(npy_source):
+    assert "handle" not in npy_source._state
+    assert len(npy_source) == SIZE
+    assert isinstance(npy_source.handle, np.memmap)
+
+
+def test_columns(source):
+    assert set(source.columns) == {"time", "temp", "sensor"}
+
+
+def test_queryset_api(source, table):
+    assert source.all() is source
+    assert source.count() == len(source) == SIZE
+    assert source.exists()
+    assert not source[SIZE:].exists()
+
+
+def test_values_list(source, table):
+    rows = source.values_list("time", "temp")[10:13]
+
+    assert list(rows) == list(
+        zip(table["time"][10:13].tolist(), table["temp"][10:13].tolist())
+    )
+    assert rows[0] == (table["time"][10], table["temp"][10])
+    assert rows[-1] == (table["time"][12], table["temp"][12])
+
+
+def test_values_list_flat(source, table):
+    values = source.values_list("temp", flat=True)[-5:]
+    assert list(values) == table["temp"][-5:].tolist()
+
+    with pytest.raises(TypeError):
+        source.values_list("temp", "time", flat=True)
+
+
+def test_values_list_unknown_field(source):
+    with pytest.raises(KeyError):
+        source.values_list("%NOT-EXISTS%")
+
+
+def test_slices_share_handle(source):
+    view = source.values_list("temp")[100:200][10:20]
+    assert len(view) == 10
+    assert view.handle is source.handle
+
+
+def test_index_out_of_range(source):
+    with pytest.raises(IndexError):
+        source[SIZE]
+
+
+def test_column_access(source, table):
+    np.testing.assert_array_equal(
+        source[500:510]["temp"], table["temp"][500:510]
+    )
+
+
+def test_to_numpy(source, table):
+    arr = np.asarray(source.values_list("time", "temp")[:20])
+    assert arr.shape == (20, 2)
+    np.testing.assert_array_equal(arr[:, 1], table["temp"][:20])
+
+    flat = np.asarray(source.values_list("sensor", flat=True))
+    np.testing.assert_array_equal(flat, table["sensor"])
+
+
+def test_chunks(source, table):
+    chunks = list(source.values_list("temp")[100:600].chunks(200))
+    assert [len(c["temp"]) for c in chunks] == [200, 200, 100]
+    np.testing.assert_array_equal(
+        np.concatenate([c["temp"] for c in chunks]), table["temp"][100:600]
+    )
+
+
+def test_npy_2d(npy2d_source, table):
+    assert npy2d_source.columns == ("time", "temp")
+    np.testing.assert_array_equal(npy2d_source["temp"], table["temp"])
+
+
+def test_npy_reads_are_views(npy_source):
+    assert np.shares_memory(npy_source["temp"], npy_source.handle)
+
+
+def test_aggregate_with_data_source(source):
+    fig, ax = plt.subplots()
+    img = aggregate.scatter_density(
+        ax, source, x="time", y="temp", shape=(4, 4), chunk_size=300
+    )
+    assert img.get_array().sum() == SIZE
+    plt.close(fig)
+
+
+def test_view_plot_data(npy_source, table):
+    class View(djmpl.PlotMixin, TemplateView):
+        template_name = "test_djmpl/SinglePlot.html"
+        plot_data = npy_source
+
+        def plot(self, data, fig, ax):
+            last = data.values_list("time", "temp")[-100:]
+            ax.plot(last["time"], last["temp"])
+
+    response = View.as_view()(RequestFactory().get("/"))
+    assert response.status_code == 200
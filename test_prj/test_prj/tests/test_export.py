@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.export
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import base64
+import json
+
+from django.core.management import call_command
+from django.urls import include, path
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import export
+
+from pyquery import PyQuery as pq
+
+import pytest
+
+
+# =============================================================================
+# VIEWS AND URLS
+# =============================================================================
+
+
+def draw(self, data, fig, ax):
+    ax.plot(data)
+
+
+# the plot methods are searched only in the class, not in the bases
+class PngView(djmpl.PlotMixin, TemplateView):
+    template_name = "test_djmpl/SinglePlot.html"
+    plot_data = [1, 2, 3]
+    plot_format = "png"
+    plot = draw
+
+
+class SvgView(PngView):
+    plot_format = "svg"
+    plot = draw
+
+
+class YearView(PngView):
+    def plot(self, data, fig, ax):
+        ax.plot(data)
+        ax.set_title(str(self.kwargs["year"]))
+
+
+nested = (
+    [path("svg/", SvgView.as_view(), name="svg")],
+    "nested",
+)
+
+urlpatterns = [
+    path("png/", PngView.as_view(), name="png"),
+    path("years/<int:year>/", YearView.as_view(), name="year"),
+    path("other/", TemplateView.as_view(template_name="x.html")),
+    path("charts/", include(nested, namespace="nested")),
+]
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+@pytest.mark.urls(__name__)
+def test_discover_plot_urls():
+    urls = {u.name: u for u in export.discover_plot_urls()}
+
+    assert set(urls) == {"png", "year", "nested:svg"}
+    assert urls["png"].params == ()
+    assert urls["png"].url() == "/png/"
+    assert urls["nested:svg"].url() == "/charts/svg/"
+    assert urls["nested:svg"].view_class is SvgView
+    assert urls["year"].params == ("year",)
+    assert urls["year"].url(year=2020) == "/years/2020/"
+    assert urls["year"].view_name == f"{__name__}.YearView"
+    with pytest.raises(ValueError):
+        urls["year"].url()
+
+
+def test_extract_images():
+    png = base64.b64encode(b"png-content").decode()
+    html = (
+        f"<img src='data:image/png;base64,{png}'>"
+        "<div class='djmpl djmpl-svg'><?xml version='1.0'?>\n"
+        "<svg><g/></svg></div>"
+    )
+    stored = {}
+
+    def store(content, ext):
+        stored[ext] = content
+        return f"/i/{ext}"
+
+    result = export.extract_images(html, store)
+
+    assert result == (
+        "<img src='/i/png'>"
+        "<div class='djmpl djmpl-svg'><img src='/i/svg'></div>"
+    )
+    assert stored == {
+        "png": b"png-content",
+        "svg": b"<?xml version='1.0'?>\n<svg><g/></svg>",
+    }
+
+
+def test_page_path():
+    assert export.page_path("/") == "index.html"
+    assert export.page_path("/a/b/") == "a/b/index.html"
+    assert export.page_path("/a?x=1") == "a/index.html"
+
+
+@pytest.mark.urls(__name__)
+def test_export(tmp_path):
+    results = export.export(["/png/", "/charts/svg/"], str(tmp_path))
+    assert [r["status"] for r in results] == ["written", "written"]
+
+    page = pq((tmp_path / "png" / "index.html").read_bytes())
+    src = page("div.djmpl-png img").attr("src")
+    assert src.startswith("../images/") and src.endswith(".png")
+    assert (tmp_path / "png" / src).read_bytes().startswith(b"\x89PNG")
+
+    page = pq((tmp_path / "charts" / "svg" / "index.html").read_bytes())
+    src = page("div.djmpl-svg img").attr("src")
+    assert src.startswith("../../images/") and src.endswith(".svg")
+    assert b"<svg" in (tmp_path / "charts" / "svg" / src).read_bytes()
+
+    manifest = json.loads((tmp_path / export.MANIFEST_NAME).read_text())
+    assert manifest["/png/"]["hash"] == results[0]["hash"]
+
+    # the plots are deterministic, so the pages are not written again
+    results = export.export(["/png/", "/charts/svg/"], str(tmp_path))
+    assert [r["status"] for r in results] == ["unchanged", "unchanged"]
+
+    results = export.export(["/png/"], str(tmp_path), force=True)
+    assert results[0]["status"] == "written"
+
+
+@pytest.mark.urls(__name__)
+def test_export_error(tmp_path):
+    results = export.export(["/missing/"], str(tmp_path))
+    assert results[0]["status"] == "error"
+    assert results[0]["error"] == "HTTP 404"
+
+
+def test_export_parallel(tmp_path):
+    results = export.export(
+        ["/PlotMixinTestView/", "/djmpl/metrics/"], str(tmp_path), jobs=2
+    )
+    statuses = {r["url"]: r["status"] for r in results}
+    assert statuses == {
+        "/PlotMixinTestView/": "written",
+        "/djmpl/metrics/": "written",
+    }
+    assert (tmp_path / "PlotMixinTestView" / "index.html").exists()
+
+
+@pytest.mark.urls(__name__)
+def test_command(tmp_path, capsys):
+    call_command("djmpl_export", "--all", "-o", str(tmp_path), "-j", "1")
+
+    out, err = capsys.readouterr()
+    assert "2 written, 0 unchanged, 0 errors" in out
+    assert "Skipping" in err and "YearView" in err
+    assert (tmp_path / "png" / "index.html").exists()
+    assert (tmp_path / "charts" / "svg" / "index.html").exists()
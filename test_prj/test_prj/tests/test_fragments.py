@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.fragments, the template tags and the jinja2
+extension
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.utils.safestring import SafeString
+
+from django_matplotlib import fragments
+from django_matplotlib.jinja2ext import DjmplExtension
+
+import jinja2
+
+from pyquery import PyQuery as pq
+
+import pytest
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+CALLS = []
+
+
+def line(n, fig, ax, color="k"):
+    CALLS.append((n, color))
+    ax.plot(range(n), color=color)
+
+
+@pytest.fixture(autouse=True)
+def named_plot():
+    cache.clear()
+    CALLS.clear()
+    fragments.register(line, name="line", version=lambda n, **kw: n % 2)
+    yield
+    fragments.unregister("line")
+    cache.clear()
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_register_decorator():
+    @fragments.register(name="other", timeout=10)
+    def plot(fig, ax):
+        pass
+
+    named = fragments.get_plot("other")
+    assert named.func is plot
+    assert named.timeout == 10
+    fragments.unregister("other")
+
+
+def test_get_plot_dotted_path_not_imported():
+    with pytest.raises(fragments.PlotNotFound):
+        fragments.get_plot(f"{__name__}.line")
+    with pytest.raises(fragments.PlotNotFound):
+        fragments.get_plot("os.getpid")
+
+
+def test_get_plot_not_found():
+    with pytest.raises(fragments.PlotNotFound):
+        fragments.get_plot("%NOT-EXISTS%")
+
+
+def test_render_plot_cached():
+    first = fragments.render_plot("line", 3, plot_format="png")
+    second = fragments.render_plot("line", 3, plot_format="png")
+
+    assert first == second
+    assert CALLS == [(3, "k")]
+    assert pq(first).has_class("djmpl-png")
+
+
+def test_render_plot_cache_key():
+    fragments.render_plot("line", 3, plot_format="png")
+    fragments.render_plot("line", 3, plot_format="svg")
+    fragments.render_plot("line", 4, plot_format="png")
+    fragments.render_plot("line", 3, plot_format="png", color="r")
+    fragments.render_plot("line", 3, plot_format="png", version="new")
+
+    assert len(CALLS) == 5
+
+
+def test_django_tag():
+    template = Template(
+        "{% load djmpl %}{% djmpl_plot 'line' 5 format='svg' color='r' %}"
+    )
+    html = template.render(Context())
+
+    assert pq(html).has_class("djmpl-svg")
+    assert CALLS == [(5, "r")]
+
+    assert template.render(Context()) == html
+    assert CALLS == [(5, "r")]
+
+
+def test_django_tag_is_safe():
+    from django_matplotlib.templatetags.djmpl import djmpl_plot
+
+    assert isinstance(djmpl_plot("line", 2, format="png"), SafeString)
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "{% djmpl_plot 'line', 5, format='svg', color='r' %}",
+        "{{ djmpl_plot('line', 5, format='svg', color='r') }}",
+    ],
+)
+def test_jinja2_extension(source):
+    env = jinja2.Environment(autoescape=True, extensions=[DjmplExtension])
+    html = env.from_string(source).render()
+
+    assert pq(html).has_class("djmpl-svg")
+    assert "&lt;" not in html
+    assert CALLS == [(5, "r")]
+
+
+def test_render_plot_stale(mocker):
+    fragments.register(line, name="stale", timeout=60, stale_timeout=600)
+    assert fragments.get_plot("stale").stale_timeout == 600
+
+    get_or_render = mocker.spy(fragments.cache, "get_or_render")
+    fragments.render_plot("stale", 3, plot_format="png")
+    assert get_or_render.call_args[0][3:] == (60, 600)
+
+    fragments.render_plot("line", 3, plot_format="png")
+    assert get_or_render.call_args[0][3:] == (300, 0)
+    fragments.unregister("stale")
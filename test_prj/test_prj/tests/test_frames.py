@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.frames
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import datetime as dt
+
+from django.contrib.auth.models import Group, User
+from django.test import RequestFactory
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import frames
+
+import numpy as np
+
+import pytest
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+
+@pytest.fixture
+def users():
+    start = dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+    return User.objects.bulk_create(
+        User(
+            username=f"user{idx}",
+            is_active=bool(idx % 2),
+            date_joined=start + dt.timedelta(minutes=30 * idx),
+        )
+        for idx in range(10)
+    )
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_field_dtype():
+    assert frames.field_dtype(User, "pk") == "int64"
+    assert frames.field_dtype(User, "is_active") == "bool"
+    assert frames.field_dtype(User, "date_joined") == "datetime64[us]"
+    assert frames.field_dtype(User, "last_login") == "datetime64[us]"
+    assert frames.field_dtype(User, "username") is None
+    assert frames.field_dtype(User, "groups__id") == "int64"
+    assert frames.field_dtype(User, "groups") == "int64"
+    assert frames.field_dtype(User, "unknown") is None
+    assert frames.field_dtype(Group, "name") is None
+
+
+@pytest.mark.django_db
+def test_queryset_arrays(users):
+    queryset = User.objects.order_by("pk")
+    arrays = frames.queryset_arrays(
+        queryset,
+        ["pk", "is_active", "date_joined", "last_login", "username"],
+        chunk_size=3,
+    )
+
+    assert arrays["pk"].dtype == np.int64
+    assert arrays["pk"].tolist() == [u.pk for u in users]
+    assert arrays["is_active"].dtype == bool
+    assert arrays["is_active"].sum() == 5
+    assert arrays["date_joined"].dtype == np.dtype("datetime64[us]")
+    assert arrays["date_joined"][1] == np.datetime64("2020-01-01T00:30")
+    assert np.isnat(arrays["last_login"]).all()
+    assert arrays["username"][0] == "user0"
+
+
+@pytest.mark.django_db
+def test_queryset_arrays_all_fields():
+    arrays = frames.queryset_arrays(User.objects.all())
+    assert "id" in arrays and "date_joined" in arrays
+    assert len(arrays["id"]) == 0
+    assert arrays["id"].dtype == np.int64
+
+
+def test_to_arrays_without_copies():
+    x = np.arange(5.0)
+    arrays = frames.to_arrays({"x": x, "y": [1, 2, 3, 4, 5]})
+    assert arrays["x"] is x
+    assert arrays["y"].tolist() == [1, 2, 3, 4, 5]
+
+    structured = np.zeros(3, dtype=[("a", float), ("b", int)])
+    arrays = frames.to_arrays(structured, ["a"])
+    assert list(arrays) == ["a"]
+    assert np.shares_memory(arrays["a"], structured)
+
+
+def test_to_arrays_invalid():
+    with pytest.raises(TypeError):
+        frames.to_arrays(42)
+
+
+def test_pipeline_arrays():
+    pipeline = frames.Pipeline(columns=["x"], as_frame=False)
+    assert list(pipeline.evaluate({"x": [1], "y": [2]})) == ["x"]
+
+    with pytest.raises(ValueError):
+        frames.Pipeline(index="x", as_frame=False)
+
+
+@pytest.mark.django_db
+def test_pipeline_frame(users):
+    pytest.importorskip("pandas")
+
+    pipeline = frames.Pipeline(
+        columns=["date_joined", "pk"],
+        index="date_joined",
+        steps=[frames.Resample("1h", how="count")],
+    )
+    frame = pipeline.evaluate(User.objects.all())
+
+    assert frame.index.name == "date_joined"
+    assert frame["pk"].tolist() == [2, 2, 2, 2, 2]
+
+
+def test_groupby_and_rolling():
+    pd = pytest.importorskip("pandas")
+
+    frame = pd.DataFrame({"g": [1, 1, 2, 2], "v": [1.0, 3.0, 5.0, 7.0]})
+    grouped = frames.GroupBy("g").apply(frame)
+    assert grouped["v"].tolist() == [2.0, 6.0]
+
+    rolled = frames.Rolling(2, how="sum", min_periods=1).apply(frame[["v"]])
+    assert rolled["v"].tolist() == [1.0, 4.0, 8.0, 12.0]
+
+
+def test_to_dataframe_without_copies():
+    pytest.importorskip("pandas")
+
+    x = np.arange(5.0)
+    frame = frames.to_dataframe({"x": x})
+    assert np.shares_memory(frame["x"].to_numpy(), x)
+
+
+def test_view_pipeline():
+    class PipelineView(djmpl.MultiPlotMixin, TemplateView):
+        template_name = "test_djmpl/MultiPlot.html"
+        plot_format = "png"
+        plot_data = {"x": [1, 2, 3], "y": [1.0, 4.0, 9.0]}
+        plot_pipeline = frames.Pipeline(as_frame=False)
+        received = []
+
+        def plot_a(self, data, fig, ax):
+            self.received.append(data)
+            ax.plot(data["x"], data["y"])
+
+        def plot_b(self, data, fig, ax):
+            self.received.append(data)
+
+    view = PipelineView(request=RequestFactory().get("/"), kwargs={})
+    view.get_context_data()
+
+    first, second = PipelineView.received
+    assert first is second
+    assert first["y"].dtype == np.float64
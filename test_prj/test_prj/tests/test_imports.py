@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for the modules loaded by a bare import of django_matplotlib
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import json
+import os
+import subprocess  # nosec
+import sys
+
+import pytest
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+HEAVY_MODULES = ["matplotlib", "matplotlib.pyplot", "mpld3", "jinja2"]
+
+LOADED_MODULES_CODE = """
+import json, sys
+{code}
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def loaded_modules(code):
+    """Execute code in a fresh interpreter and return the loaded
+    modules.
+
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="test_prj.settings")
+    env["PYTHONPATH"] = os.pathsep.join(sys.path)
+    output = subprocess.check_output(  # nosec
+        [sys.executable, "-c", LOADED_MODULES_CODE.format(code=code)],
+        env=env,
+    )
+    return set(json.loads(output))
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import django_matplotlib",
+        "import django; django.setup(); import django_matplotlib",
+        "import django_matplotlib; django_matplotlib.PlotView",
+    ],
+)
+def test_bare_import_is_lazy(code):
+    modules = loaded_modules(code)
+    assert "django_matplotlib" in modules
+    assert modules.isdisjoint(HEAVY_MODULES)
+
+
+def test_png_not_loads_mpld3_nor_jinja2():
+    modules = loaded_modules(
+        "import django_matplotlib as djmpl\n"
+        "djmpl.subplots(plot_format='png', template_engine='django')"
+        ".to_html()"
+    )
+    assert "matplotlib.pyplot" in modules
+    assert "mpld3" not in modules
+    assert "jinja2" not in modules
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for the async rendering of django_matplotlib.jinja2ext
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import time
+
+from django.utils.functional import SimpleLazyObject
+
+from django_matplotlib import core, jinja2ext
+
+import jinja2
+
+import pytest
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+class SlowPlot:
+    def __init__(self, name, seconds=0.2):
+        self.name = name
+        self.seconds = seconds
+
+    def html_str(self):
+        time.sleep(self.seconds)
+        return f"<p>{self.name}</p>"
+
+    def to_html(self):
+        return jinja2.utils.markupsafe.Markup(self.html_str())
+
+
+def async_env():
+    return jinja2.Environment(
+        enable_async=True,
+        autoescape=True,
+        extensions=[jinja2ext.DjmplExtension],
+    )
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_template_class():
+    assert async_env().template_class is jinja2ext.AsyncPlotTemplate
+
+    env = jinja2.Environment(extensions=[jinja2ext.DjmplExtension])
+    template = env.from_string("{{ plot.to_html() }}")
+    assert template.render(plot=SlowPlot("p", 0)) == "<p>p</p>"
+
+
+def test_plots_rendered_concurrently(mocker):
+    mocker.patch.object(jinja2ext.settings, "DJMPL_ASYNC_WORKERS", 4)
+    template = async_env().from_string(
+        "{% for plot in plots %}{{ plot.to_html() }}{% endfor %}{{ single }}"
+    )
+    plots = [SlowPlot(f"p{idx}") for idx in range(3)]
+
+    start = time.perf_counter()
+    html = template.render(plots=plots, single=SlowPlot("single"))
+    elapsed = time.perf_counter() - start
+
+    assert html == "<p>p0</p><p>p1</p><p>p2</p><p>single</p>"
+    assert elapsed < 0.6
+
+
+def test_real_plots():
+    def plot(value):
+        plot = core.subplots(
+            plot_format="svg", template_engine="jinja2", deterministic=True
+        )
+        plot.axes.plot([1, value])
+        return plot
+
+    template = async_env().from_string(
+        "{% for plot in plots %}{{ plot.to_html() }}{% endfor %}"
+    )
+    html = template.render(plots=(plot(2), plot(3)))
+
+    assert html == plot(2).to_html() + plot(3).to_html()
+
+
+def test_lazy_objects_not_evaluated():
+    def fail():
+        raise AssertionError("evaluated")
+
+    template = async_env().from_string("{{ plot.to_html() }}")
+    html = template.render(lazy=SimpleLazyObject(fail), plot=SlowPlot("p", 0))
+    assert html == "<p>p</p>"
+
+
+def test_awaitable_plot_errors():
+    class BrokenPlot(SlowPlot):
+        def html_str(self):
+            raise ValueError("broken")
+
+    template = async_env().from_string("{{ plot.to_html() }}")
+    with pytest.raises(ValueError, match="broken"):
+        template.render(plot=BrokenPlot("b"))
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.layout
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+from django.test import RequestFactory
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import layout, settings
+
+import matplotlib.pyplot as plt
+
+import pytest
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def make_figure(title="title", ylabel="y", data=(1, 2, 3)):
+    fig, ax = plt.subplots(figsize=(4, 3))
+    ax.plot(data)
+    ax.set_title(title)
+    ax.set_ylabel(ylabel)
+    return fig
+
+
+def subplotpars(fig):
+    return {p: getattr(fig.subplotpars, p) for p in layout.SUBPLOT_PARAMS}
+
+
+@pytest.fixture(autouse=True)
+def clear_layout_cache():
+    layout.clear_cache()
+    yield
+    layout.clear_cache()
+    plt.close("all")
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_layout_signature():
+    sig = layout.layout_signature(make_figure())
+
+    assert sig == layout.layout_signature(make_figure())
+    assert sig != layout.layout_signature(make_figure(title="other"))
+    assert sig != layout.layout_signature(make_figure(data=(1, 2, 3000)))
+    assert hash(sig)
+
+
+def test_cached_layout_equals_tight_layout(mocker):
+    tight = make_figure()
+    tight.tight_layout()
+
+    first, second = make_figure(), make_figure()
+    layout.apply_layout(first, "cached")
+
+    spy = mocker.spy(second, "tight_layout")
+    layout.apply_layout(second, "cached")
+
+    assert spy.call_count == 0
+    assert subplotpars(first) == pytest.approx(subplotpars(tight))
+    assert subplotpars(second) == pytest.approx(subplotpars(tight))
+    assert layout.cache_info()["size"] == 1
+
+
+def test_cached_layout_key():
+    layout.apply_layout(make_figure(), "cached", key=("a",))
+    layout.apply_layout(make_figure(), "cached", key=("b",))
+    assert layout.cache_info()["size"] == 2
+
+
+def test_cached_layout_max_size(monkeypatch):
+    monkeypatch.setattr(settings, "DJMPL_LAYOUT_CACHE_SIZE", 2)
+    for title in ("a", "b", "c"):
+        layout.apply_layout(make_figure(title=title), "cached")
+    assert layout.cache_info() == {"size": 2, "maxsize": 2}
+
+
+def test_fixed_layout():
+    fig = make_figure()
+    layout.apply_layout(fig, "fixed")
+    assert subplotpars(fig) == pytest.approx(settings.DJMPL_LAYOUT_MARGINS)
+
+
+def test_constrained_layout():
+    fig = make_figure()
+    layout.apply_layout(fig, "constrained")
+    assert fig.get_constrained_layout()
+
+
+def test_no_layout():
+    fig = make_figure()
+    before = subplotpars(fig)
+    layout.apply_layout(fig, None)
+    assert subplotpars(fig) == before
+
+
+def test_invalid_layout():
+    with pytest.raises(ValueError):
+        layout.apply_layout(make_figure(), "%NOT-EXISTS%")
+
+
+@pytest.mark.parametrize(
+    "tight_layout, view_layout, expected",
+    [
+        (False, None, None),
+        (True, None, "tight"),
+        (True, "cached", "cached"),
+        (False, "fixed", "fixed"),
+    ],
+)
+def test_view_layout(tight_layout, view_layout, expected, mocker):
+    class View(djmpl.MultiPlotMixin, TemplateView):
+        plot_data = [1, 2, 3]
+        template_name = "test_djmpl/SinglePlot.html"
+
+        def plot_a(self, data, fig, ax):
+            ax.plot(data)
+
+    View.tight_layout = tight_layout
+    View.layout = view_layout
+
+    apply_layout = mocker.spy(layout, "apply_layout")
+    View.as_view()(RequestFactory().get("/"))
+
+    assert apply_layout.call_args[0][1] == expected
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.live
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import asyncio
+import itertools as it
+import json
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import live
+
+import numpy as np
+
+from pyquery import PyQuery as pq
+
+import pytest
+
+
+# =============================================================================
+# VIEWS
+# =============================================================================
+
+
+class LiveView(djmpl.LivePlotMixin, TemplateView):
+    template_name = "test_djmpl/SinglePlot.html"
+    context_plot_name = "plot"
+    plot_format = "png"
+    live_columns = ("id", "id")
+    live_interval = 0.01
+    live_duration = 0.2
+
+    def get_queryset(self):
+        return User.objects.all()
+
+    def plot_users(self, data, fig, ax):
+        ids = list(data.values_list("id", flat=True))
+        ax.plot(ids, ids)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["plot"] = context["plot"][0]
+        return context
+
+
+def create_users(*names):
+    return [User.objects.create(username=name).pk for name in names]
+
+
+def parse_events(content):
+    """Return the (id, data) of the "rows" events of a stream."""
+    events = []
+    for block in content.split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if ": " in line
+        )
+        if fields.get("event") == "rows":
+            events.append((fields["id"], json.loads(fields["data"])))
+    return events
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_read_rows_mapping():
+    data = {"x": np.arange(5), "y": np.arange(5) * 2.0}
+
+    rows, cursor = live.read_rows(data, ("x", "y"), "", limit=3)
+    assert rows == {"x": [0, 1, 2], "y": [0.0, 2.0, 4.0]}
+    assert cursor == "3"
+
+    rows, cursor = live.read_rows(data, ("x", "y"), cursor, limit=3)
+    assert rows == {"x": [3, 4], "y": [6.0, 8.0]}
+    assert cursor == "5"
+
+    rows, cursor = live.read_rows(data, ("x", "y"), cursor)
+    assert rows == {"x": [], "y": []}
+    assert cursor == "5"
+
+
+@pytest.mark.django_db
+def test_read_rows_queryset():
+    pks = create_users("a", "b", "c")
+    queryset = User.objects.all()
+
+    assert live.current_cursor(queryset, ("id",)) == str(pks[-1])
+    assert live.until_cursor(queryset, str(pks[1])).count() == 2
+
+    rows, cursor = live.read_rows(queryset, ("username",), str(pks[0]))
+    assert rows == {"username": ["b", "c"]}
+    assert cursor == str(pks[-1])
+
+    rows, same = live.read_rows(queryset, ("username",), cursor)
+    assert rows == {"username": []}
+    assert same == cursor
+
+
+@pytest.mark.django_db
+def test_current_cursor_empty_queryset():
+    queryset = User.objects.all()
+    assert live.current_cursor(queryset, ("id",)) == ""
+    assert not live.until_cursor(queryset, "").exists()
+
+
+def test_format_event():
+    event = live.format_event({"a": [1]}, event_id="3", event="rows")
+    assert event == 'id: 3\nevent: rows\ndata: {"a":[1]}\n\n'
+
+
+def make_reader(batches):
+    batches = iter(batches)
+
+    def read(cursor):
+        return next(batches, ({}, cursor))
+
+    return read
+
+
+def test_stream_events():
+    clock = it.count()
+    read = make_reader([({"x": [1, 2]}, "2"), ({"x": [3]}, "3")])
+
+    events = list(
+        live.stream_events(
+            read,
+            "0",
+            duration=5,
+            retry=500,
+            sleep=lambda secs: None,
+            clock=lambda: next(clock),
+        )
+    )
+
+    assert events[0] == "retry: 500\n\n"
+    assert parse_events("".join(events)) == [
+        ("2", {"cursor": "2", "columns": {"x": [1, 2]}}),
+        ("3", {"cursor": "3", "columns": {"x": [3]}}),
+    ]
+    assert events[-1] == live.KEEPALIVE
+
+
+def test_astream_events():
+    read = make_reader([({"x": [1]}, "1")])
+
+    async def consume():
+        stream = live.astream_events(read, "0", interval=0, duration=0.05)
+        return [event async for event in stream]
+
+    events = asyncio.run(consume())
+    assert parse_events("".join(events)) == [
+        ("1", {"cursor": "1", "columns": {"x": [1]}})
+    ]
+    assert live.KEEPALIVE in events
+
+
+@pytest.mark.django_db
+def test_view_page():
+    pks = create_users("a", "b")
+
+    response = LiveView.as_view()(RequestFactory().get("/users/"))
+    response.render()
+
+    plot = response.context_data["plot"]
+    assert isinstance(plot, live.LivePlot)
+    div = pq(response.content)("div.djmpl-live")
+    assert div.attr("data-url") == f"/users/?live={pks[-1]}"
+    assert json.loads(div.attr("data-columns")) == ["id", "id"]
+    assert div("div.djmpl-png")
+
+
+@pytest.mark.django_db
+def test_view_stream():
+    pks = create_users("a", "b", "c")
+
+    request = RequestFactory().get("/users/", {"live": pks[0]})
+    response = LiveView.as_view()(request)
+    assert response["Content-Type"] == "text/event-stream"
+    assert response["Cache-Control"] == "no-cache"
+
+    content = b"".join(response.streaming_content).decode()
+    events = parse_events(content)
+    assert [event_id for event_id, _ in events] == [str(pks[-1])]
+    assert events[0][1]["columns"]["id"] == pks[1:]
+
+
+@pytest.mark.django_db
+def test_view_stream_last_event_id():
+    pks = create_users("a", "b", "c")
+
+    request = RequestFactory().get(
+        "/users/", {"live": pks[0]}, HTTP_LAST_EVENT_ID=str(pks[1])
+    )
+    response = LiveView.as_view()(request)
+
+    content = b"".join(response.streaming_content).decode()
+    events = parse_events(content)
+    assert events[0][1]["columns"]["id"] == pks[2:]
+
+
+def test_check_cursor():
+    queryset = User.objects.all()
+    assert live.check_cursor(queryset, "12") == "12"
+    assert live.check_cursor(queryset, "") == ""
+    assert live.check_cursor(queryset, "2020-01-01", "date_joined")
+    assert live.check_cursor({"x": []}, "3") == "3"
+
+    for data, cursor in [(queryset, "x"), ({"x": []}, "-1"), ({}, "1.5")]:
+        with pytest.raises(ValueError):
+            live.check_cursor(data, cursor)
+    with pytest.raises(ValueError):
+        live.check_cursor(queryset, "never", "date_joined")
+
+
+@pytest.mark.parametrize(
+    "query, headers",
+    [({"live": "abc"}, {}), ({"live": "1"}, {"HTTP_LAST_EVENT_ID": "1;"})],
+)
+def test_view_stream_invalid_cursor(query, headers):
+    request = RequestFactory().get("/users/", query, **headers)
+    response = LiveView.as_view()(request)
+    assert response.status_code == 400
+
+
+def test_view_stream_async(mocker):
+    view = LiveView(live_async=True)
+    view.setup(RequestFactory().get("/users/", {"live": "1"}))
+    mocker.patch.object(view, "read_live_rows", make_reader([]))
+
+    response = view.get(view.request)
+    assert response.is_async
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for test_prj.loadtest
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import pytest
+
+from test_prj import loadtest
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_percentile():
+    assert loadtest.percentile([3, 1, 2, 4, 5], 50) == 3
+    assert loadtest.percentile([1, 2], 50) == 1.5
+    assert loadtest.percentile([1, 2, 3], 100) == 3
+
+
+def test_scenario_paths():
+    paths = loadtest.scenario_paths(["png", "svg"], [1], [10, 20])
+    assert paths == [
+        "/load/png/1/10/",
+        "/load/png/1/20/",
+        "/load/svg/1/10/",
+        "/load/svg/1/20/",
+    ]
+
+
+@pytest.mark.parametrize("app_name", ["wsgi", "asgi"])
+def test_load_test(app_name):
+    paths = loadtest.scenario_paths(["png", "mpld3"], [1], [10])
+    report = loadtest.load_test(app_name, paths, clients=2, requests=6)
+
+    assert report.app == app_name
+    assert report.requests == 6
+    assert report.errors == 0
+    assert [len(v) for v in report.latencies.values()] == [3, 3]
+    assert 0 < report.p50 <= report.p95 <= report.p99
+    assert report.throughput > 0
+
+    assert loadtest.check_slo(report, {"p99": 60}) == []
+    assert loadtest.check_slo(report, {"p50": 0, "throughput": 1e9}) == [
+        f"{app_name}: p50 {report.p50:.4g} > 0",
+        f"{app_name}: throughput {report.throughput:.4g} < 1e+09",
+    ]
+
+
+def test_load_test_errors():
+    report = loadtest.load_test("wsgi", ["/load/png/1/"], requests=2)
+    assert report.errors == 2
+    assert report.error_rate == 1
+    assert loadtest.check_slo(report, {}) == ["wsgi: error_rate 1 > 0"]
+
+
+def test_load_test_invalid_app():
+    with pytest.raises(ValueError):
+        loadtest.load_test("cgi", ["/load/png/1/10/"])
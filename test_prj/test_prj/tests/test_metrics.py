@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.metrics
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import json
+import os
+import threading
+
+from django.core.exceptions import PermissionDenied
+from django.test import RequestFactory
+from django.urls import NoReverseMatch, reverse
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import metrics, settings
+
+import pytest
+
+
+# =============================================================================
+# FIXTURES AND VIEWS
+# =============================================================================
+
+
+class MetricsTestView(djmpl.PlotMixin, TemplateView):
+    plot_data = [1, 2, 3]
+    template_name = "test_djmpl/SinglePlot.html"
+    plot_format = "png"
+
+    def plot(self, data, fig, ax):
+        ax.plot(data)
+
+
+VIEW_NAME = f"{__name__}.MetricsTestView"
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    metrics.REGISTRY.reset()
+    yield metrics.REGISTRY
+    metrics.REGISTRY.reset()
+
+
+def value(name, **labels):
+    metric = metrics.REGISTRY.metrics[name]
+    return metric.values.get(metric.key(labels))
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_counter_gauge_histogram():
+    registry = metrics.Registry()
+    counter = registry.counter("c_total", "A counter", ("a",))
+    gauge = registry.gauge("g", "A gauge")
+    histogram = registry.histogram("h", "A histogram", buckets=(1, 10))
+
+    counter.inc(a="x")
+    counter.inc(2, a="x")
+    gauge.set(5)
+    gauge.dec()
+    for v in (0.5, 1, 5, 50):
+        histogram.observe(v)
+
+    assert counter.values[("x",)] == 3
+    assert gauge.values[()] == 4
+    assert histogram.values[()] == [2, 1, 1, 56.5, 4]
+
+    with pytest.raises(ValueError):
+        counter.inc(-1, a="x")
+    with pytest.raises(ValueError):
+        counter.inc(b="x")
+    with pytest.raises(ValueError):
+        registry.counter("c_total", "Duplicated")
+
+
+def test_exposition():
+    registry = metrics.Registry()
+    registry.counter("c_total", "A counter", ("a",)).inc(a='q"x')
+    registry.histogram("h", "A histogram", ("a",), buckets=(1,)).observe(
+        0.5, a="y"
+    )
+
+    text = metrics.exposition(registry.snapshot())
+    assert "# TYPE c_total counter" in text
+    assert 'c_total{a="q\\"x"} 1' in text
+    assert 'h_bucket{a="y",le="1"} 1' in text
+    assert 'h_bucket{a="y",le="+Inf"} 1' in text
+    assert 'h_sum{a="y"} 0.5' in text
+    assert 'h_count{a="y"} 1' in text
+
+
+def test_merge_discards_dead_gauges():
+    registry = metrics.Registry()
+    registry.counter("c_total", "A counter").inc()
+    registry.gauge("g", "A gauge").set(3)
+    registry.histogram("h", "A histogram", buckets=(1,)).observe(2)
+    snapshot = registry.snapshot()
+
+    merged = metrics.merge([(True, snapshot), (False, snapshot)])
+    assert merged["c_total"]["samples"] == [[[], 2]]
+    assert merged["g"]["samples"] == [[[], 3]]
+    assert merged["h"]["samples"] == [[[], [0, 2, 4, 2]]]
+
+
+def test_multiprocess_collect(tmp_path):
+    registry = metrics.Registry(directory=str(tmp_path))
+    registry.counter("c_total", "A counter").inc(5)
+
+    other = registry.snapshot()
+    other["c_total"]["samples"] = [[[], 7]]
+    # a finished process
+    (tmp_path / "999999999.json").write_text(json.dumps(other))
+
+    collected = registry.collect()
+    assert collected["c_total"]["samples"] == [[[], 12]]
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+
+
+def test_retired_processes(tmp_path):
+    registry = metrics.Registry(directory=str(tmp_path))
+    counter = registry.counter("c_total", "A counter")
+    gauge = registry.gauge("g", "A gauge")
+
+    dead = registry.snapshot()
+    dead["c_total"]["samples"] = [[[], 7]]
+    dead["g"]["samples"] = [[[], 1]]
+    # a finished process and a finished process with the same pid
+    (tmp_path / "999999999.json").write_text(json.dumps(dead))
+    (tmp_path / f"{os.getpid()}.json").write_text(json.dumps(dead))
+
+    counter.inc(5)
+    gauge.set(3)
+    registry.flush()
+    assert not (tmp_path / "999999999.json").exists()
+    retired = json.loads((tmp_path / metrics.RETIRED_FILE).read_text())
+    assert retired["c_total"]["samples"] == [[[], 14]]
+    assert retired["g"]["samples"] == []
+
+    collected = registry.collect()
+    assert collected["c_total"]["samples"] == [[[], 19]]
+    assert collected["g"]["samples"] == [[[], 3]]
+
+
+def test_concurrent_flush(tmp_path, mocker):
+    mocker.patch.object(metrics, "FLUSH_INTERVAL", 0)
+    registry = metrics.Registry(directory=str(tmp_path))
+    counter = registry.counter("c_total", "A counter")
+    errors = []
+
+    def work():
+        try:
+            for _ in range(50):
+                counter.inc()
+        except Exception as err:  # pragma: no cover
+            errors.append(err)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert registry.collect()["c_total"]["samples"] == [[[], 400]]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_flush_errors_logged(tmp_path, caplog):
+    path = tmp_path / "file"
+    path.write_text("")
+    registry = metrics.Registry(directory=str(path / "metrics"))
+    registry.counter("c_total", "A counter").inc()
+
+    registry.flush()
+    assert "metrics flush" in caplog.text
+
+
+def test_wrapper_records_encode():
+    plot = djmpl.subplots(
+        plot_format="png",
+        template_engine="str",
+        labels={"view": "v", "method": "m"},
+    )
+    html = plot.html_str()
+
+    labels = {"view": "v", "method": "m", "format": "png"}
+    assert value("djmpl_plots_rendered_total", **labels) == 1
+    assert value("djmpl_encode_seconds", **labels)[-1] == 1
+    assert value("djmpl_encoded_bytes", **labels)[-2] == len(html)
+
+
+def test_metrics_disabled(mocker):
+    mocker.patch.object(settings, "DJMPL_METRICS", False)
+    djmpl.subplots(plot_format="png", template_engine="str").html_str()
+    assert not metrics.PLOTS_RENDERED.values
+
+
+def test_view_records_render():
+    response = MetricsTestView.as_view()(RequestFactory().get("/"))
+    response.render()
+
+    labels = {"view": VIEW_NAME, "method": "plot", "format": "png"}
+    assert value("djmpl_render_seconds", **labels)[-1] == 1
+    assert value("djmpl_plots_rendered_total", **labels) == 1
+
+
+def test_metrics_view(client):
+    MetricsTestView.as_view()(RequestFactory().get("/")).render()
+
+    response = client.get("/djmpl/metrics/")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+
+    text = response.content.decode()
+    assert "# TYPE djmpl_render_seconds histogram" in text
+    assert (
+        "djmpl_plots_rendered_total{"
+        f'view="{VIEW_NAME}",method="plot",format="png"}} 1'
+    ) in text
+    assert "djmpl_open_figures " in text
+
+
+def test_metrics_view_forbidden(client):
+    response = client.get("/djmpl/metrics/", REMOTE_ADDR="10.1.2.3")
+    assert response.status_code == 403
+
+
+def test_metrics_view_allowed_network(client, mocker):
+    mocker.patch.object(
+        settings, "DJMPL_METRICS_ALLOWED_IPS", ("10.0.0.0/8", "::1")
+    )
+    response = client.get("/djmpl/metrics/", REMOTE_ADDR="10.1.2.3")
+    assert response.status_code == 200
+    response = client.get("/djmpl/metrics/")
+    assert response.status_code == 403
+
+
+def test_metrics_view_has_permission():
+    class TokenMetricsView(djmpl.MetricsView):
+        def has_permission(self, request):
+            return request.GET.get("token") == "secret"
+
+    view = TokenMetricsView.as_view()
+    request = RequestFactory().get("/", {"token": "secret"})
+    request.META["REMOTE_ADDR"] = "10.1.2.3"
+    assert view(request).status_code == 200
+
+    with pytest.raises(PermissionDenied):
+        view(RequestFactory().get("/"))
+
+
+def test_metrics_not_in_public_urls():
+    assert reverse("djmpl-metrics:metrics") == "/djmpl/metrics/"
+    with pytest.raises(NoReverseMatch):
+        reverse("djmpl:metrics")
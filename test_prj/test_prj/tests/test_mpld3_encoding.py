@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.mpld3_encoding
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import json
+import shutil
+import subprocess  # nosec
+
+import django_matplotlib as djmpl
+from django_matplotlib import mpld3_encoding
+
+import matplotlib.pyplot as plt
+
+import mpld3
+
+import numpy as np
+
+from pyquery import PyQuery as pq
+
+import pytest
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(42)
+    return {
+        "data01": np.column_stack(
+            [np.arange(1000), rng.normal(size=1000)]
+        ).tolist(),
+        "data02": [[1_600_000_000.5, 0.1], [1_600_000_001.5, np.nan]],
+    }
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+@pytest.mark.parametrize("delta", [False, True])
+def test_roundtrip(data, delta):
+    encoded = mpld3_encoding.encode_data(data, delta=delta)
+    decoded = mpld3_encoding.decode_data(encoded)
+
+    np.testing.assert_allclose(
+        decoded["data01"], data["data01"], rtol=1e-6, atol=1e-6
+    )
+    np.testing.assert_array_equal(decoded["data02"], data["data02"])
+
+
+def test_column_types(data):
+    encoded = mpld3_encoding.encode_data(data, delta=True)
+    index_col, values_col = encoded["data01"]["cols"]
+    timestamps_col, _ = encoded["data02"]["cols"]
+
+    assert (index_col["t"], index_col["d"]) == ("i32", 1)
+    assert (values_col["t"], values_col["d"]) == ("f32", 0)
+    # float32 would lose the decimals of the timestamps
+    assert timestamps_col["t"] == "f64"
+
+
+def test_encoding_is_smaller(data):
+    plain = json.dumps(data)
+    typed = json.dumps(mpld3_encoding.encode_data(data))
+    assert len(typed) < len(plain) / 2
+
+
+@pytest.mark.parametrize("encoding", ["typed", "typed-delta"])
+def test_fig_to_html(encoding):
+    fig, ax = plt.subplots()
+    ax.plot(np.arange(1000), np.sin(np.arange(1000)))
+
+    html = mpld3_encoding.fig_to_html(fig, encoding=encoding, figid="f1")
+    plain = mpld3.fig_to_html(fig, figid="f1")
+
+    assert "djmplDecodeFigure(" in html
+    assert mpld3_encoding.TYPED_MARK in html
+    assert len(html) < len(plain)
+    plt.close(fig)
+
+
+def test_fig_to_html_json_encoding():
+    fig, ax = plt.subplots()
+    ax.plot([1, 2, 3])
+    html = mpld3_encoding.fig_to_html(fig, encoding="json")
+    assert "djmplDecodeFigure" not in html
+    plt.close(fig)
+
+
+@pytest.mark.parametrize("engine", ["django", "str"])
+def test_subplots_mpld3_encoding(engine):
+    plot = djmpl.subplots(
+        plot_format="mpld3", template_engine=engine, mpld3_encoding="typed"
+    )
+    plot.axes.plot(range(100))
+
+    div = pq(plot.to_html())
+    assert div.has_class("djmpl-mpld3")
+    assert "djmplDecodeFigure" in div.html()
+
+
+def test_subplots_invalid_mpld3_encoding():
+    with pytest.raises(ValueError):
+        djmpl.subplots(plot_format="mpld3", mpld3_encoding="%NOT-EXISTS%")
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="requires node")
+@pytest.mark.parametrize("delta", [False, True])
+def test_javascript_decoder(data, delta):
+    encoded = mpld3_encoding.encode_data(data, delta=delta)
+    script = (
+        "var window = {};\n"
+        "var atob = (s) => Buffer.from(s, 'base64').toString('binary');\n"
+        f"{mpld3_encoding.DECODER_JS}\n"
+        f"var fig = window.djmplDecodeFigure({{data: {json.dumps(encoded)}}});"
+        "\nconsole.log(JSON.stringify(fig.data));"
+    )
+    output = subprocess.check_output(  # nosec
+        ["node", "-e", script], text=True
+    )
+    decoded = json.loads(output.replace("null", "NaN"))
+
+    np.testing.assert_allclose(
+        decoded["data01"], data["data01"], rtol=1e-6, atol=1e-6
+    )
+    np.testing.assert_array_equal(decoded["data02"], data["data02"])
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.multiples
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import multiples
+
+from pyquery import PyQuery as pq
+
+import pytest
+
+
+# =============================================================================
+# VIEWS
+# =============================================================================
+
+
+class MultiplesView(djmpl.MultiPlotMixin, TemplateView):
+    plot_data = [1, 2, 3]
+    plot_format = "png"
+    small_multiples = True
+    small_multiples_kwargs = {"sharey": True}
+
+    def plot_a(self, data, fig, ax):
+        ax.plot(data)
+        ax.set_title("a")
+
+    def plot_b(self, data, fig, ax):
+        ax.bar(data, data)
+
+    def plot_c(self, data, fig, ax):
+        ax.scatter(data, data)
+
+
+def get_plots(view_cls, **initkwargs):
+    view = view_cls(**initkwargs)
+    view.setup(RequestFactory().get("/"))
+    return view.get_context_data()["plots"]
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+@pytest.mark.parametrize(
+    "size, ncols, expected",
+    [(1, None, (1, 1)), (3, None, (2, 2)), (5, None, (2, 3)), (5, 5, (1, 5))],
+)
+def test_grid_shape(size, ncols, expected):
+    assert multiples.grid_shape(size, ncols) == expected
+
+
+def test_grid_shape_empty():
+    with pytest.raises(ValueError):
+        multiples.grid_shape(0)
+
+
+@pytest.mark.parametrize("fmt", ["png", "svg"])
+def test_view_small_multiples(fmt):
+    plots = get_plots(MultiplesView, plot_format=fmt)
+
+    assert [p.name for p in plots] == ["plot_a", "plot_b", "plot_c"]
+    assert len({id(p.sheet) for p in plots}) == 1
+    fig = plots[0].figaxes()[0]
+    assert len([ax for ax in fig.axes if ax.get_visible()]) == 3
+
+    sheet = plots[0].sheet
+    for plot in plots:
+        x, y, width, height = plot.bbox
+        assert 0 <= x and x + width <= sheet.width
+        assert 0 <= y and y + height <= sheet.height
+
+    # the panels in the first row are side by side
+    assert plots[0].bbox[0] + plots[0].bbox[2] <= plots[1].bbox[0]
+    assert plots[0].bbox[1] + plots[0].bbox[3] <= plots[2].bbox[1]
+
+
+def test_panel_html():
+    plots = get_plots(MultiplesView)
+    first, second = pq(plots[0].to_html()), pq(plots[1].to_html())
+
+    assert "data:image/png;base64" in first("style").text()
+    assert not second("style")
+    div = second("div.djmpl-panel")
+    assert plots[0].sheet.css_class in div.attr("class")
+    x, y, _, _ = plots[1].bbox
+    assert f"background-position:{-x}px {-y}px" in div.attr("style")
+
+
+def test_small_multiples_mpld3_not_supported():
+    with pytest.raises(ImproperlyConfigured):
+        get_plots(MultiplesView, plot_format="mpld3")
+
+
+@pytest.mark.parametrize("layout_name", ["constrained", "tight"])
+def test_small_multiples_bboxes_after_layout(layout_name):
+    def plot(data, fig, ax):
+        ax.plot(data)
+        ax.set_ylabel("label", fontsize=40)
+        ax.set_title("title", fontsize=40)
+
+    plots = multiples.render_small_multiples(
+        [plot] * 3, [1, 2, 3], "png", "str", layout_name=layout_name
+    )
+
+    height = plots[0].sheet.height
+    for panel in plots:
+        left, top, width, box_height = panel.bbox
+        # the axes and their labels are inside the crop of the panel
+        for extent in (
+            panel.axes.get_window_extent(),
+            panel.axes.get_tightbbox(),
+        ):
+            assert left <= extent.x0 and extent.x1 <= left + width
+            assert top <= height - extent.y1
+            assert height - extent.y0 <= top + box_height
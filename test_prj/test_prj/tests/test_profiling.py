@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.profiling
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import gc
+import pstats
+import tracemalloc
+from types import SimpleNamespace
+
+from django.test import RequestFactory
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import profiling, settings
+
+import pytest
+
+
+# =============================================================================
+# VIEWS
+# =============================================================================
+
+
+class ProfiledView(djmpl.PlotMixin, TemplateView):
+    plot_data = [1, 2, 3]
+    template_name = "test_djmpl/SinglePlot.html"
+    plot_format = "png"
+
+    def plot(self, data, fig, ax):
+        ax.plot(data)
+
+
+class FailingProfiledView(ProfiledView):
+    def plot(self, data, fig, ax):
+        raise ValueError("fail")
+
+
+@pytest.fixture
+def profile_dir(tmp_path, mocker):
+    mocker.patch.object(
+        settings, "DJMPL_PROFILE", {"DIR": str(tmp_path / "profiles")}
+    )
+    return tmp_path / "profiles"
+
+
+def get(staff=True, view=ProfiledView, **kwargs):
+    request = RequestFactory().get("/plot/", **kwargs)
+    request.user = SimpleNamespace(is_staff=staff)
+    response = view.as_view()(request)
+    response.render()
+    return response
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_profiler_phase(tmp_path):
+    profiler = profiling.Profiler(directory=str(tmp_path), prefix="req")
+    with profiler.phase("draw:plot"):
+        data = [0] * 100_000
+    profiler.stop()
+    del data
+
+    (phase,) = profiler.phases
+    assert phase.name == "draw:plot"
+    assert phase.duration > 0
+    assert phase.memory >= 100_000 * 8
+    assert not tracemalloc.is_tracing()
+
+    prof, snapshot = phase.files
+    assert prof.endswith("req-00-draw_plot.prof")
+    pstats.Stats(prof)
+    tracemalloc.Snapshot.load(snapshot)
+
+    assert profiler.summary().startswith("draw:plot;dur=")
+
+
+def test_profiler_phase_without_reset_peak(tmp_path, monkeypatch):
+    monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+    profiler = profiling.Profiler(directory=str(tmp_path), prefix="req")
+    with profiler.phase("draw:plot"):
+        data = [0] * 100_000
+    profiler.stop()
+    del data
+
+    (phase,) = profiler.phases
+    assert phase.memory >= 100_000 * 8
+    tracemalloc.Snapshot.load(phase.files[1])
+
+
+def test_profiler_without_tracemalloc(tmp_path):
+    profiler = profiling.Profiler(
+        directory=str(tmp_path), prefix="req", trace_memory=False
+    )
+    with profiler.phase("fetch"):
+        pass
+    assert len(profiler.files) == 1
+    assert profiler.phases[0].memory is None
+    assert "mem=" not in profiler.summary()
+
+
+def test_profilers_trace_one_at_a_time(tmp_path):
+    first = profiling.Profiler(directory=str(tmp_path), prefix="a")
+    second = profiling.Profiler(directory=str(tmp_path), prefix="b")
+    with first.phase("fetch"):
+        with second.phase("fetch"):
+            pass
+    second.stop()
+    assert tracemalloc.is_tracing()
+    first.stop()
+    first.stop()
+    assert not tracemalloc.is_tracing()
+
+    assert first.phases[0].memory is not None
+    assert second.phases[0].memory is None
+
+    third = profiling.Profiler(directory=str(tmp_path), prefix="c")
+    with third.phase("fetch"):
+        pass
+    third.stop()
+    assert third.phases[0].memory is not None
+
+
+def test_view_profile_param(profile_dir):
+    response = get(data={"djmpl_profile": "1"})
+
+    header = response["X-Djmpl-Profile"]
+    names = [phase.split(";")[0] for phase in header.split(", ")]
+    assert names == ["fetch", "draw:plot", "encode:plot"]
+    assert len(list(profile_dir.glob("*.prof"))) == 3
+    assert len(list(profile_dir.glob("*.tracemalloc"))) == 3
+    assert not tracemalloc.is_tracing()
+
+
+def test_view_profile_stopped_on_error(profile_dir):
+    with pytest.raises(ValueError):
+        get(view=FailingProfiledView, data={"djmpl_profile": "1"})
+    assert not tracemalloc.is_tracing()
+
+
+def test_view_profile_stopped_without_render(profile_dir):
+    request = RequestFactory().get("/plot/", {"djmpl_profile": "1"})
+    request.user = SimpleNamespace(is_staff=True)
+    response = ProfiledView.as_view()(request)
+    assert tracemalloc.is_tracing()
+
+    del response
+    gc.collect()
+    assert not tracemalloc.is_tracing()
+
+
+def test_view_profile_header(profile_dir):
+    response = get(HTTP_X_DJMPL_PROFILE="1")
+    assert "X-Djmpl-Profile" in response
+
+
+def test_view_profile_not_staff(profile_dir):
+    response = get(staff=False, data={"djmpl_profile": "1"})
+    assert "X-Djmpl-Profile" not in response
+    assert not profile_dir.exists()
+
+
+def test_view_profile_not_requested(profile_dir):
+    response = get()
+    assert "X-Djmpl-Profile" not in response
+
+
+def test_view_profile_disabled(mocker):
+    mocker.patch.object(settings, "DJMPL_PROFILE", None)
+    response = get(data={"djmpl_profile": "1"})
+    assert "X-Djmpl-Profile" not in response
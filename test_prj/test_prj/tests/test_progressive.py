@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.progressive
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import base64
+import io
+
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import include, path
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import cache, progressive
+
+import matplotlib.image
+
+from pyquery import PyQuery as pq
+
+import pytest
+
+
+# =============================================================================
+# VIEWS AND URLS
+# =============================================================================
+
+
+class ProgressiveView(djmpl.MultiPlotMixin, TemplateView):
+    template_name = "test_djmpl/MultiPlot.html"
+    plot_format = "png"
+    plot_data = [1, 3, 2]
+    progressive = True
+    subplots_kwargs = {"figsize": (4, 3), "dpi": 50}
+
+    def plot_a(self, data, fig, ax):
+        ax.plot(data)
+
+    def plot_b(self, data, fig, ax):
+        ax.bar(range(len(data)), data)
+
+
+urlpatterns = [
+    path("progressive/", ProgressiveView.as_view()),
+    path("djmpl/", include("django_matplotlib.urls")),
+]
+
+
+@pytest.fixture(autouse=True)
+def shared_cache(settings, tmp_path, mocker):
+    settings.CACHES = {
+        **settings.CACHES,
+        "djmpl-shared": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "cache"),
+        },
+    }
+    mocker.patch.object(progressive.settings, "DJMPL_CACHE", "djmpl-shared")
+    yield
+    cache.get_cache().clear()
+
+
+def png_shape(content):
+    return matplotlib.image.imread(io.BytesIO(content), format="png").shape
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_store_image():
+    name = progressive.store_image(b"content")
+    assert progressive.store_image(b"content") == name
+    assert progressive.get_image(name) == b"content"
+    assert progressive.get_image("missing") is None
+
+
+@pytest.mark.urls(__name__)
+def test_progressive_view(client):
+    response = client.get("/progressive/")
+    assert response.status_code == 200
+
+    imgs = pq(response.content)("div.djmpl-progressive img")
+    assert len(imgs) == 2
+
+    for img in imgs.items():
+        assert img.attr("loading") == "lazy"
+        assert (img.attr("width"), img.attr("height")) == ("200", "150")
+
+        preview = img.attr("style").split("base64,", 1)[1].split(")", 1)[0]
+        assert png_shape(base64.b64decode(preview))[:2] == (30, 40)
+
+        full = client.get(img.attr("src"))
+        assert full.status_code == 200
+        assert full["Content-Type"] == "image/png"
+        assert "immutable" in full["Cache-Control"]
+        assert png_shape(full.content)[:2] == (150, 200)
+
+
+@pytest.mark.urls(__name__)
+def test_image_view_not_found(client):
+    response = client.get("/djmpl/images/missing.png")
+    assert response.status_code == 404
+
+
+def test_progressive_only_local(rf):
+    view = ProgressiveView(request=rf.get("/"), kwargs={})
+    options = {"progressive": True, "plot_format": "png"}
+    with pytest.raises(ImproperlyConfigured):
+        view.render_plot(
+            view.plot_a, [1], {**options, "render_engine": "server"}
+        )
+
+
+def test_progressive_requires_shared_cache(rf, mocker):
+    mocker.patch.object(progressive.settings, "DJMPL_CACHE", "default")
+    view = ProgressiveView(request=rf.get("/"), kwargs={})
+    with pytest.raises(ImproperlyConfigured, match="shared"):
+        view.get_context_data()
+
+
+def test_content_hash_without_storing(mocker):
+    plot = djmpl.subplots(
+        plot_format="png", template_engine="str", deterministic=True
+    )
+    plot.axes.plot([1, 2])
+    progressive_plot = progressive.ProgressivePlot(plot)
+    store_image = mocker.spy(progressive, "store_image")
+
+    digest = progressive_plot.content_hash()
+    assert store_image.call_count == 0
+    assert digest == djmpl.core.content_hash(progressive_plot.html_str())
+
+
+def test_progressive_ignored_without_png(rf):
+    view = ProgressiveView(request=rf.get("/"), kwargs={})
+    view.plot_format = "svg"
+    context = view.get_context_data()
+    assert all(
+        isinstance(plot, djmpl.core.DjangoMatplotlibWrapper)
+        for plot in context["plots"]
+    )
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.renderserver
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import os
+import stat
+import threading
+
+from django.test import RequestFactory
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import renderserver
+
+import numpy as np
+
+from pyquery import PyQuery as pq
+
+import pytest
+
+
+# =============================================================================
+# DRAW FUNCTIONS AND VIEWS
+# =============================================================================
+
+
+def draw_line(data, fig, ax, title=None):
+    ax.plot(data)
+    ax.set_title(title)
+
+
+def draw_crash(data, fig, ax):
+    os._exit(1)
+
+
+def draw_error(data, fig, ax):
+    raise ValueError("error!")
+
+
+class RemoteView(djmpl.PlotMixin, TemplateView):
+    plot_data = [1, 2, 3]
+    template_name = "test_djmpl/SinglePlot.html"
+    render_engine = "server"
+    plot_format = "png"
+
+    def plot(self, data, fig, ax):
+        ax.plot(data)
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = renderserver.RenderServer(
+        socket_path=str(tmp_path / "djmpl.sock"),
+        workers=1,
+        max_jobs=2,
+        allowed=[
+            f"{__name__}:draw_line",
+            f"{__name__}:draw_crash",
+            f"{__name__}:draw_error",
+            f"{__name__}:RemoteView",
+        ],
+        timeout=30,
+    )
+    server.start()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def render_client(server):
+    return renderserver.RenderClient(socket_path=server.socket_path)
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_callable_reference():
+    view = RemoteView()
+    assert renderserver.callable_reference(draw_line) == (
+        f"{__name__}:draw_line"
+    )
+    assert renderserver.callable_reference(view.plot) == (
+        f"{__name__}:RemoteView.plot"
+    )
+
+
+def test_resolve_reference():
+    assert renderserver.resolve_reference(f"{__name__}:draw_line") is (
+        draw_line
+    )
+
+    method = renderserver.resolve_reference(f"{__name__}:RemoteView.plot")
+    assert isinstance(method.__self__, RemoteView)
+
+
+def test_is_allowed():
+    allowed = ["app:draw", "app.views:View"]
+    assert renderserver.is_allowed("app:draw", allowed)
+    assert renderserver.is_allowed("app.views:View.plot", allowed)
+    assert not renderserver.is_allowed("app:other", allowed)
+    assert not renderserver.is_allowed("app.views:View._private", allowed)
+    assert not renderserver.is_allowed("app.views:View.plot.x", allowed)
+    assert not renderserver.is_allowed("os:system", allowed)
+
+
+def test_not_allowed(render_client):
+    with pytest.raises(renderserver.RenderError, match="not allowed"):
+        render_client.render("os:getpid")
+    with pytest.raises(renderserver.RenderError, match="not allowed"):
+        render_client.submit({"draw": 42})
+
+
+def test_socket_permissions(server):
+    assert stat.S_IMODE(os.stat(server.socket_path).st_mode) == 0o600
+
+
+def test_default_socket_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    path = renderserver.options_from_settings()["SOCKET"]
+
+    directory = tmp_path / f"djmpl-{os.getuid()}"
+    assert path == str(directory / "render.sock")
+    assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+
+    directory.chmod(0o777)
+    with pytest.raises(renderserver.RenderError, match="only accessible"):
+        renderserver.default_socket_path()
+
+
+@pytest.mark.parametrize("engine", ["django", "str"])
+def test_render(render_client, engine):
+    plot = render_client.render(
+        draw_line,
+        data=np.arange(10),
+        plot_format="png",
+        template_engine=engine,
+        title="remote",
+    )
+
+    div = pq(plot.to_html())
+    assert div.has_class("djmpl-png")
+    assert plot.html_str() == str(plot.to_html())
+    with pytest.raises(renderserver.RenderError):
+        plot.figaxes()
+
+
+def test_worker_recycled_after_max_jobs(render_client):
+    pids = [
+        render_client.render(draw_line, data=[1, 2], plot_format="svg").worker
+        for _ in range(4)
+    ]
+    assert pids[0] == pids[1]
+    assert pids[1] != pids[2]
+    assert pids[2] == pids[3]
+
+
+def test_draw_error(render_client):
+    with pytest.raises(renderserver.RenderError, match="error!"):
+        render_client.render(draw_error)
+
+    # the server is still working
+    assert render_client.render(draw_line, data=[1]).html
+
+
+def test_worker_crash(render_client):
+    with pytest.raises(renderserver.RenderError, match="crashed"):
+        render_client.render(draw_crash)
+
+    assert render_client.render(draw_line, data=[1]).html
+
+
+def test_server_not_running(tmp_path):
+    client = renderserver.RenderClient(socket_path=str(tmp_path / "nope"))
+    with pytest.raises(renderserver.RenderError):
+        client.render(draw_line)
+
+
+def test_view_render_engine_server(server, mocker):
+    mocker.patch.object(
+        renderserver,
+        "get_client",
+        return_value=renderserver.RenderClient(server.socket_path),
+    )
+    request = RequestFactory().get("/")
+    response = RemoteView.as_view()(request)
+    response.render()
+
+    plot = response.context_data["plot"]
+    assert isinstance(plot, renderserver.RemotePlot)
+    assert pq(response.content)("div.djmpl-png")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.sparklines
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import io
+
+from django.utils.safestring import SafeString
+
+from django_matplotlib import sparklines
+
+import matplotlib.image as mpimg
+
+import numpy as np
+
+from pyquery import PyQuery as pq
+
+import pytest
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def points(svg):
+    coords = pq(svg)("polyline").attr("points").split()
+    return np.array(coords, dtype=int).reshape(-1, 2)
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_svg_sparklines():
+    svgs = sparklines.svg_sparklines(
+        [[1, 2, 3], [3, 2, 1, 0]], width=100, height=20, template_engine="str"
+    )
+    assert len(svgs) == 2
+
+    first, second = points(svgs[0]), points(svgs[1])
+    scale, pad = sparklines.SVG_SCALE, sparklines.PADDING
+
+    np.testing.assert_array_equal(first[:, 0], [0, 500, 1000])
+    np.testing.assert_array_equal(
+        first[:, 1], [(20 - pad) * scale, 100, pad * scale]
+    )
+    np.testing.assert_array_equal(second[:, 0], [0, 333, 667, 1000])
+    assert second[0, 1] == pad * scale and second[-1, 1] == (20 - pad) * 10
+
+
+def test_svg_sparklines_shared():
+    svgs = sparklines.svg_sparklines(
+        [[0, 1], [0, 2]], height=20, shared=True, template_engine="str"
+    )
+    assert points(svgs[0])[-1, 1] == 100
+    assert points(svgs[1])[-1, 1] == sparklines.PADDING * 10
+
+
+def test_svg_sparklines_nan_and_empty():
+    svgs = sparklines.svg_sparklines(
+        [[1, np.nan, 3], [], [5, 5]], template_engine="str"
+    )
+    assert len(points(svgs[0])) == 2
+    assert pq(svgs[1])("polyline").attr("points") == ""
+    assert set(points(svgs[2])[:, 1]) == {100}
+
+
+def test_svg_sparklines_safe():
+    (svg,) = sparklines.svg_sparklines([[1, 2]], template_engine="django")
+    assert isinstance(svg, SafeString)
+
+
+def test_sprite_sparklines():
+    series = [np.arange(10), np.arange(10)[::-1], np.ones(5)]
+    sheet = sparklines.sprite_sparklines(
+        series, width=50, height=10, template_engine="str"
+    )
+
+    assert len(sheet) == 3
+    image = mpimg.imread(io.BytesIO(sheet.png))
+    assert image.shape[:2] == (30, 50)
+    # every row has something drawn
+    for row in range(3):
+        assert image[row * 10 : (row + 1) * 10, :, 3].max() > 0
+
+    assert sheet.offset(2) == (0, -20)
+    html = list(sheet)
+    assert "background-position:0px -10px" in html[1]
+    assert "djmpl-sprite" in pq(html[0]).attr("class")
+    assert "width:50px;height:10px" in sheet.style()
+
+
+def test_sprite_offset_out_of_range():
+    sheet = sparklines.sprite_sparklines([[1, 2]], template_engine="str")
+    with pytest.raises(IndexError):
+        sheet.offset(1)
+
+
+def test_svg_sparklines_escape_color():
+    (svg,) = sparklines.svg_sparklines(
+        [[1, 2]], color="red' onload='alert(1)", template_engine="str"
+    )
+    assert pq(svg)("polyline").attr("stroke") == "red' onload='alert(1)"
+    assert pq(svg)("polyline").attr("onload") is None
+
+
+@pytest.mark.parametrize(
+    "css_class", ["a}body{display:none", "x' onclick='y", "1abc", "", None]
+)
+def test_sprite_invalid_css_class(css_class):
+    with pytest.raises(ValueError):
+        sparklines.sprite_sparklines(
+            [[1, 2]], css_class=css_class, template_engine="str"
+        )
+
+
+def test_sprite_css_class():
+    sheet = sparklines.sprite_sparklines(
+        [[1, 2]], css_class="my-sprite_2", template_engine="str"
+    )
+    assert "my-sprite_2" in pq(sheet.html(0)).attr("class")
+    assert sheet.style().startswith("<style>.my-sprite_2{")
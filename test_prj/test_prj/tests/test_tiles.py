@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.tiles
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import time
+
+from django.http import Http404
+from django.test import RequestFactory
+from django.views.generic import TemplateView
+
+import django_matplotlib as djmpl
+from django_matplotlib import cache, datasources, tiles
+
+import numpy as np
+
+from pyquery import PyQuery as pq
+
+import pytest
+
+
+# =============================================================================
+# VIEWS
+# =============================================================================
+
+SERIES = {
+    "x": np.arange(100_000, dtype=float),
+    "y": np.sin(np.arange(100_000) / 1000.0),
+}
+
+
+class TiledView(djmpl.TiledPlotMixin, TemplateView):
+    plot_data = SERIES
+    template_name = "test_djmpl/SinglePlot.html"
+    context_plot_name = "plot"
+    tile_size = 64
+    tile_max_zoom = 4
+
+    def plot_series(self, data, fig, ax):
+        ax.plot(data["x"], data["y"])
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["plot"] = context["plot"][0]
+        return context
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.get_cache().clear()
+    yield
+    cache.get_cache().clear()
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_tile_parse():
+    assert tiles.Tile.parse("2/1/3") == tiles.Tile(2, 1, 3)
+    assert str(tiles.Tile(2, 1, 3)) == "2/1/3"
+
+
+@pytest.mark.parametrize("value", ["", "1/2", "a/b/c", "1/2/0", "-1/0/0"])
+def test_tile_parse_invalid(value):
+    with pytest.raises(ValueError):
+        tiles.Tile.parse(value)
+
+
+def test_tile_parse_huge_zoom():
+    start = time.perf_counter()
+    with pytest.raises(ValueError):
+        tiles.Tile.parse("200000000/5/0")
+    with pytest.raises(ValueError):
+        tiles.Tile(200000000, 5, 0)
+    with pytest.raises(ValueError):
+        tiles.Tile.parse("5/0/0", max_zoom=4)
+    assert time.perf_counter() - start < 0.1
+
+
+def test_tile_bounds():
+    assert tiles.Tile(0, 0, 0).bounds((0, 8), (0, 4)) == ((0, 8), (0, 4))
+    assert tiles.Tile(1, 0, 0).bounds((0, 8), (0, 4)) == ((0, 4), (2, 4))
+    assert tiles.Tile(1, 1, 1).bounds((0, 8), (0, 4)) == ((4, 8), (0, 2))
+
+
+def test_minmax_downsample_keeps_extremes():
+    rng = np.random.default_rng(42)
+    x = np.arange(10_000, dtype=float)
+    y = rng.normal(size=10_000)
+    y[1234], y[8765] = 100, -100
+
+    dx, dy = tiles.minmax_downsample(x, y, (0, 10_000), bins=100)
+
+    assert len(dx) <= 200
+    assert np.all(np.diff(dx) > 0)
+    assert 100 in dy and -100 in dy
+    for col in range(100):
+        in_col = (x >= col * 100) & (x < (col + 1) * 100)
+        kept = (dx >= col * 100) & (dx < (col + 1) * 100)
+        assert dy[kept].max() == y[in_col].max()
+        assert dy[kept].min() == y[in_col].min()
+
+
+def test_minmax_downsample_small():
+    x, y = np.arange(10.0), np.arange(10.0)
+    dx, dy = tiles.minmax_downsample(x, y, (0, 10), bins=100)
+    np.testing.assert_array_equal(dx, x)
+    np.testing.assert_array_equal(dy, y)
+
+
+def test_minmax_aggregator_chunks():
+    rng = np.random.default_rng(42)
+    x = rng.uniform(-10, 1010, size=50_000)
+    y = rng.normal(size=50_000)
+
+    aggregator = tiles.MinMaxAggregator(xlim=(0, 1000), bins=50)
+    for start in range(0, len(x), 1000):
+        aggregator.update(x[start : start + 1000], y[start : start + 1000])
+    dx, dy = aggregator.result()
+
+    ex, ey = tiles.minmax_downsample(x, y, (0, 1000), bins=50)
+    inside = (dx >= 0) & (dx <= 1000)
+    expected = (ex >= 0) & (ex <= 1000)
+    np.testing.assert_array_equal(dx[inside], ex[expected])
+    np.testing.assert_array_equal(dy[inside], ey[expected])
+
+    # only the nearest point at each side of the window
+    np.testing.assert_array_equal(
+        np.sort(dx[~inside]), [x[x < 0].max(), x[x > 1000].min()]
+    )
+
+
+def test_minmax_aggregator_memory_bounded_by_bins():
+    aggregator = tiles.MinMaxAggregator(xlim=(0, 100), bins=10)
+    for _ in range(100):
+        aggregator.update(np.linspace(0, 100, 1000), np.ones(1000))
+    sizes = {
+        len(column)
+        for acc in (aggregator._min, aggregator._max)
+        for column in acc
+    }
+    assert sizes == {10}
+    assert aggregator._small is None
+    assert len(aggregator.result()[0]) <= 20
+
+
+def test_minmax_aggregator_empty():
+    aggregator = tiles.MinMaxAggregator(xlim=(0, 1), bins=10)
+    aggregator.update([], [])
+    dx, dy = aggregator.result()
+    assert len(dx) == len(dy) == 0
+
+
+def test_downsample_datasource(tmp_path, mocker):
+    path = tmp_path / "series.npy"
+    np.save(path, np.column_stack([SERIES["x"], SERIES["y"]]))
+    source = datasources.NpyDataSource(str(path), names=("x", "y"))
+    concatenate = mocker.spy(tiles, "window")
+
+    xs, ys = tiles.downsample(source, (0, 5000), bins=10)
+
+    concatenate.assert_not_called()
+    assert len(xs) <= 21
+    assert xs[-1] == 5001
+    np.testing.assert_array_equal(ys, np.sin(xs / 1000.0))
+
+
+@pytest.mark.parametrize("is_sorted", [True, False])
+def test_window_mapping(is_sorted):
+    xs, ys = tiles.window(SERIES, xlim=(10, 20), is_sorted=is_sorted)
+    assert xs.min() <= 10 and xs.max() >= 20
+    assert len(xs) <= 13
+    np.testing.assert_array_equal(ys, np.sin(xs / 1000.0))
+
+
+def test_window_datasource(tmp_path):
+    path = tmp_path / "series.npy"
+    np.save(path, np.column_stack([SERIES["x"], SERIES["y"]]))
+    source = datasources.NpyDataSource(str(path), names=("x", "y"))
+
+    xs, ys = tiles.window(source, xlim=(500, 600))
+    assert xs[0] == 499 and xs[-1] == 601
+    np.testing.assert_array_equal(ys, SERIES["y"][499:602])
+
+
+def test_render_tile_png():
+    png = tiles.render_tile(
+        lambda data, fig, ax: ax.plot(data["x"], data["y"]),
+        SERIES,
+        tiles.Tile(0, 0, 0),
+        (0, 100_000),
+        (-1, 1),
+        size=64,
+    )
+    assert png.startswith(b"\x89PNG")
+
+
+def test_view_viewer():
+    request = RequestFactory().get("/series/")
+    response = TiledView.as_view()(request)
+    response.render()
+
+    plot = response.context_data["plot"]
+    assert isinstance(plot, tiles.TiledPlot)
+    div = pq(response.content)("div.djmpl-tiles")
+    assert div.attr("data-url") == "/series/?tile=plot_series/"
+    assert div.attr("data-max-zoom") == "4"
+
+
+def test_view_tile(mocker):
+    render = mocker.spy(tiles, "render_tile")
+
+    request = RequestFactory().get("/series/", {"tile": "plot_series/2/1/3"})
+    response = TiledView.as_view()(request)
+    assert response["Content-Type"] == "image/png"
+    assert response.content.startswith(b"\x89PNG")
+
+    tile_data = render.call_args.args[1]
+    assert len(tile_data["x"]) <= 2 * TiledView.tile_size + 2
+    assert tile_data["x"].min() <= 25_000 and tile_data["x"].max() >= 50_000
+
+    # the second request is served from the cache
+    response = TiledView.as_view()(request)
+    assert render.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "plot_other/0/0/0",
+        "plot_series/x",
+        "plot_series/5/0/0",
+        "plot_series/200000000/5/0",
+    ],
+)
+def test_view_invalid_tile(value):
+    request = RequestFactory().get("/series/", {"tile": value})
+    with pytest.raises(Http404):
+        TiledView.as_view()(request)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, Juan B Cabral & QuatroPe
+# License: BSD-3-Clause
+#   Full Text: https://github.com/quatrope/djmpl/blob/master/LICENSE
+
+# =============================================================================
+# DOCS
+# =============================================================================
+"""Tests for django_matplotlib.warmup and django_matplotlib.apps
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+import sys
+
+from django.apps import apps
+
+from django_matplotlib import settings, warmup
+
+import pytest
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_warmup():
+    report = warmup.warmup(
+        font_cache=True, backends=["agg", "svg"], formats=["png", "svg"]
+    )
+
+    assert list(report) == [
+        "font_cache",
+        "backend:agg",
+        "backend:svg",
+        "format:png",
+        "format:svg",
+        "total",
+    ]
+    assert all(v >= 0 for v in report.values())
+    assert report["total"] >= sum(v for k, v in report.items() if k != "total")
+    assert "matplotlib.backends.backend_svg" in sys.modules
+
+
+def test_warmup_failed_step_is_reported(caplog):
+    report = warmup.warmup(font_cache=False, backends=["%NOT-EXISTS%"])
+
+    assert list(report) == ["backend:%NOT-EXISTS%", "total"]
+    assert "%NOT-EXISTS%" in caplog.text
+
+
+def test_warmup_module_backend():
+    warmup.warm_backend("module://matplotlib.backends.backend_agg")
+
+
+@pytest.mark.parametrize("value", [None, False, {}])
+def test_warmup_from_settings_disabled(monkeypatch, value):
+    monkeypatch.setattr(settings, "DJMPL_WARMUP", value)
+    assert warmup.warmup_from_settings() is None
+
+
+def test_warmup_from_settings(monkeypatch):
+    monkeypatch.setattr(
+        settings,
+        "DJMPL_WARMUP",
+        {"FONT_CACHE": False, "BACKENDS": [], "FORMATS": ["png"]},
+    )
+    report = warmup.warmup_from_settings()
+    assert list(report) == ["format:png", "total"]
+
+
+def test_app_config_ready(monkeypatch):
+    monkeypatch.setattr(settings, "DJMPL_WARMUP", {"FORMATS": ["svg"]})
+    config = apps.get_app_config("django_matplotlib")
+    monkeypatch.setattr(config, "warmup_report", None)
+
+    config.ready()
+
+    assert "format:svg" in config.warmup_report
+    assert "backend:agg" in config.warmup_report
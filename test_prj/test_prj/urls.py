@@ -14,11 +14,18 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-from django.urls import path
+from django.urls import include, path
 
-from .views import PlotMixinTestView
+from .views import LoadTestView, PlotMixinTestView
 
 
 urlpatterns = [
     path("PlotMixinTestView/", PlotMixinTestView.as_view()),
+    path("djmpl/metrics/", include("django_matplotlib.metrics_urls")),
+    path("djmpl/", include("django_matplotlib.urls")),
+    path(
+        "load/<str:plot_format>/<int:plots>/<int:size>/",
+        LoadTestView.as_view(),
+        name="load",
+    ),
 ]
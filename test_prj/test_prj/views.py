@@ -17,6 +17,8 @@
 import django_matplotlib as djmpl
 from django.views.generic.base import TemplateView
 
+import numpy as np
+
 # =============================================================================
 # THE VIEWS
 # =============================================================================
@@ -29,3 +31,26 @@ class PlotMixinTestView(djmpl.PlotMixin, TemplateView):
 
     def plot(self, data, fig, ax):
         ax.plot(data)
+
+
+class LoadTestView(djmpl.MultiPlotMixin, TemplateView):
+    """Synthetic view of the load tests: ``plots`` plots of a random walk
+    of ``size`` points in ``plot_format``.
+
+    """
+
+    template_name = "test_djmpl/MultiPlot.html"
+
+    def get_plot_format(self):
+        return self.kwargs["plot_format"]
+
+    def get_plot_data(self):
+        size = self.kwargs["size"]
+        return np.random.default_rng(size).normal(size=size).cumsum()
+
+    def get_plot_methods(self):
+        return [self.draw_series] * self.kwargs["plots"]
+
+    def draw_series(self, data, fig, ax, **kwargs):
+        ax.plot(data)
+        ax.set_title(f"{len(data)} points")